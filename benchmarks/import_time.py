@@ -0,0 +1,74 @@
+"""
+Import-time budget check for ``celeste_structured_output``.
+
+Imports the package in fresh interpreters and fails if the median import
+time exceeds the budget or if any provider SDK was imported eagerly:
+
+    python benchmarks/import_time.py [--budget 0.35] [--runs 7]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+DEFAULT_BUDGET = 0.35
+DEFAULT_RUNS = 7
+PROVIDER_SDKS = (
+    "anthropic",
+    "google.genai",
+    "huggingface_hub",
+    "mistralai",
+    "ollama",
+    "openai",
+    "httpx",
+    "dotenv",
+)
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import celeste_structured_output
+elapsed = time.perf_counter() - start
+sdks = sorted(name for name in {sdks!r} if name in sys.modules)
+print(json.dumps({{"seconds": elapsed, "sdks": sdks}}))
+"""
+
+
+def measure_once() -> dict:
+    env = {**os.environ, "PYTHONPATH": str(SRC), "PYTHONDONTWRITEBYTECODE": "1"}
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(sdks=PROVIDER_SDKS)],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    ).stdout
+    return json.loads(output)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    args = parser.parse_args()
+
+    samples = [measure_once() for _ in range(args.runs)]
+    median = statistics.median(sample["seconds"] for sample in samples)
+    sdks = sorted({name for sample in samples for name in sample["sdks"]})
+    report = {"median_seconds": median, "budget_seconds": args.budget, "sdks": sdks}
+    sys.stdout.write(json.dumps(report) + "\n")
+
+    assert not sdks, f"provider SDKs imported eagerly: {sdks}"
+    assert median <= args.budget, (
+        f"import took {median:.3f}s, budget is {args.budget:.3f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""
+Local mock servers speaking the OpenAI, Anthropic, Gemini and Mistral wire
+protocols, for offline benchmarks.
+
+One ``MockProviderServer`` answers all four protocols on a single port, with
+or without SSE streaming. Answers are generated from the request's JSON
+schema; arrays get ``items`` elements so large ``list[Model]`` outputs can be
+produced. ``latency`` delays the first byte, ``chunk_size`` and
+``chunk_delay`` shape the stream::
+
+    with MockProviderServer(latency=0.05, chunk_size=16) as server:
+        client = server.client("openai")
+        response = await client.generate_content(prompt, list[Person])
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from celeste_structured_output.jobs.fake import sample_from_schema  # noqa: E402
+
+PROVIDERS = ("openai", "anthropic", "google", "mistral")
+
+
+def build_answer(schema: Dict[str, Any], items: int) -> Any:
+    """A schema-valid answer whose top-level (or ``data``) array has ``items``."""
+    answer = sample_from_schema(schema)
+    if isinstance(answer, list):
+        return [_numbered(answer[0], i) for i in range(items)]
+    if isinstance(answer, dict) and isinstance(answer.get("data"), list):
+        return {
+            **answer,
+            "data": [_numbered(answer["data"][0], i) for i in range(items)],
+        }
+    return answer
+
+
+def _numbered(item: Any, index: int) -> Any:
+    if not isinstance(item, dict):
+        return item
+    return {
+        # Only the placeholder strings, so formats like dates stay valid
+        key: (f"{value}{index}" if value == "x" else value)
+        for key, value in item.items()
+    }
+
+
+class MockProviderServer:
+    """In-process HTTP/1.1 server emulating the providers' generate endpoints."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        chunk_size: int = 32,
+        chunk_delay: float = 0.0,
+        items: int = 10,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.items = items
+        self.requests = 0
+        self._lock = threading.Lock()
+        handler = type("Handler", (_Handler,), {"server_state": self})
+        self._server = _Server((host, port), handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> MockProviderServer:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> MockProviderServer:
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def client_kwargs(self, provider: str) -> Dict[str, Any]:
+        """Arguments pointing a provider client at this server."""
+        base_url = {
+            "openai": f"{self.base_url}/v1",
+            "anthropic": self.base_url,
+            "google": self.base_url,
+            "mistral": f"{self.base_url}/mistral",
+        }[provider]
+        return {"api_key": "mock", "base_url": base_url}
+
+    def client(self, provider: str, **kwargs: Any) -> Any:
+        from celeste_structured_output import create_structured_client
+
+        return create_structured_client(
+            provider, pooled=False, **self.client_kwargs(provider), **kwargs
+        )
+
+    def chunks(self, text: str) -> Iterator[str]:
+        for start in range(0, len(text), self.chunk_size):
+            yield text[start : start + self.chunk_size]
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Concurrency benchmarks open many connections at once
+    request_queue_size = 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_state: MockProviderServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        # Model lookups used by warm-up
+        self._send_json({"id": self.path.rsplit("/", 1)[-1], "object": "model"})
+
+    def do_POST(self) -> None:
+        state = self.server_state
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with state._lock:
+            state.requests += 1
+        path = self.path.split("?")[0]
+        if state.latency:
+            time.sleep(state.latency)
+
+        if path == "/v1/chat/completions":
+            return self._chat(body, "openai")
+        if path == "/mistral/v1/chat/completions":
+            return self._chat(body, "mistral")
+        if path == "/v1/messages":
+            return self._anthropic(body)
+        if ":generateContent" in path or ":streamGenerateContent" in path:
+            return self._gemini(body, stream=":streamGenerateContent" in path)
+        self._send_json({"error": f"unknown path {path}"}, 404)
+
+    # Responses
+
+    def _chat(self, body: Dict[str, Any], kind: str) -> None:
+        state = self.server_state
+        schema = body["response_format"]["json_schema"]["schema"]
+        text = json.dumps(build_answer(schema, state.items))
+        prompt = str(body["messages"][0]["content"])
+        usage = _usage(prompt, text)
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "created": int(time.time()),
+            "model": body["model"],
+        }
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": text}
+            return self._send_json(
+                {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [
+                        {"index": 0, "finish_reason": "stop", "message": message}
+                    ],
+                    "usage": usage,
+                }
+            )
+
+        events: List[Tuple[Optional[str], str]] = []
+        for delta in state.chunks(text):
+            choice = {"index": 0, "delta": {"content": delta}, "finish_reason": None}
+            chunk = {**base, "object": "chat.completion.chunk", "choices": [choice]}
+            events.append((None, json.dumps(chunk)))
+        final = {**base, "object": "chat.completion.chunk", "choices": []}
+        if kind == "mistral":
+            final["choices"] = [
+                {"index": 0, "delta": {"content": ""}, "finish_reason": "stop"}
+            ]
+        events.append((None, json.dumps({**final, "usage": usage})))
+        events.append((None, "[DONE]"))
+        self._send_sse(events)
+
+    def _anthropic(self, body: Dict[str, Any]) -> None:
+        state = self.server_state
+        tool = body["tools"][0]
+        text = json.dumps(build_answer(tool["input_schema"], state.items))
+        prompt = str(body["messages"][0]["content"])
+        usage = _usage(prompt, text)
+        message = {
+            "id": f"msg_{uuid.uuid4().hex}",
+            "type": "message",
+            "role": "assistant",
+            "model": body["model"],
+            "content": [],
+            "stop_reason": None,
+            "stop_sequence": None,
+            "usage": {"input_tokens": usage["prompt_tokens"], "output_tokens": 1},
+        }
+        tool_use = {
+            "type": "tool_use",
+            "id": f"toolu_{uuid.uuid4().hex}",
+            "name": tool["name"],
+            "input": {},
+        }
+        if not body.get("stream"):
+            return self._send_json(
+                {
+                    **message,
+                    "content": [{**tool_use, "input": json.loads(text)}],
+                    "stop_reason": "tool_use",
+                    "usage": {
+                        "input_tokens": usage["prompt_tokens"],
+                        "output_tokens": usage["completion_tokens"],
+                    },
+                }
+            )
+
+        events = [
+            ("message_start", {"type": "message_start", "message": message}),
+            (
+                "content_block_start",
+                {"type": "content_block_start", "index": 0, "content_block": tool_use},
+            ),
+        ]
+        for delta in state.chunks(text):
+            events.append(
+                (
+                    "content_block_delta",
+                    {
+                        "type": "content_block_delta",
+                        "index": 0,
+                        "delta": {"type": "input_json_delta", "partial_json": delta},
+                    },
+                )
+            )
+        events += [
+            ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+            (
+                "message_delta",
+                {
+                    "type": "message_delta",
+                    "delta": {"stop_reason": "tool_use", "stop_sequence": None},
+                    "usage": {"output_tokens": usage["completion_tokens"]},
+                },
+            ),
+            ("message_stop", {"type": "message_stop"}),
+        ]
+        self._send_sse([(name, json.dumps(data)) for name, data in events])
+
+    def _gemini(self, body: Dict[str, Any], stream: bool) -> None:
+        state = self.server_state
+        config = body.get("generationConfig", {})
+        schema = config.get("responseJsonSchema") or config.get("response_json_schema")
+        text = json.dumps(build_answer(schema or {}, state.items))
+        prompt = json.dumps(body.get("contents", ""))
+        usage = _usage(prompt, text)
+        metadata = {
+            "promptTokenCount": usage["prompt_tokens"],
+            "candidatesTokenCount": usage["completion_tokens"],
+            "totalTokenCount": usage["total_tokens"],
+        }
+
+        def candidate(part: str, done: bool) -> Dict[str, Any]:
+            entry: Dict[str, Any] = {
+                "content": {"parts": [{"text": part}], "role": "model"},
+                "index": 0,
+            }
+            if done:
+                entry["finishReason"] = "STOP"
+            return entry
+
+        if not stream:
+            return self._send_json(
+                {"candidates": [candidate(text, True)], "usageMetadata": metadata}
+            )
+        parts = list(state.chunks(text))
+        events = []
+        for position, part in enumerate(parts):
+            done = position == len(parts) - 1
+            chunk: Dict[str, Any] = {"candidates": [candidate(part, done)]}
+            if done:
+                chunk["usageMetadata"] = metadata
+            events.append((None, json.dumps(chunk)))
+        self._send_sse(events)
+
+    # Transport
+
+    def _send_json(self, payload: Any, status: int = 200) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_sse(self, events: List[Tuple[Optional[str], str]]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        delay = self.server_state.chunk_delay
+        for name, data in events:
+            frame = (f"event: {name}\n" if name else "") + f"data: {data}\n\n"
+            encoded = frame.encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(encoded), encoded))
+            self.wfile.flush()
+            if delay:
+                time.sleep(delay)
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def _usage(prompt: str, text: str) -> Dict[str, int]:
+    prompt_tokens = max(len(prompt) // 4, 1)
+    completion_tokens = max(len(text) // 4, 1)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
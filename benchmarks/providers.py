@@ -0,0 +1,366 @@
+"""
+Offline benchmarks of the library's own overhead against mock provider servers.
+
+Measures, for every provider class whose SDK is installed:
+
+- ``call_overhead``: median client call time minus a raw ``httpx`` request
+  to the same mock endpoint (zero server latency);
+- ``stream``: end-to-end streaming time and the incremental parse cost of
+  ``StreamAssembler`` per KB of output, with accumulated and delta partials;
+- ``validation``: validating a large ``list[Model]`` answer from JSON, in one
+  pass and item by item;
+- ``reply_validation``: parsing a whole OpenAI/Anthropic reply through the
+  SDK's objects versus validating its raw body in one pass;
+- ``throughput``: requests per second at a given concurrency.
+
+Results are written as JSON (stdout or ``--output``) so runs can be compared
+between releases::
+
+    python benchmarks/providers.py --items 1000 --concurrency 32 --output bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import date
+from typing import Any, Callable, Dict, List
+
+from mock_servers import PROVIDERS, MockProviderServer, build_answer
+from pydantic import BaseModel
+
+import celeste_structured_output
+from celeste_structured_output import StructuredOutputProvider
+from celeste_structured_output.core.minify import minimized_schema
+from celeste_structured_output.core.schema import compile_schema
+from celeste_structured_output.core.streaming import StreamAssembler
+
+SDKS = {
+    "openai": "openai",
+    "anthropic": "anthropic",
+    "google": "google.genai",
+    "mistral": "mistralai",
+}
+PROMPT = "Extract every person mentioned in the text."
+
+
+class Person(BaseModel):
+    name: str
+    age: int
+    email: str
+    tags: List[str]
+    birthday: date
+
+
+SCHEMA = list[Person]
+
+
+def _available(provider: str) -> bool:
+    try:
+        return importlib.util.find_spec(SDKS[provider]) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "median_ms": statistics.median(ordered) * 1e3,
+        "p95_ms": ordered[int(0.95 * (len(ordered) - 1))] * 1e3,
+        "mean_ms": statistics.fmean(ordered) * 1e3,
+    }
+
+
+def _raw_request(server: MockProviderServer, provider: str) -> Dict[str, Any]:
+    """The same request as the client's, built by hand for the httpx baseline."""
+    compiled = compile_schema(SCHEMA)
+    schema = minimized_schema(compiled, StructuredOutputProvider(provider))
+    messages = [{"role": "user", "content": PROMPT}]
+    if provider in ("openai", "mistral"):
+        prefix = "" if provider == "openai" else "/mistral"
+        response_format = {"json_schema": {"name": "ListWrapper", "schema": schema}}
+        return {
+            "url": f"{server.base_url}{prefix}/v1/chat/completions",
+            "json": {
+                "model": "m",
+                "messages": messages,
+                "response_format": response_format,
+            },
+        }
+    if provider == "anthropic":
+        tools = [{"name": "structured_output", "input_schema": schema}]
+        return {
+            "url": f"{server.base_url}/v1/messages",
+            "json": {"model": "m", "messages": messages, "tools": tools},
+        }
+    return {
+        "url": f"{server.base_url}/v1beta/models/m:generateContent",
+        "json": {
+            "contents": PROMPT,
+            "generationConfig": {
+                "responseJsonSchema": minimized_schema(
+                    compiled, StructuredOutputProvider.GOOGLE, wrapped=False
+                )
+            },
+        },
+    }
+
+
+async def _time_calls(call: Callable[[], Any], calls: int) -> List[float]:
+    await call()  # connection and schema warm-up
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def call_overhead(provider: str, args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    with MockProviderServer(items=args.items) as server:
+        client = server.client(provider)
+        raw = _raw_request(server, provider)
+        async with httpx.AsyncClient() as http:
+            baseline = await _time_calls(lambda: http.post(**raw), args.calls)
+        measured = await _time_calls(
+            lambda: client.generate_content(PROMPT, SCHEMA), args.calls
+        )
+        await client.aclose()
+    overhead = statistics.median(measured) - statistics.median(baseline)
+    return {
+        "client": _summary(measured),
+        "httpx_baseline": _summary(baseline),
+        "overhead_ms": overhead * 1e3,
+    }
+
+
+async def stream(provider: str, args: argparse.Namespace) -> Dict[str, Any]:
+    with MockProviderServer(items=args.items, chunk_size=args.chunk_size) as server:
+        client = server.client(provider)
+
+        async def consume() -> None:
+            async for _ in client.stream_generate_content(PROMPT, SCHEMA):
+                pass
+
+        samples = await _time_calls(consume, max(args.calls // 10, 3))
+        await client.aclose()
+    return {"end_to_end": _summary(samples)}
+
+
+def stream_parse(args: argparse.Namespace) -> Dict[str, Any]:
+    compiled = compile_schema(SCHEMA)
+    document = json.dumps(build_answer(compiled.wire_json_schema, args.items))
+    chunks = [
+        document[i : i + args.chunk_size]
+        for i in range(0, len(document), args.chunk_size)
+    ]
+    results: Dict[str, Any] = {"bytes": len(document), "chunks": len(chunks)}
+    for mode, deltas in (("accumulated", False), ("deltas", True)):
+        samples = []
+        for _ in range(5):
+            assembler = StreamAssembler(compiled, wrapped=True, deltas=deltas)
+            started = time.perf_counter()
+            for chunk in chunks:
+                assembler.feed(chunk)
+            assembler.finish()
+            samples.append(time.perf_counter() - started)
+        best = min(samples)
+        results[mode] = {
+            "seconds": best,
+            "us_per_kb": best / (len(document) / 1024) * 1e6,
+        }
+    return results
+
+
+def validation(args: argparse.Namespace) -> Dict[str, Any]:
+    compiled = compile_schema(SCHEMA)
+    results = {}
+    for items in sorted({100, args.items, 10 * args.items}):
+        document = json.dumps(build_answer(compiled.wire_json_schema, items))
+        from_json = min(
+            _elapsed(compiled.validate_wire_json, document) for _ in range(5)
+        )
+        from_python = min(
+            _elapsed(lambda raw: compiled.validate_wire(json.loads(raw)), document)
+            for _ in range(5)
+        )
+        per_item = min(_elapsed(_validate_items, document) for _ in range(5))
+        results[str(items)] = {
+            "bytes": len(document),
+            "validate_json_ms": from_json * 1e3,
+            "loads_then_validate_ms": from_python * 1e3,
+            "per_item_loop_ms": per_item * 1e3,
+            "us_per_item": from_json / items * 1e6,
+        }
+    return results
+
+
+def _validate_items(raw: str) -> List[Person]:
+    """The old per-provider path: decode, then validate item by item."""
+    return [Person.model_validate(item) for item in json.loads(raw)["data"]]
+
+
+def _reply_body(provider: str, text: str) -> bytes:
+    if provider == "openai":
+        message = {"role": "assistant", "content": text}
+        body: Dict[str, Any] = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "m",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": message}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+    else:
+        tool_use = {
+            "type": "tool_use",
+            "id": "toolu_1",
+            "name": "structured_output",
+            "input": json.loads(text),
+        }
+        body = {
+            "id": "msg_1",
+            "type": "message",
+            "role": "assistant",
+            "model": "m",
+            "content": [tool_use],
+            "stop_reason": "tool_use",
+            "usage": {"input_tokens": 1, "output_tokens": 1},
+        }
+    return json.dumps(body).encode()
+
+
+def _via_sdk(provider: str, client: Any, body: bytes) -> Any:
+    """What the SDK does with a reply body, followed by content validation."""
+    sdk = importlib.import_module(provider)
+    compiled = compile_schema(SCHEMA)
+    if provider == "openai":
+        reply_type = sdk.types.chat.ChatCompletion
+        reply = sdk._models.construct_type(type_=reply_type, value=json.loads(body))
+        return client.parse_completion(reply, compiled)
+    reply = sdk._models.construct_type(type_=sdk.types.Message, value=json.loads(body))
+    return client.parse_message(reply, compiled)
+
+
+def reply_validation(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Whole-reply parsing: the SDK decoding the body into its objects and then
+    validating the content, against validating the raw body in one pass.
+    """
+    compiled = compile_schema(SCHEMA)
+    results: Dict[str, Any] = {}
+    for provider in ("openai", "anthropic"):
+        if not _available(provider):
+            continue
+        client = celeste_structured_output.create_structured_client(
+            provider, pooled=False, api_key="mock"
+        )
+        client.prepare_schema(compiled)
+        results[provider] = {}
+        for items in sorted({args.items, 10 * args.items}):
+            text = json.dumps(build_answer(compiled.wire_json_schema, items))
+            body = _reply_body(provider, text)
+            sdk_ms = (
+                min(_elapsed(_via_sdk, provider, client, body) for _ in range(5)) * 1e3
+            )
+            one_pass_ms = (
+                min(_elapsed(client.parse_reply, body, compiled) for _ in range(5))
+                * 1e3
+            )
+            results[provider][str(items)] = {
+                "bytes": len(body),
+                "sdk_then_validate_ms": sdk_ms,
+                "one_pass_ms": one_pass_ms,
+                "speedup": sdk_ms / one_pass_ms,
+            }
+    return results
+
+
+def _elapsed(func: Callable[..., Any], *args: Any) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+async def throughput(provider: str, args: argparse.Namespace) -> Dict[str, Any]:
+    with MockProviderServer(latency=args.latency, items=args.items) as server:
+        client = server.client(provider)
+        await client.generate_content(PROMPT, SCHEMA)
+        prompts = [PROMPT] * args.requests
+        started = time.perf_counter()
+        results = await client.generate_batch(
+            prompts, SCHEMA, max_concurrency=args.concurrency
+        )
+        elapsed = time.perf_counter() - started
+        await client.aclose()
+    failures = sum(not result.ok for result in results)
+    return {
+        "concurrency": args.concurrency,
+        "server_latency_s": args.latency,
+        "requests": args.requests,
+        "failures": failures,
+        "requests_per_second": args.requests / elapsed,
+        # Share of what an ideal client would reach given the server latency;
+        # the mock server runs in this process, so its CPU time counts too
+        "efficiency": (args.requests / elapsed)
+        / (args.concurrency / args.latency if args.latency else float("inf")),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "stream_parse": stream_parse(args),
+        "validation": validation(args),
+        "reply_validation": reply_validation(args),
+        "providers": {},
+    }
+    for provider in args.providers:
+        if not _available(provider):
+            results["providers"][provider] = {"skipped": "SDK not installed"}
+            continue
+        results["providers"][provider] = {
+            "call_overhead": await call_overhead(provider, args),
+            "stream": await stream(provider, args),
+            "throughput": await throughput(provider, args),
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--providers", nargs="*", default=list(PROVIDERS))
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--chunk-size", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    report = {
+        "version": celeste_structured_output.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": asyncio.run(run(args)),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,10 @@
-import asyncio
 from datetime import datetime
 
 import streamlit as st
 
 from src.celeste_structured_output import (
     StructuredOutputProvider,
-    create_structured_client,
+    create_sync_client,
 )
 from src.celeste_structured_output.core.enums import (
     GoogleStructuredModel,
@@ -68,9 +67,10 @@ for i, _prop in enumerate(st.session_state.properties):
         )
 
 model_enum = PROVIDER_MODEL_MAP[structured_output_provider]
-client = create_structured_client(
+# Pooled and run on the background event loop, so reruns reuse connections
+client = create_sync_client(
     provider=StructuredOutputProvider[structured_output_provider].value,
-    model=model_enum[structured_output_model].value
+    model=model_enum[structured_output_model].value,
 )
 
 prompt = st.text_input("Prompt", value=f"Generate a sample {structure_name}")
@@ -95,11 +95,9 @@ if st.button("Generate"):
     )
 
     with st.spinner("Generating..."):
-        output = asyncio.run(
-            client.generate_content(
-                prompt=prompt,
-                response_schema=response_schema,
-            )
+        output = client.generate_content(
+            prompt=prompt,
+            response_schema=response_schema,
         )
         if output:
             st.json(output.content)
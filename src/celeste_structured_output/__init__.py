@@ -2,51 +2,84 @@
 Celeste AI Client - Minimal predefinition AI communication for Alita agents.
 """
 
-from typing import Any, Union
+from typing import Any, Optional, Union
 
 from .base import BaseStructuredClient
-from .core import StructuredOutputProvider, StructuredResponse
+from .core import PromptPrefix, StructuredOutputProvider, StructuredResponse
+from .core.http import HTTPConfig
+from .core.recording import Cassette
+from .core.telemetry import InMemorySpanExporter, instrumentation
+from .pool import ClientPool, client_pool
+from .providers import provider_registry, register_provider
+from .sync import SyncStructuredClient, background_loop
 
 __version__ = "0.1.0"
 
 
 def create_structured_client(
-    provider: Union[StructuredOutputProvider, str], **kwargs: Any
+    provider: Union[StructuredOutputProvider, str],
+    pooled: bool = True,
+    **kwargs: Any,
 ) -> BaseStructuredClient:
-    if isinstance(provider, str):
-        provider = StructuredOutputProvider(provider)
-
-    if provider == StructuredOutputProvider.GOOGLE:
-        from .providers.google import GoogleStructuredClient
-
-        return GoogleStructuredClient(**kwargs)
-
-    if provider == StructuredOutputProvider.OPENAI:
-        from .providers.openai import OpenAIClient
-
-        return OpenAIClient(**kwargs)
-
-    if provider == StructuredOutputProvider.HUGGINGFACE:
-        from .providers.huggingface import HuggingFaceStructuredClient
-
-        return HuggingFaceStructuredClient(**kwargs)
-
-    if provider == StructuredOutputProvider.MISTRAL:
-        from .providers.mistral import MistralStructuredClient
-
-        return MistralStructuredClient(**kwargs)
-
-    if provider == StructuredOutputProvider.ANTHROPIC:
-        from .providers.anthropic import AnthropicStructuredClient
-
-        return AnthropicStructuredClient(**kwargs)
-
-    raise ValueError(f"StructuredOutputProvider {provider} not implemented")
+    """
+    Returns a client for ``provider``.
+
+    ``provider`` is a ``StructuredOutputProvider`` or the name of a provider
+    registered with ``register_provider`` or through an entry point; its
+    module is imported on first use. By default clients come from the
+    process-wide ``client_pool``, so calls from the same event loop with the
+    same provider, model, credentials and transport settings share one client
+    and its HTTP connections; called outside a running loop, or with
+    ``pooled=False``, it returns a fresh, unshared client.
+    """
+    name = (
+        provider.value if isinstance(provider, StructuredOutputProvider) else provider
+    )
+    client_class = provider_registry.resolve(name)
+
+    if pooled:
+        return client_pool.get(name, client_class, **kwargs)
+    return client_class(**kwargs)
+
+
+def create_sync_client(
+    provider: Union[StructuredOutputProvider, str],
+    pooled: bool = True,
+    timeout: Optional[float] = None,
+    **kwargs: Any,
+) -> SyncStructuredClient:
+    """
+    Returns a blocking client for ``provider``, for code without an event loop.
+
+    Arguments are those of ``create_structured_client``. Calls run on the
+    process-wide ``background_loop`` instead of a new loop per call, so the
+    client keeps its connections between calls and threads. The client is
+    created on that loop, so it is pooled with the other sync clients only,
+    never with clients of the caller's own event loops.
+    ``timeout`` bounds each call in seconds.
+    """
+
+    async def create() -> BaseStructuredClient:
+        return create_structured_client(provider, pooled=pooled, **kwargs)
+
+    return SyncStructuredClient(background_loop.run(create()), timeout=timeout)
 
 
 __all__ = [
     "create_structured_client",
+    "create_sync_client",
     "BaseStructuredClient",
+    "Cassette",
+    "ClientPool",
+    "HTTPConfig",
+    "InMemorySpanExporter",
+    "PromptPrefix",
+    "client_pool",
+    "instrumentation",
+    "provider_registry",
+    "register_provider",
     "StructuredOutputProvider",
     "StructuredResponse",
+    "SyncStructuredClient",
+    "background_loop",
 ]
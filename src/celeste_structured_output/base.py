@@ -1,12 +1,33 @@
 from abc import ABC, abstractmethod
-from typing import Any, AsyncIterator, Optional
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Union,
+)
 
 from pydantic import BaseModel
 
-from .core.types import AIUsage, StructuredResponse
+from .core.concurrency import DEFAULT_MAX_CONCURRENCY, bounded_map
+from .core.enums import StructuredOutputProvider
+from .core.schema import CompiledSchema, combine_schemas, compile_schema
+from .core.types import (
+    AIUsage,
+    BatchResult,
+    MultiSchemaResponse,
+    StreamEvent,
+    StructuredResponse,
+)
 
 
 class BaseStructuredClient(ABC):
+    provider: Optional[StructuredOutputProvider] = None
+    model_name: str
+
     @abstractmethod
     def __init__(self, **kwargs: Any) -> None:
         """
@@ -22,14 +43,140 @@ class BaseStructuredClient(ABC):
         """Generates a single response."""
         pass
 
-    @abstractmethod
     async def stream_generate_content(
         self, prompt: str, response_schema: BaseModel, **kwargs: Any
     ) -> AsyncIterator[StructuredResponse]:
-        """Streams the response chunk by chunk."""
-        pass
+        """
+        Streams the response chunk by chunk.
+
+        Built from ``stream_events`` by default; clients implement at least
+        one of the two.
+        """
+        if type(self).stream_events is BaseStructuredClient.stream_events:
+            raise NotImplementedError(
+                f"{type(self).__name__} implements neither stream_events "
+                "nor stream_generate_content"
+            )
+        async for event in self.stream_events(prompt, response_schema, **kwargs):
+            yield event.to_response()
+
+    async def stream_events(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> AsyncIterator[StreamEvent]:
+        """
+        Streams the response as lightweight ``StreamEvent`` objects.
+
+        Cheaper per chunk than ``stream_generate_content``, which remains the
+        compatible API; call ``to_response()`` on the events you need as full
+        responses. Providers accept ``deltas=True`` (with either method) to
+        stream only newly completed list items or fields instead of the
+        accumulated partial content.
+        """
+        async for response in self.stream_generate_content(
+            prompt, response_schema, **kwargs
+        ):
+            yield StreamEvent.from_response(response)
 
     @abstractmethod
     def format_usage(self, usage_data: Any) -> Optional[AIUsage]:
         """Convert provider-specific usage data to standardized AIUsage format."""
         pass
+
+    def prepare_schema(self, compiled: CompiledSchema) -> None:
+        """Builds everything a call with ``compiled`` needs ahead of time."""
+        compiled.prepare()
+
+    def without_sdk_retries(self) -> "BaseStructuredClient":
+        """
+        This client with its SDK's own retries disabled, sharing its
+        connections; for wrappers that retry themselves.
+        """
+        return self
+
+    async def open_connection(self) -> None:
+        """Issues a cheap request so the connection pool holds a live connection."""
+        return None
+
+    async def warmup(self, schemas: Iterable[Any] = ()) -> None:
+        """Precompiles ``schemas`` and opens a connection to the provider."""
+        for schema in schemas:
+            self.prepare_schema(compile_schema(schema))
+        await self.open_connection()
+
+    async def aclose(self) -> None:
+        """Closes the underlying HTTP connections."""
+        return None
+
+    async def generate_multi(
+        self, prompt: str, schemas: Mapping[str, Any], **kwargs: Any
+    ) -> MultiSchemaResponse:
+        """
+        Extracts several independent schemas from ``prompt`` in one call.
+
+        ``schemas`` maps names to models or ``list[Model]``. They are sent
+        together as one model (see ``combine_schemas``), so the prompt is
+        sent and billed once, and the reply is split back into
+        ``contents[name]``, each validated against its own schema.
+        """
+        response = await self.generate_content(
+            prompt, combine_schemas(schemas), **kwargs
+        )
+        contents = (
+            {name: getattr(response.content, name) for name in schemas}
+            if response.content is not None
+            else {}
+        )
+        return MultiSchemaResponse(
+            contents=contents,
+            usage=response.usage,
+            provider=response.provider,
+            metadata=response.metadata,
+        )
+
+    async def map_structured(
+        self,
+        prompts: Union[Iterable[str], AsyncIterable[str]],
+        response_schema: BaseModel,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        ordered: bool = True,
+        **kwargs: Any,
+    ) -> AsyncIterator[BatchResult]:
+        """
+        Runs ``generate_content`` over many prompts with bounded concurrency.
+
+        Prompts are pulled lazily from a list or async iterable. Results come
+        back in input order, or in completion order when ``ordered`` is False.
+        A failing prompt yields a ``BatchResult`` carrying its error instead of
+        aborting the batch.
+        """
+
+        async def run(index: int, prompt: str) -> BatchResult:
+            try:
+                response = await self.generate_content(
+                    prompt, response_schema, **kwargs
+                )
+            except Exception as error:
+                return BatchResult(index=index, prompt=prompt, error=error)
+            return BatchResult(index=index, prompt=prompt, response=response)
+
+        async for result in bounded_map(
+            run, prompts, max_concurrency=max_concurrency, ordered=ordered
+        ):
+            yield result
+
+    async def generate_batch(
+        self,
+        prompts: Union[Iterable[str], AsyncIterable[str]],
+        response_schema: BaseModel,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        **kwargs: Any,
+    ) -> List[BatchResult]:
+        """Runs ``map_structured`` to completion and returns results in order."""
+        return [
+            result
+            async for result in self.map_structured(
+                prompts, response_schema, max_concurrency=max_concurrency, **kwargs
+            )
+        ]
@@ -0,0 +1,300 @@
+"""
+Content-addressed response cache for structured clients.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from .base import BaseStructuredClient
+from .core.schema import CompiledSchema, compile_schema
+from .core.types import AIUsage, StructuredResponse
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+
+
+class CacheStats(BaseModel):
+    """Hit/miss counters of a ``ResponseCache``."""
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """
+    Two-tier store of serialized responses keyed by content hash.
+
+    The in-memory tier is an LRU bounded by entry count and total bytes. The
+    optional SQLite tier (WAL mode, memory-mapped reads) can be shared by
+    several worker processes pointing at the same ``path``. Entries expire
+    after ``ttl`` seconds when one is set.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path, None] = None,
+        ttl: Optional[float] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, Tuple[bytes, Optional[float]]] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._db = self._connect(Path(path))
+
+    @staticmethod
+    def _connect(path: Path) -> sqlite3.Connection:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA busy_timeout=5000")
+        db.execute(f"PRAGMA mmap_size={DEFAULT_MMAP_SIZE}")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+        return db
+
+    async def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return value
+                self._drop(key)
+                self.stats.expirations += 1
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._db_get, key, now)
+            if row is not None:
+                value, expires_at = row
+                self._remember(key, value, expires_at)
+                self.stats.disk_hits += 1
+                return value
+
+        self.stats.misses += 1
+        return None
+
+    async def set(self, key: str, value: bytes) -> None:
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        self._remember(key, value, expires_at)
+        self.stats.stores += 1
+        if self._db is not None:
+            await asyncio.to_thread(self._db_set, key, value, expires_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def _remember(self, key: str, value: bytes, expires_at: Optional[float]) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._memory[key] = (value, expires_at)
+            self._memory_bytes += len(value)
+            while (
+                len(self._memory) > self.max_entries
+                or self._memory_bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._memory))
+                self._drop(oldest)
+                self.stats.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry[0])
+
+    def _db_get(self, key: str, now: float) -> Optional[Tuple[bytes, Optional[float]]]:
+        assert self._db is not None
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= now:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.stats.expirations += 1
+                return None
+        return row[0], row[1]
+
+    def _db_set(self, key: str, value: bytes, expires_at: Optional[float]) -> None:
+        assert self._db is not None
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+
+
+def request_key(
+    client: BaseStructuredClient,
+    prompt: str,
+    compiled: Optional[CompiledSchema],
+    kwargs: dict[str, Any],
+) -> str:
+    """Hash of the provider, model name, prompt, schema and kwargs of a call."""
+    provider = client.provider.value if client.provider else type(client).__name__
+    fingerprint = compiled.fingerprint if compiled is not None else None
+    material = json.dumps(
+        [provider, client.model_name, prompt, fingerprint, kwargs],
+        sort_keys=True,
+        default=repr,
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def _encode(response: StructuredResponse, compiled: CompiledSchema) -> bytes:
+    header = response.model_dump_json(exclude={"content"}).encode()
+    # By alias: the content is read back with the schema's validator
+    content = compiled.adapter.dump_json(response.content, by_alias=True)
+    return header + b"\n" + content
+
+
+def _decode(value: bytes, compiled: CompiledSchema) -> StructuredResponse:
+    header, _, content = value.partition(b"\n")
+    fields = json.loads(header)
+    return StructuredResponse(
+        content=compiled.validate_json(content),
+        usage=AIUsage(**fields["usage"]) if fields.get("usage") else None,
+        provider=fields.get("provider"),
+        metadata={**fields.get("metadata", {}), "cache_hit": True},
+    )
+
+
+class CachedStructuredClient(BaseStructuredClient):
+    """
+    Wraps any ``BaseStructuredClient`` with a ``ResponseCache``.
+
+    Keys hash the provider, model name, prompt, the schema fingerprint and the
+    call kwargs. Cached content is revalidated from JSON against the schema's
+    cached validator on every hit, so callers never share mutable models.
+    """
+
+    def __init__(
+        self,
+        client: BaseStructuredClient,
+        cache: Optional[ResponseCache] = None,
+        **kwargs: Any,
+    ) -> None:
+        self.client = client
+        self.cache = cache or ResponseCache(**kwargs)
+        self.provider = client.provider
+        self.model_name = client.model_name
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.cache.stats
+
+    def format_usage(self, usage_data: Any) -> Optional[AIUsage]:
+        return self.client.format_usage(usage_data)
+
+    def cache_key(
+        self, prompt: str, compiled: CompiledSchema, kwargs: dict[str, Any]
+    ) -> str:
+        return request_key(self.client, prompt, compiled, kwargs)
+
+    async def generate_content(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> StructuredResponse:
+        compiled = compile_schema(response_schema)
+        key = self.cache_key(prompt, compiled, kwargs)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return _decode(cached, compiled)
+
+        response = await self.client.generate_content(prompt, response_schema, **kwargs)
+        if response.content is not None:
+            await self.cache.set(key, _encode(response, compiled))
+        return response
+
+    async def stream_generate_content(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> AsyncIterator[StructuredResponse]:
+        compiled = compile_schema(response_schema)
+        key = self.cache_key(prompt, compiled, kwargs)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            response = _decode(cached, compiled)
+            yield response.model_copy(
+                update={
+                    "usage": None,
+                    "metadata": {**response.metadata, "is_stream_chunk": True},
+                }
+            )
+            if response.usage:
+                yield response.model_copy(
+                    update={
+                        "content": None,
+                        "metadata": {**response.metadata, "is_final_usage": True},
+                    }
+                )
+            return
+
+        final: Optional[StructuredResponse] = None
+        usage: Optional[AIUsage] = None
+        async for chunk in self.client.stream_generate_content(
+            prompt, response_schema, **kwargs
+        ):
+            if chunk.metadata.get("is_final_usage"):
+                usage = chunk.usage
+            elif chunk.content is not None and not chunk.metadata.get("is_partial"):
+                final = chunk
+            yield chunk
+
+        if final is not None:
+            metadata = {
+                k: v for k, v in final.metadata.items() if k != "is_stream_chunk"
+            }
+            response = final.model_copy(update={"usage": usage, "metadata": metadata})
+            await self.cache.set(key, _encode(response, compiled))
@@ -0,0 +1,227 @@
+"""
+Single-flight coalescing: identical concurrent calls share one upstream request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .base import BaseStructuredClient
+from .cache import request_key
+from .core.schema import CompiledSchema, compile_schema
+from .core.types import AIUsage, StreamEvent, StructuredResponse
+
+
+class CoalesceStats(BaseModel):
+    """Counters of a ``CoalescingStructuredClient``."""
+
+    requests: int = 0
+    upstream_calls: int = 0
+    deduplicated: int = 0
+    abandoned: int = 0
+
+    @property
+    def deduplication_rate(self) -> float:
+        return self.deduplicated / self.requests if self.requests else 0.0
+
+
+class _Call:
+    """An upstream ``generate_content`` call and the number of callers awaiting it."""
+
+    __slots__ = ("task", "subscribers", "content_json")
+
+    def __init__(self, task: asyncio.Future[StructuredResponse]) -> None:
+        self.task = task
+        self.subscribers = 0
+        self.content_json: Optional[bytes] = None
+
+
+class _Stream:
+    """
+    An upstream stream fanned out to subscriber queues.
+
+    ``history`` replays the stream to late subscribers; consecutive
+    accumulated partials are collapsed to the latest, which holds the others.
+    """
+
+    __slots__ = ("task", "history", "queues", "finished", "error")
+
+    def __init__(self) -> None:
+        self.task: Optional[asyncio.Future[None]] = None
+        self.history: List[StreamEvent] = []
+        self.queues: List[asyncio.Queue[Optional[StreamEvent]]] = []
+        self.finished = False
+        self.error: Optional[Exception] = None
+
+    def subscribe(self) -> asyncio.Queue[Optional[StreamEvent]]:
+        queue: asyncio.Queue[Optional[StreamEvent]] = asyncio.Queue()
+        for event in self.history:
+            queue.put_nowait(event)
+        if self.finished:
+            queue.put_nowait(None)
+        self.queues.append(queue)
+        return queue
+
+    def publish(self, event: StreamEvent) -> None:
+        if (
+            event.kind == "partial"
+            and self.history
+            and self.history[-1].kind == "partial"
+        ):
+            self.history[-1] = event
+        else:
+            self.history.append(event)
+        for queue in self.queues:
+            queue.put_nowait(event)
+
+    def finish(self, error: Optional[Exception]) -> None:
+        self.finished = True
+        self.error = error
+        for queue in self.queues:
+            queue.put_nowait(None)
+
+
+class CoalescingStructuredClient(BaseStructuredClient):
+    """
+    Wraps a client so identical concurrent calls share one upstream request.
+
+    Calls are identical when provider, model, prompt, schema and kwargs match
+    (the ``ResponseCache`` key). The first one starts the upstream request in
+    its own task and later ones join it until it completes; errors reach
+    every caller. ``generate_content`` callers other than the first get their
+    own copy of the content, revalidated from JSON and marked ``coalesced``
+    in the metadata. Streams are fanned out: a late subscriber first receives
+    what it missed, then follows live. Stream events are shared between
+    subscribers, so treat them as read-only.
+
+    A caller that is cancelled or stops iterating only leaves; the upstream
+    request is cancelled when its last caller leaves. Coalescing is per
+    process and event loop; wrap this client in a ``CachedStructuredClient``
+    to also serve completed responses.
+    """
+
+    def __init__(self, client: BaseStructuredClient) -> None:
+        self.client = client
+        self.stats = CoalesceStats()
+        self.provider = client.provider
+        self.model_name = client.model_name
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _Stream] = {}
+
+    def format_usage(self, usage_data: Any) -> Optional[AIUsage]:
+        return self.client.format_usage(usage_data)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def _key(
+        self, prompt: str, response_schema: Any, kwargs: Dict[str, Any]
+    ) -> tuple[str, Optional[CompiledSchema]]:
+        compiled = (
+            compile_schema(response_schema) if response_schema is not None else None
+        )
+        return request_key(self.client, prompt, compiled, kwargs), compiled
+
+    async def generate_content(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> StructuredResponse:
+        key, compiled = self._key(prompt, response_schema, kwargs)
+        self.stats.requests += 1
+        call = self._calls.get(key)
+        first = call is None
+        if call is None:
+            task = asyncio.ensure_future(
+                self.client.generate_content(prompt, response_schema, **kwargs)
+            )
+            call = self._calls[key] = _Call(task)
+            task.add_done_callback(lambda _: self._forget(self._calls, key, task))
+            self.stats.upstream_calls += 1
+        else:
+            self.stats.deduplicated += 1
+
+        call.subscribers += 1
+        try:
+            # Shielded: a cancelled caller must not cancel the others' request
+            response = await asyncio.shield(call.task)
+        finally:
+            call.subscribers -= 1
+            if not call.subscribers and not call.task.done():
+                self._abandon(self._calls, key, call.task)
+
+        if first or compiled is None or response.content is None:
+            return response
+        if call.content_json is None:
+            # By alias: waiters read it back with the schema's validator
+            call.content_json = compiled.adapter.dump_json(
+                response.content, by_alias=True
+            )
+        return response.model_copy(
+            update={
+                "content": compiled.validate_json(call.content_json),
+                "metadata": {**response.metadata, "coalesced": True},
+            }
+        )
+
+    async def stream_events(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> AsyncIterator[StreamEvent]:
+        key, _ = self._key(prompt, response_schema, kwargs)
+        self.stats.requests += 1
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = self._streams[key] = _Stream()
+            task = stream.task = asyncio.ensure_future(
+                self._pump(stream, prompt, response_schema, kwargs)
+            )
+            task.add_done_callback(lambda _: self._forget(self._streams, key, task))
+            self.stats.upstream_calls += 1
+        else:
+            self.stats.deduplicated += 1
+
+        queue = stream.subscribe()
+        try:
+            while (event := await queue.get()) is not None:
+                yield event
+            if stream.error is not None:
+                raise stream.error
+        finally:
+            stream.queues.remove(queue)
+            assert stream.task is not None
+            if not stream.queues and not stream.task.done():
+                self._abandon(self._streams, key, stream.task)
+
+    async def _pump(
+        self,
+        stream: _Stream,
+        prompt: str,
+        response_schema: BaseModel,
+        kwargs: Dict[str, Any],
+    ) -> None:
+        error: Optional[Exception] = None
+        try:
+            async for event in self.client.stream_events(
+                prompt, response_schema, **kwargs
+            ):
+                stream.publish(event)
+        except Exception as exc:
+            # Handed to the subscribers rather than left on the task
+            error = exc
+        finally:
+            stream.finish(error)
+
+    def _abandon(
+        self, flights: Dict[str, Any], key: str, task: asyncio.Future[Any]
+    ) -> None:
+        # Unlisted first, so new callers start afresh instead of joining it
+        self._forget(flights, key, task)
+        task.cancel()
+        self.stats.abandoned += 1
+
+    @staticmethod
+    def _forget(flights: Dict[str, Any], key: str, task: asyncio.Future[Any]) -> None:
+        flight = flights.get(key)
+        if flight is not None and flight.task is task:
+            del flights[key]
@@ -0,0 +1,296 @@
+"""
+Compact wire mode: short generated keys on the wire, full models for callers.
+"""
+
+from __future__ import annotations
+
+import itertools
+import keyword
+import string
+import types
+from typing import (
+    Annotated,
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Union,
+    get_args,
+    get_origin,
+)
+
+from pydantic import BaseModel, Field, create_model
+
+from .base import BaseStructuredClient
+from .core.enums import StructuredOutputProvider
+from .core.schema import (
+    CHARS_PER_TOKEN,
+    CompiledSchema,
+    compile_schema,
+    validation_key,
+)
+from .core.types import AIUsage, StreamEvent, StructuredResponse
+
+
+def short_names() -> Iterator[str]:
+    """``a``, ``b``, ..., ``z``, ``aa``, ``ab``, ...: valid, unreserved field names."""
+    for length in itertools.count(1):
+        for letters in itertools.product(string.ascii_lowercase, repeat=length):
+            name = "".join(letters)
+            if not keyword.iskeyword(name):
+                yield name
+
+
+class _Mapping:
+    """A compact model's original model and the input key of each short field."""
+
+    __slots__ = ("model", "keys")
+
+    def __init__(self, model: type[BaseModel], keys: Dict[str, str]) -> None:
+        self.model = model
+        self.keys = keys
+
+
+class CompactSchema:
+    """
+    A response schema mirrored with short field names, and the way back.
+
+    Every model reachable from the schema gets a compact twin whose fields
+    are named ``a``, ``b``, ... in declaration order, with the original name
+    (and description) as the field description so the model still knows what
+    each key means. Types, constraints and nesting are kept; recursive models
+    stay recursive. Discriminators are dropped on the wire and applied again
+    when the answer is validated against the original schema.
+    """
+
+    def __init__(self, compiled: CompiledSchema) -> None:
+        self.original = compiled
+        self._mappings: Dict[type[BaseModel], _Mapping] = {}
+        self._twins: Dict[type[BaseModel], type[BaseModel]] = {}
+        self._pending: Dict[type[BaseModel], str] = {}
+        item = self._twin(compiled.item_model)
+        namespace = {name: self._twins[model] for model, name in self._pending.items()}
+        for twin in self._twins.values():
+            twin.model_rebuild(_types_namespace=namespace)
+        self._pending.clear()
+        self.schema: Any = list[item] if compiled.is_list else item  # type: ignore[valid-type]
+        self.compiled = compile_schema(self.schema)
+
+    def _twin(self, model: type[BaseModel]) -> Any:
+        if model in self._twins:
+            return self._twins[model]
+        if model in self._pending:
+            # Recursive reference, resolved once the twin exists
+            return self._pending[model]
+        name = self._pending[model] = f"Compact{model.__name__}"
+        fields: Dict[str, Any] = {}
+        keys: Dict[str, str] = {}
+        for short, (field_name, field) in zip(
+            short_names(), model.model_fields.items(), strict=False
+        ):
+            key = keys[short] = validation_key(field_name, field)
+            description = f"{key}: {field.description}" if field.description else key
+            annotation = self._compact_type(field.annotation)
+            if field.metadata:
+                annotation = Annotated[(annotation, *field.metadata)]
+            default = ... if field.is_required() else None
+            fields[short] = (annotation, Field(default, description=description))
+        twin = create_model(name, __doc__=model.__doc__, **fields)
+        self._twins[model] = twin
+        self._mappings[twin] = _Mapping(model, keys)
+        return twin
+
+    def _compact_type(self, annotation: Any) -> Any:
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return self._twin(annotation)
+        args = get_args(annotation)
+        origin = get_origin(annotation)
+        if not args or origin is None:
+            return annotation
+        if origin is Annotated:
+            return Annotated[(self._compact_type(args[0]), *annotation.__metadata__)]
+        mapped = tuple(self._compact_type(arg) for arg in args)
+        if mapped == args:
+            return annotation
+        if origin in (Union, types.UnionType):
+            return Union[mapped]
+        return origin[mapped]
+
+    def expand(self, value: Any) -> Any:
+        """Python data for the original schema from (part of) a compact answer."""
+        if isinstance(value, BaseModel):
+            mapping = self._mappings.get(type(value))
+            if mapping is None:
+                return value
+            return {
+                mapping.keys[short]: self.expand(getattr(value, short))
+                for short in value.model_fields_set
+            }
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return type(value)(self.expand(item) for item in value)
+        if isinstance(value, dict):
+            return {key: self.expand(item) for key, item in value.items()}
+        return value
+
+    def restore(self, content: Any) -> Any:
+        """Compact content validated as the original schema."""
+        if content is None:
+            return None
+        return self.original.validate(self.expand(content))
+
+    def restore_item(self, item: Any) -> Any:
+        """One compact list item validated as the original item model."""
+        return self.original.item_model.model_validate(self.expand(item))
+
+    def restore_partial(self, partial: BaseModel) -> BaseModel:
+        """
+        A partial compact object (only its completed fields set) as a partial
+        original object; each completed field is validated.
+        """
+        adapters = self.original.field_adapters
+        mapping = self._mappings[type(partial)]
+        fields = {}
+        for short in partial.model_fields_set:
+            name, adapter = adapters[mapping.keys[short]]
+            fields[name] = adapter.validate_python(self.expand(getattr(partial, short)))
+        return self.original.item_model.model_construct(**fields)
+
+    def legend(self) -> str:
+        """The meaning of every short key, for models that never see the schema."""
+        lines = []
+        for mapping in self._mappings.values():
+            pairs = ", ".join(f"{short}={key}" for short, key in mapping.keys.items())
+            lines.append(f"{mapping.model.__name__}: {pairs}")
+        return "Keys of the JSON answer: " + "; ".join(lines)
+
+    def saved_tokens(self, content: Any, restored: Any) -> int:
+        """Estimated output tokens saved by ``content`` over the full answer."""
+        full = self.original.adapter.dump_json(restored, by_alias=True)
+        compact = self.compiled.adapter.dump_json(content)
+        return max(len(full) - len(compact), 0) // CHARS_PER_TOKEN
+
+
+def compact_schema(schema: Any) -> CompactSchema:
+    """The :class:`CompactSchema` of ``schema``, built once per compiled schema."""
+    return compile_schema(schema).wire_form("compact", CompactSchema)
+
+
+class CompactStats(BaseModel):
+    """Counters of a ``CompactStructuredClient``."""
+
+    responses: int = 0
+    output_tokens: int = 0
+    saved_output_tokens: int = 0
+
+    @property
+    def output_reduction(self) -> float:
+        """Estimated share of the full answer's output tokens saved."""
+        full = self.output_tokens + self.saved_output_tokens
+        return self.saved_output_tokens / full if full else 0.0
+
+
+class CompactStructuredClient(BaseStructuredClient):
+    """
+    Wraps a client so answers use short generated keys on the wire.
+
+    The provider is sent the :class:`CompactSchema` of each response schema,
+    so every key of the answer is one or two letters instead of a field name,
+    which adds up in ``list[Model]`` answers of many items. Answers are mapped
+    back and validated against the caller's schema, in ``generate_content``
+    and in streams alike, so callers only ever see their own models.
+
+    The estimated output tokens saved are reported as ``saved_output_tokens``
+    in the metadata of each response (the final event of streams) and
+    accumulated in ``stats``. Models that never see the schema (Ollama's,
+    by default) get the key ``legend`` appended to the prompt instead.
+    """
+
+    def __init__(
+        self, client: BaseStructuredClient, legend: Optional[bool] = None
+    ) -> None:
+        self.client = client
+        self.stats = CompactStats()
+        self.provider = client.provider
+        self.model_name = client.model_name
+        self.legend = (
+            legend
+            if legend is not None
+            else client.provider is StructuredOutputProvider.OLLAMA
+        )
+
+    def format_usage(self, usage_data: Any) -> Optional[AIUsage]:
+        return self.client.format_usage(usage_data)
+
+    async def warmup(self, schemas: Iterable[Any] = ()) -> None:
+        await self.client.warmup([compact_schema(schema).schema for schema in schemas])
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def _prompt(self, prompt: str, compact: CompactSchema) -> str:
+        return f"{prompt}\n\n{compact.legend()}" if self.legend else prompt
+
+    def _record(self, usage: Optional[AIUsage], saved: int) -> None:
+        self.stats.responses += 1
+        self.stats.saved_output_tokens += saved
+        if usage is not None:
+            self.stats.output_tokens += usage.output_tokens
+
+    async def generate_content(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> StructuredResponse:
+        compact = compact_schema(response_schema)
+        response = await self.client.generate_content(
+            self._prompt(prompt, compact), compact.schema, **kwargs
+        )
+        if response.content is None:
+            return response
+        content = compact.restore(response.content)
+        saved = compact.saved_tokens(response.content, content)
+        self._record(response.usage, saved)
+        return response.model_copy(
+            update={
+                "content": content,
+                "metadata": {**response.metadata, "saved_output_tokens": saved},
+            }
+        )
+
+    async def stream_events(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> AsyncIterator[StreamEvent]:
+        compact = compact_schema(response_schema)
+        # Restored list items, so each one is restored once per stream
+        items: List[Any] = []
+        saved: Optional[int] = None
+        async for event in self.client.stream_events(
+            self._prompt(prompt, compact), compact.schema, **kwargs
+        ):
+            content, metadata = event.content, event.metadata
+            if event.kind in ("partial", "delta") and content is not None:
+                if not compact.original.is_list:
+                    content = compact.restore_partial(content)
+                elif event.kind == "delta":
+                    content = [compact.restore_item(item) for item in content]
+                    items.extend(content)
+                else:
+                    items.extend(
+                        compact.restore_item(item) for item in content[len(items) :]
+                    )
+                    content = list(items)
+            elif event.kind == "final" and content is not None:
+                if compact.original.is_list and len(items) == len(content):
+                    restored = list(items)
+                else:
+                    restored = compact.restore(content)
+                saved = compact.saved_tokens(content, restored)
+                self._record(None, saved)
+                content = restored
+                metadata = {**(metadata or {}), "saved_output_tokens": saved}
+            elif event.kind == "usage" and event.usage is not None:
+                self.stats.output_tokens += event.usage.output_tokens
+            yield StreamEvent(
+                event.kind, content, event.provider, event.model, event.usage, metadata
+            )
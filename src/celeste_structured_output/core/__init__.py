@@ -3,9 +3,36 @@ Core data definitions for Celeste AI Client.
 """
 
 from .enums import StructuredOutputProvider
-from .types import StructuredResponse
+from .minify import (
+    SCHEMA_POLICIES,
+    SchemaPolicy,
+    SchemaSavings,
+    minimization_report,
+    minimize_schema,
+)
+from .prefix import PromptPrefix
+from .schema import CompiledSchema, SchemaRegistry, combine_schemas, compile_schema
+from .types import (
+    BatchResult,
+    MultiSchemaResponse,
+    StreamEvent,
+    StructuredResponse,
+)
 
 __all__ = [
+    "BatchResult",
+    "CompiledSchema",
+    "MultiSchemaResponse",
+    "PromptPrefix",
+    "SCHEMA_POLICIES",
+    "SchemaPolicy",
+    "SchemaRegistry",
+    "SchemaSavings",
+    "StreamEvent",
     "StructuredOutputProvider",
-    "StructuredResponse"
+    "StructuredResponse",
+    "combine_schemas",
+    "compile_schema",
+    "minimization_report",
+    "minimize_schema",
 ]
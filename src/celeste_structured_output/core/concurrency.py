@@ -0,0 +1,127 @@
+"""
+Bounded-concurrency helpers shared by the batch APIs and clients.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+from collections import deque
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Generic,
+    Iterable,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+class PerLoop(Generic[T]):
+    """
+    One ``factory()`` result per event loop, created on first use in each.
+
+    Asyncio locks and semaphores belong to the loop that first waits on them;
+    clients outliving a loop (several ``asyncio.run`` calls, the background
+    loop of sync clients) get a fresh one in every loop instead.
+    """
+
+    def __init__(self, factory: Callable[[], T]) -> None:
+        self._factory = factory
+        self._values: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, T] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def get(self) -> T:
+        """The value for the running loop."""
+        loop = asyncio.get_running_loop()
+        value = self._values.get(loop)
+        if value is None:
+            value = self._values[loop] = self._factory()
+        return value
+
+
+async def iterate(items: Union[Iterable[T], AsyncIterable[T]]) -> AsyncIterator[T]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def bounded_map(
+    func: Callable[[int, T], Awaitable[R]],
+    items: Union[Iterable[T], AsyncIterable[T]],
+    *,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ordered: bool = True,
+    window: int | None = None,
+) -> AsyncIterator[R]:
+    """
+    Apply ``func(index, item)`` to every item with at most ``max_concurrency``
+    calls in flight.
+
+    Items are pulled lazily: no more than ``window`` calls (default twice
+    ``max_concurrency``) are started but not yet yielded, so a slow head of line
+    in ordered mode or a slow consumer throttles reading from ``items``.
+    Results are yielded in input order when ``ordered``, otherwise as they
+    complete. Leaving the iterator early cancels the calls still running.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    window = max(window or 2 * max_concurrency, max_concurrency)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    source = iterate(items)
+    tasks: Deque[Tuple[int, asyncio.Task[R]]] = deque()
+    exhausted = False
+    index = 0
+
+    async def run(position: int, item: T) -> R:
+        async with semaphore:
+            return await func(position, item)
+
+    try:
+        while True:
+            while not exhausted and len(tasks) < window:
+                try:
+                    item = await anext(source)
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                tasks.append((index, asyncio.ensure_future(run(index, item))))
+                index += 1
+            if not tasks:
+                return
+
+            if ordered:
+                _, head = tasks[0]
+                await asyncio.wait({head})
+                tasks.popleft()
+                yield head.result()
+                continue
+
+            done, _ = await asyncio.wait(
+                {task for _, task in tasks}, return_when=asyncio.FIRST_COMPLETED
+            )
+            finished = [entry for entry in tasks if entry[1] in done]
+            remaining = [entry for entry in tasks if entry[1] not in done]
+            tasks.clear()
+            tasks.extend(remaining)
+            for _, task in finished:
+                yield task.result()
+    finally:
+        for _, task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*(task for _, task in tasks), return_exceptions=True)
+        await source.aclose()
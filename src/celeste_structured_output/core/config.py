@@ -1,14 +1,41 @@
+"""
+Settings read lazily from the environment and an optional ``.env`` file.
+"""
+
 import os
+from typing import Any, Optional
+
+# Setting names and their defaults
+SETTINGS = {
+    "ANTHROPIC_API_KEY": None,
+    "GOOGLE_API_KEY": None,
+    "HUGGINGFACE_TOKEN": None,
+    "MISTRAL_API_KEY": None,
+    "OPENAI_API_KEY": None,
+    "OLLAMA_HOST": "http://localhost:11434",
+}
+
+_env_loaded = False
+
+
+def load_env() -> None:
+    """Loads the ``.env`` file once, on first access to a setting."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    _env_loaded = True
+
 
-from dotenv import load_dotenv
+def get_setting(name: str) -> Optional[str]:
+    load_env()
+    return os.getenv(name, SETTINGS.get(name))
 
-# Load environment variables from .env file
-load_dotenv()
 
-# API Keys
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-HUGGINGFACE_TOKEN = os.getenv("HUGGINGFACE_TOKEN")
-MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+def __getattr__(name: str) -> Any:
+    # Keeps ``from .config import OPENAI_API_KEY`` working without import-time I/O
+    if name in SETTINGS:
+        return get_setting(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
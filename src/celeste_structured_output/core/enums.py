@@ -57,3 +57,13 @@ class HuggingFaceModel(Enum):
     MICROSOFT_PHI_4 = "microsoft/phi-4"
     QWEN_2_5_7B_1M = "Qwen/Qwen2.5-7B-Instruct-1M"
     DEEPSEEK_R1 = "deepseek-ai/DeepSeek-R1"
+
+
+class OllamaStructuredModel(Enum):
+    """Ollama model enumeration for provider-specific model selection."""
+
+    LLAMA3_2 = "llama3.2"
+    QWEN2_5 = "qwen2.5"
+    MISTRAL = "mistral"
+    PHI3 = "phi3"
+    GEMMA3 = "gemma3"
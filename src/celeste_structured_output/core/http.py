@@ -0,0 +1,64 @@
+"""
+Shared HTTP transport settings for provider SDK clients.
+"""
+
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from .recording import Cassette
+
+if TYPE_CHECKING:
+    import httpx
+
+DEFAULT_TIMEOUT = 600.0
+
+
+class HTTPConfig(BaseModel):
+    """
+    Connection-pool limits and keep-alive for a provider's HTTP client.
+
+    With a ``cassette``, requests are recorded to or replayed from it (see
+    :class:`~.recording.Cassette`) instead of only going to the network.
+    """
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    timeout: float = DEFAULT_TIMEOUT
+    http2: bool = True
+    cassette: Optional[Cassette] = None
+
+    @property
+    def http2_enabled(self) -> bool:
+        """HTTP/2 is only used when the optional ``h2`` package is installed."""
+        return self.http2 and find_spec("h2") is not None
+
+    def client_args(self) -> Dict[str, Any]:
+        """Keyword arguments for ``httpx.AsyncClient``."""
+        import httpx
+
+        transport_args = {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            "http2": self.http2_enabled,
+        }
+        timeout = httpx.Timeout(self.timeout, connect=10.0)
+        if self.cassette is None:
+            return {**transport_args, "timeout": timeout}
+        # httpx ignores limits and http2 once a transport is given
+        network = None
+        if self.cassette.recording:
+            network = httpx.AsyncHTTPTransport(**transport_args)
+        return {"transport": self.cassette.transport(network), "timeout": timeout}
+
+    def async_client(self) -> "httpx.AsyncClient":
+        import httpx
+
+        return httpx.AsyncClient(**self.client_args())
@@ -0,0 +1,295 @@
+"""
+Schema minimization: smaller JSON schemas on the wire, same validation.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from pydantic import BaseModel, ConfigDict
+
+from .enums import StructuredOutputProvider
+from .schema import CHARS_PER_TOKEN, CompiledSchema, compile_schema, schema_registry
+
+# Keywords whose value maps names to subschemas, rather than being one
+_SCHEMA_MAPS = frozenset(
+    {"properties", "patternProperties", "$defs", "definitions", "dependentSchemas"}
+)
+# Keywords whose value is data, not schema
+_LITERALS = frozenset({"enum", "const", "default", "examples", "required"})
+_DEFS_PREFIX = "#/$defs/"
+
+
+class SchemaPolicy(BaseModel):
+    """
+    What ``minimize_schema`` removes from a JSON schema.
+
+    ``titles``, ``defaults`` and ``examples`` strip those keywords (titles
+    repeat the field names; defaults are applied by the Pydantic model
+    anyway); ``descriptions`` strips descriptions, which most models read
+    as guidance. ``dedupe_defs`` merges identical ``$defs`` and
+    ``inline_defs`` inlines those referenced once, unless recursive.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    titles: bool = True
+    defaults: bool = True
+    descriptions: bool = False
+    examples: bool = False
+    dedupe_defs: bool = True
+    inline_defs: bool = True
+
+    @property
+    def stripped(self) -> Set[str]:
+        flags = {
+            "title": self.titles,
+            "default": self.defaults,
+            "description": self.descriptions,
+            "examples": self.examples,
+        }
+        return {keyword for keyword, strip in flags.items() if strip}
+
+
+# Ollama turns the schema into a decoding grammar without showing it to the
+# model, so nothing in it is guidance
+SCHEMA_POLICIES: Dict[StructuredOutputProvider, SchemaPolicy] = {
+    StructuredOutputProvider.OLLAMA: SchemaPolicy(descriptions=True, examples=True),
+}
+DEFAULT_POLICY = SchemaPolicy()
+# Sends schemas exactly as Pydantic generates them
+PRESERVE = SchemaPolicy(
+    titles=False, defaults=False, dedupe_defs=False, inline_defs=False
+)
+# Providers sent a JSON schema (Hugging Face only asks for a JSON object)
+SCHEMA_PROVIDERS = tuple(
+    provider
+    for provider in StructuredOutputProvider
+    if provider is not StructuredOutputProvider.HUGGINGFACE
+)
+
+
+def schema_policy(provider: Optional[StructuredOutputProvider]) -> SchemaPolicy:
+    """
+    The policy for ``provider``, from :data:`SCHEMA_POLICIES`. Changes apply
+    to schemas compiled afterwards, as wire forms are built once.
+    """
+    if provider is None:
+        return DEFAULT_POLICY
+    return SCHEMA_POLICIES.get(provider, DEFAULT_POLICY)
+
+
+def minimize_schema(
+    schema: Dict[str, Any], policy: SchemaPolicy = DEFAULT_POLICY
+) -> Dict[str, Any]:
+    """A minimized copy of ``schema``; it accepts exactly the same documents."""
+    minimized = _strip(schema, policy.stripped)
+    defs = minimized.pop("$defs", None)
+    if defs:
+        if policy.dedupe_defs:
+            minimized, defs = _dedupe_defs(minimized, defs)
+        if policy.inline_defs:
+            minimized, defs = _inline_defs(minimized, defs)
+        if defs:
+            minimized["$defs"] = defs
+    return minimized
+
+
+def _strip(node: Any, stripped: Set[str]) -> Any:
+    if isinstance(node, list):
+        return [_strip(item, stripped) for item in node]
+    if not isinstance(node, dict):
+        return node
+    result = {}
+    for key, value in node.items():
+        if key in stripped:
+            continue
+        if key in _SCHEMA_MAPS and isinstance(value, dict):
+            result[key] = {name: _strip(sub, stripped) for name, sub in value.items()}
+        elif key in _LITERALS:
+            result[key] = value
+        else:
+            result[key] = _strip(value, stripped)
+    return result
+
+
+def _walk_refs(node: Any, visit: Any) -> Any:
+    """Copy of ``node`` with every ``$ref`` node replaced by ``visit(node)``."""
+    if isinstance(node, list):
+        return [_walk_refs(item, visit) for item in node]
+    if not isinstance(node, dict):
+        return node
+    if isinstance(node.get("$ref"), str) and node["$ref"].startswith(_DEFS_PREFIX):
+        return visit(node)
+    return {
+        key: value if key in _LITERALS else _walk_refs(value, visit)
+        for key, value in node.items()
+    }
+
+
+def _rename_refs(node: Any, renames: Dict[str, str]) -> Any:
+    def visit(ref_node: Dict[str, Any]) -> Dict[str, Any]:
+        name = ref_node["$ref"][len(_DEFS_PREFIX) :]
+        return {**ref_node, "$ref": _DEFS_PREFIX + renames.get(name, name)}
+
+    return _walk_refs(node, visit)
+
+
+def _dedupe_defs(
+    root: Dict[str, Any], defs: Dict[str, Any]
+) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    # Repeated: merging two definitions can make the ones using them identical
+    while True:
+        seen: Dict[str, str] = {}
+        renames: Dict[str, str] = {}
+        for name, definition in defs.items():
+            canonical = json.dumps(definition, sort_keys=True)
+            if canonical in seen:
+                renames[name] = seen[canonical]
+            else:
+                seen[canonical] = name
+        if not renames:
+            return root, defs
+        defs = {
+            name: _rename_refs(definition, renames)
+            for name, definition in defs.items()
+            if name not in renames
+        }
+        root = _rename_refs(root, renames)
+
+
+def _references(node: Any) -> List[str]:
+    found: List[str] = []
+
+    def visit(ref_node: Dict[str, Any]) -> Dict[str, Any]:
+        found.append(ref_node["$ref"][len(_DEFS_PREFIX) :])
+        return ref_node
+
+    _walk_refs(node, visit)
+    return found
+
+
+def _recursive(defs: Dict[str, Any]) -> Set[str]:
+    """Definitions that can reach themselves through references."""
+    edges = {name: set(_references(definition)) for name, definition in defs.items()}
+    recursive = set()
+    for start in defs:
+        stack, seen = list(edges[start]), set()
+        while stack:
+            name = stack.pop()
+            if name == start:
+                recursive.add(start)
+                break
+            if name in seen or name not in edges:
+                continue
+            seen.add(name)
+            stack.extend(edges[name])
+    return recursive
+
+
+def _inline_defs(
+    root: Dict[str, Any], defs: Dict[str, Any]
+) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    counts: Dict[str, int] = {}
+    for name in _references([root, *defs.values()]):
+        counts[name] = counts.get(name, 0) + 1
+    recursive = _recursive(defs)
+    inlined = {
+        name for name in defs if counts.get(name, 0) <= 1 and name not in recursive
+    }
+    if not inlined:
+        return root, defs
+
+    def visit(ref_node: Dict[str, Any]) -> Dict[str, Any]:
+        name = ref_node["$ref"][len(_DEFS_PREFIX) :]
+        if name not in inlined:
+            return ref_node
+        siblings = {k: v for k, v in ref_node.items() if k != "$ref"}
+        # Inlined definitions may themselves use other inlined ones
+        return {**_walk_refs(defs[name], visit), **siblings}
+
+    kept = {
+        name: _walk_refs(definition, visit)
+        for name, definition in defs.items()
+        if name not in inlined
+    }
+    return _walk_refs(root, visit), kept
+
+
+def minimized_schema(
+    compiled: CompiledSchema,
+    provider: Optional[StructuredOutputProvider],
+    wrapped: bool = True,
+) -> Dict[str, Any]:
+    """
+    Minimized :attr:`CompiledSchema.wire_json_schema` (or, unless
+    ``wrapped``, :attr:`CompiledSchema.json_schema`) for ``provider``, built
+    once per compiled schema.
+    """
+    return compiled.wire_form(
+        ("minimized", provider, wrapped),
+        lambda c: minimize_schema(
+            c.wire_json_schema if wrapped else c.json_schema, schema_policy(provider)
+        ),
+    )
+
+
+class SchemaSavings(BaseModel):
+    """Estimated schema tokens sent to one provider before and after minimization."""
+
+    schema_name: str
+    provider: str
+    original_tokens: int
+    minimized_tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.minimized_tokens
+
+    @property
+    def saved_ratio(self) -> float:
+        if not self.original_tokens:
+            return 0.0
+        return self.saved_tokens / self.original_tokens
+
+
+def _tokens(schema: Dict[str, Any]) -> int:
+    return len(json.dumps(schema, separators=(",", ":"))) // CHARS_PER_TOKEN
+
+
+def minimization_report(
+    schemas: Optional[Iterable[Any]] = None,
+    providers: Iterable[StructuredOutputProvider] = SCHEMA_PROVIDERS,
+) -> List[SchemaSavings]:
+    """
+    Estimated tokens saved per schema and provider, at ``CHARS_PER_TOKEN``
+    characters per token of compact JSON. Covers ``schemas``, or every
+    schema compiled so far.
+    """
+    compiled_schemas = (
+        [compile_schema(schema) for schema in schemas]
+        if schemas is not None
+        else schema_registry.compiled()
+    )
+    providers = list(providers)
+    report = []
+    for compiled in compiled_schemas:
+        name = getattr(compiled.item_model, "__name__", repr(compiled.schema))
+        if compiled.is_list:
+            name = f"list[{name}]"
+        for provider in providers:
+            # Gemini gets the declared schema; everyone else the object form
+            wrapped = provider is not StructuredOutputProvider.GOOGLE
+            original = compiled.wire_json_schema if wrapped else compiled.json_schema
+            report.append(
+                SchemaSavings(
+                    schema_name=name,
+                    provider=provider.value,
+                    original_tokens=_tokens(original),
+                    minimized_tokens=_tokens(
+                        minimized_schema(compiled, provider, wrapped)
+                    ),
+                )
+            )
+    return report
@@ -0,0 +1,90 @@
+"""
+Shared prompt prefixes that providers can serve from their prompt caches.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict, field_validator
+
+from .schema import CompiledSchema
+
+PrefixTTL = Literal["5m", "1h"]
+
+_TTL_SECONDS = {"5m": 300, "1h": 3600}
+
+
+class PromptPrefix(BaseModel):
+    """
+    Instructions and few-shot examples shared by many calls.
+
+    Pass it as ``prefix=`` to ``generate_content`` or ``stream_generate_content``.
+    It is sent ahead of the call's own prompt and, with the schema, forms the
+    stable part of the request that providers cache:
+
+    - Anthropic: ``cache_control`` breakpoints on the schema tool, the system
+      block and the last example;
+    - OpenAI: system and examples first, so the automatic prefix cache
+      matches them, and a ``prompt_cache_key`` routing identical prefixes
+      together;
+    - Gemini: an explicit cached content holding the system instruction and
+      examples, reused until ``ttl`` runs out (inline when it is too small to
+      be cached);
+    - other providers: the same message order, which local servers reuse
+      through their KV cache.
+
+    ``examples`` are ``(input, output)`` pairs; outputs may be models or
+    plain JSON-compatible values, sent as JSON. Cache reads and writes are
+    reported in ``AIUsage.cache_read_tokens`` and ``cache_write_tokens``.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    system: Optional[str] = None
+    examples: Tuple[Tuple[str, str], ...] = ()
+    ttl: PrefixTTL = "5m"
+
+    @field_validator("examples", mode="before")
+    @classmethod
+    def _serialize_outputs(cls, examples: Any) -> Any:
+        return tuple(
+            (example_input, _as_json(example_output))
+            for example_input, example_output in examples
+        )
+
+    @property
+    def ttl_seconds(self) -> int:
+        return _TTL_SECONDS[self.ttl]
+
+    def messages(self) -> List[Dict[str, str]]:
+        """Chat messages for the system instructions and examples."""
+        messages = [{"role": "system", "content": self.system}] if self.system else []
+        for example_input, example_output in self.examples:
+            messages.append({"role": "user", "content": example_input})
+            messages.append({"role": "assistant", "content": example_output})
+        return messages
+
+    def cache_key(self, compiled: Optional[CompiledSchema] = None) -> str:
+        """Stable digest of this prefix, with the schema it is sent with if given."""
+        material = json.dumps(
+            [self.system, self.examples, compiled.fingerprint if compiled else None],
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(material.encode()).hexdigest()[:32]
+
+
+def _as_json(output: Any) -> str:
+    if isinstance(output, str):
+        return output
+    if isinstance(output, BaseModel):
+        # The keys the model must answer with
+        return output.model_dump_json(by_alias=True)
+    return json.dumps(output)
+
+
+def chat_messages(prompt: str, prefix: Optional[PromptPrefix]) -> List[Dict[str, str]]:
+    """``prompt`` as a user message, after ``prefix``'s messages if any."""
+    messages = prefix.messages() if prefix is not None else []
+    messages.append({"role": "user", "content": prompt})
+    return messages
@@ -0,0 +1,270 @@
+"""
+Record/replay of provider HTTP exchanges for offline, deterministic runs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import functools
+import gzip
+import hashlib
+import importlib
+import json
+import threading
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import (
+    IO,
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+)
+
+CassetteMode = Literal["record", "replay"]
+
+# Not replayed: they describe the recorded connection, not the response
+_DROPPED_HEADERS = frozenset(
+    {"connection", "keep-alive", "transfer-encoding", "content-encoding", "set-cookie"}
+)
+
+
+@functools.cache
+def _stream_class(base: type) -> type:
+    class CassetteStream(base):
+        """Response body from a chunk generator, closed with the response."""
+
+        def __init__(self, chunks: AsyncGenerator[bytes, None]) -> None:
+            self._chunks = chunks
+
+        async def __aiter__(self) -> AsyncIterator[bytes]:
+            async for chunk in self._chunks:
+                yield chunk
+
+        async def aclose(self) -> None:
+            await self._chunks.aclose()
+
+    return CassetteStream
+
+
+def _response(
+    request: Any, status: int, headers: Any, chunks: AsyncGenerator[bytes, None]
+) -> Any:
+    """A response of ``request``'s httpx flavour (``huggingface_hub`` ships
+    its own fork) streaming ``chunks``."""
+    module = importlib.import_module(type(request).__module__.partition(".")[0])
+    stream = _stream_class(module.AsyncByteStream)(chunks)
+    return module.Response(status, headers=headers, stream=stream, request=request)
+
+
+def _encode(chunk: bytes) -> Any:
+    try:
+        return chunk.decode("utf-8")
+    except UnicodeDecodeError:
+        return {"b64": base64.b64encode(chunk).decode("ascii")}
+
+
+def _decode(chunk: Any) -> bytes:
+    if isinstance(chunk, str):
+        return chunk.encode("utf-8")
+    return base64.b64decode(chunk["b64"])
+
+
+class Cassette:
+    """
+    Provider HTTP exchanges stored as JSON Lines, gzip-compressed when ``path``
+    ends in ``.gz``.
+
+    Each line holds one exchange: the request's method, URL and a digest of
+    its body; the response status and headers; the time to response headers;
+    and the body as it arrived, chunk by chunk, with the delay before each
+    chunk. In ``record`` mode calls go to the network and are appended to the
+    file (truncated on the first write); in ``replay`` mode they are answered
+    from it, as fast as possible or, with ``realtime``, at the recorded pace.
+    Identical requests replay their recordings in order, cycling when exhausted.
+
+    Use it through ``HTTPConfig(cassette=...)`` with any provider client.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        mode: CassetteMode = "replay",
+        realtime: bool = False,
+    ) -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode {mode!r}")
+        self.path = Path(path)
+        self.mode = mode
+        self.realtime = realtime
+        self._lock = threading.Lock()
+        self._started = False
+        self._exchanges: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        self._played: Dict[str, int] = {}
+
+    def __repr__(self) -> str:
+        return (
+            f"Cassette({str(self.path)!r}, mode={self.mode!r}, "
+            f"realtime={self.realtime!r})"
+        )
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @staticmethod
+    def key(method: str, url: str, body: bytes) -> str:
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        return f"{method} {url} {digest}"
+
+    def _open(self, mode: str) -> IO[str]:
+        if self.path.suffix == ".gz":
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def transport(self, wrapped: Optional[Any] = None) -> CassetteTransport:
+        """An httpx transport recording through ``wrapped`` or replaying."""
+        if self.recording and wrapped is None:
+            import httpx
+
+            wrapped = httpx.AsyncHTTPTransport()
+        return CassetteTransport(self, wrapped if self.recording else None)
+
+    def wrap(self, client: Any) -> Any:
+        """Routes an already built httpx(-compatible) client through this cassette."""
+        client._transport = CassetteTransport(
+            self, client._transport if self.recording else None
+        )
+        return client
+
+    # Storage
+
+    def record(self, exchange: Dict[str, Any]) -> None:
+        line = json.dumps(exchange, separators=(",", ":")) + "\n"
+        with self._lock:
+            if not self._started:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self._open("w"):
+                    pass
+                self._started = True
+            with self._open("a") as handle:
+                handle.write(line)
+
+    def load(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            if self._exchanges is None:
+                exchanges: Dict[str, List[Dict[str, Any]]] = {}
+                with self._open("r") as handle:
+                    for line in handle:
+                        if line.strip():
+                            exchange = json.loads(line)
+                            exchanges.setdefault(exchange["key"], []).append(exchange)
+                self._exchanges = exchanges
+            return self._exchanges
+
+    def play(self, key: str) -> Dict[str, Any]:
+        recorded = self.load().get(key)
+        if not recorded:
+            raise LookupError(f"No recorded response for {key} in {self.path}")
+        with self._lock:
+            position = self._played.get(key, 0)
+            self._played[key] = position + 1
+        return recorded[position % len(recorded)]
+
+
+class CassetteTransport:
+    """
+    httpx transport recording exchanges passing through ``wrapped``, or
+    replaying them without it.
+    """
+
+    def __init__(self, cassette: Cassette, wrapped: Optional[Any] = None) -> None:
+        self.cassette = cassette
+        self.wrapped = wrapped
+
+    async def __aenter__(self) -> CassetteTransport:
+        if self.wrapped is not None:
+            await self.wrapped.__aenter__()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if self.wrapped is not None:
+            await self.wrapped.__aexit__(exc_type, exc, traceback)
+
+    async def handle_async_request(self, request: Any) -> Any:
+        body = await request.aread()
+        key = Cassette.key(request.method, str(request.url), body)
+        if self.wrapped is None:
+            return await self._replay(request, key)
+
+        # Plain bodies keep the cassette readable and replayable as-is
+        request.headers["Accept-Encoding"] = "identity"
+        started = time.perf_counter()
+        response = await self.wrapped.handle_async_request(request)
+        exchange = {
+            "key": key,
+            "status": response.status_code,
+            "headers": [
+                [name, value]
+                for name, value in response.headers.multi_items()
+                if name.lower() not in _DROPPED_HEADERS
+            ],
+            "latency": round(time.perf_counter() - started, 6),
+        }
+        return _response(
+            request,
+            response.status_code,
+            exchange["headers"],
+            self._record_body(response, exchange),
+        )
+
+    async def _record_body(
+        self, response: Any, exchange: Dict[str, Any]
+    ) -> AsyncGenerator[bytes, None]:
+        chunks: List[Tuple[float, Any]] = []
+        last = time.perf_counter()
+        try:
+            async for chunk in response.stream:
+                now = time.perf_counter()
+                chunks.append((round(now - last, 6), _encode(chunk)))
+                last = now
+                yield chunk
+        finally:
+            await response.aclose()
+            # Also on early close, so replays match what the client consumed
+            self.cassette.record({**exchange, "chunks": chunks})
+
+    async def _replay(self, request: Any, key: str) -> Any:
+        exchange = self.cassette.play(key)
+        if self.cassette.realtime:
+            await asyncio.sleep(exchange["latency"])
+        return _response(
+            request,
+            exchange["status"],
+            exchange["headers"],
+            self._replay_body(exchange["chunks"]),
+        )
+
+    async def _replay_body(
+        self, chunks: List[Tuple[float, Any]]
+    ) -> AsyncGenerator[bytes, None]:
+        realtime = self.cassette.realtime
+        for delay, chunk in chunks:
+            if realtime and delay:
+                await asyncio.sleep(delay)
+            yield _decode(chunk)
+
+    async def aclose(self) -> None:
+        if self.wrapped is not None:
+            await self.wrapped.aclose()
@@ -0,0 +1,245 @@
+"""
+Compiled response schemas shared by all providers.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    Tuple,
+    get_args,
+    get_origin,
+)
+
+from pydantic import (
+    AfterValidator,
+    AliasChoices,
+    BaseModel,
+    BeforeValidator,
+    PlainValidator,
+    PydanticUserError,
+    TypeAdapter,
+    WrapValidator,
+    create_model,
+)
+from pydantic.fields import FieldInfo
+
+DEFAULT_REGISTRY_SIZE = 128
+# Rough average, for estimating the tokens of schemas and prompts
+CHARS_PER_TOKEN = 4
+
+_FIELD_VALIDATORS = {
+    "before": BeforeValidator,
+    "after": AfterValidator,
+    "wrap": WrapValidator,
+    "plain": PlainValidator,
+}
+
+
+def validation_key(name: str, field: FieldInfo) -> str:
+    """The key ``field`` is read from when its model validates input."""
+    alias = field.validation_alias
+    if isinstance(alias, str):
+        return alias
+    if isinstance(alias, AliasChoices) and isinstance(alias.choices[0], str):
+        return alias.choices[0]
+    return field.alias or name
+
+
+class CompiledSchema:
+    """A response schema compiled once, with its cached wire forms and validator."""
+
+    def __init__(self, schema: Any) -> None:
+        self.schema = schema
+        self.is_list = get_origin(schema) is list
+        self.item_model: type[BaseModel] = (
+            get_args(schema)[0] if self.is_list else schema
+        )
+        self._wire_forms: Dict[Hashable, Any] = {}
+        # Reentrant: building one wire form may need another
+        self._lock = threading.RLock()
+
+    @cached_property
+    def adapter(self) -> TypeAdapter[Any]:
+        """Validator for the schema as the caller declared it."""
+        return TypeAdapter(self.schema)
+
+    @cached_property
+    def response_format(self) -> type[BaseModel]:
+        """Object model sent to providers; ``list[...]`` schemas get a wrapper."""
+        if not self.is_list:
+            return self.schema
+        return create_model(
+            "ListWrapper",
+            data=(list[self.item_model], ...),  # type: ignore[name-defined]
+        )
+
+    @cached_property
+    def field_adapters(self) -> Dict[str, Tuple[str, TypeAdapter[Any]]]:
+        """
+        Per-field validators of :attr:`item_model`, keyed by the JSON name
+        each field is validated from; they apply the field's constraints, the
+        model's config and its field validators (which see no other fields).
+        """
+        model = self.item_model
+        validators: Dict[str, List[Any]] = {name: [] for name in model.model_fields}
+        for decorator in model.__pydantic_decorators__.field_validators.values():
+            wrapper = _FIELD_VALIDATORS[decorator.info.mode]
+            fields = decorator.info.fields
+            for name in model.model_fields if "*" in fields else fields:
+                if name in validators:
+                    validators[name].append(wrapper(decorator.func))
+        adapters = {}
+        for name, field in model.model_fields.items():
+            extras = (*field.metadata, *validators[name])
+            annotated = (
+                Annotated[(field.annotation, *extras)] if extras else field.annotation
+            )
+            try:
+                adapter = TypeAdapter(annotated, config=model.model_config)
+            except PydanticUserError:
+                # Models and typed dicts bring their own config
+                adapter = TypeAdapter(annotated)
+            adapters[validation_key(name, field)] = (name, adapter)
+        return adapters
+
+    @cached_property
+    def json_schema(self) -> Dict[str, Any]:
+        """JSON schema of the declared schema (arrays stay arrays)."""
+        return self.adapter.json_schema()
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Stable hash of :attr:`json_schema`, e.g. for cache keys."""
+        canonical = json.dumps(self.json_schema, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    @cached_property
+    def wire_json_schema(self) -> Dict[str, Any]:
+        """JSON schema of :attr:`response_format` (always an object)."""
+        return self.response_format.model_json_schema()
+
+    def prepare(self) -> CompiledSchema:
+        """Eagerly builds the cached validator and JSON schemas."""
+        for name in ("adapter", "response_format", "json_schema", "wire_json_schema"):
+            getattr(self, name)
+        return self
+
+    def wire_form(self, key: Hashable, build: Callable[[CompiledSchema], Any]) -> Any:
+        """Return the provider-specific form stored under ``key``, building it once."""
+        try:
+            return self._wire_forms[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._wire_forms:
+                self._wire_forms[key] = build(self)
+            return self._wire_forms[key]
+
+    def validate(self, data: Any) -> Any:
+        """Validate python data against the declared schema."""
+        return self.adapter.validate_python(data)
+
+    def validate_json(self, data: str | bytes) -> Any:
+        """Validate raw JSON against the declared schema."""
+        return self.adapter.validate_json(data)
+
+    def unwrap(self, parsed: Any) -> Any:
+        """Turn a parsed :attr:`response_format` payload into the declared content."""
+        if not self.is_list or parsed is None:
+            return parsed
+        if isinstance(parsed, dict):
+            return parsed.get("data", [])
+        return parsed.data
+
+    def validate_wire(self, data: Any) -> Any:
+        """Validate python data shaped like :attr:`response_format`."""
+        return self.unwrap(self.response_format.model_validate(data))
+
+    def validate_wire_json(self, data: str | bytes) -> Any:
+        """Validate raw JSON shaped like :attr:`response_format`."""
+        return self.unwrap(self.response_format.model_validate_json(data))
+
+
+class SchemaRegistry:
+    """Process-wide LRU of compiled schemas."""
+
+    def __init__(self, maxsize: int = DEFAULT_REGISTRY_SIZE) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Any, CompiledSchema] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, schema: Any) -> CompiledSchema:
+        """Return the compiled form of ``schema``, compiling it on first use."""
+        if isinstance(schema, CompiledSchema):
+            return schema
+        with self._lock:
+            compiled = self._entries.get(schema)
+            if compiled is not None:
+                self._entries.move_to_end(schema)
+                return compiled
+            compiled = CompiledSchema(schema)
+            self._entries[schema] = compiled
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return compiled
+
+    def __contains__(self, schema: Any) -> bool:
+        return schema in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def compiled(self) -> List[CompiledSchema]:
+        """The compiled schemas currently held, least recently used first."""
+        with self._lock:
+            return list(self._entries.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+schema_registry = SchemaRegistry()
+
+
+def compile_schema(schema: Any) -> CompiledSchema:
+    """Compile ``schema`` through the shared :data:`schema_registry`."""
+    return schema_registry.get(schema)
+
+
+def combine_schemas(schemas: Mapping[str, Any]) -> type[BaseModel]:
+    """
+    One model with a required field per named schema (a model or
+    ``list[Model]``), for extracting them all in a single call.
+
+    The same names and schemas, in the same order, always give the same
+    class, so its compiled form and wire forms are reused.
+    """
+    if not schemas:
+        raise ValueError("combine_schemas needs at least one schema")
+    for name in schemas:
+        if not name.isidentifier() or name.startswith("_"):
+            raise ValueError(f"Schema name {name!r} is not a valid field name")
+    return _combined(tuple(schemas.items()))
+
+
+@functools.lru_cache(maxsize=DEFAULT_REGISTRY_SIZE)
+def _combined(schemas: Tuple[Tuple[str, Any], ...]) -> type[BaseModel]:
+    return create_model(  # type: ignore[call-overload, no-any-return]
+        "MultiSchema", **{name: (schema, ...) for name, schema in schemas}
+    )
@@ -0,0 +1,234 @@
+"""
+Incremental JSON parsing for streamed structured output.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from .schema import CompiledSchema
+
+_WHITESPACE = frozenset(" \t\r\n")
+_SCALAR_END = frozenset(",]} \t\r\n")
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+Path = Tuple[Any, ...]
+
+
+class _Frame:
+    __slots__ = ("is_object", "key", "expect_key", "path")
+
+    def __init__(self, is_object: bool, path: Path) -> None:
+        self.is_object = is_object
+        self.key: Any = None if is_object else 0
+        self.expect_key = is_object
+        self.path = path
+
+
+class IncrementalJSONParser:
+    """
+    Scans a JSON document fed as raw text deltas, keeping its state between chunks.
+
+    Every child value of the container found at ``path`` (object member or array
+    item) is reported as ``(key, raw_json)`` as soon as its closing character has
+    been seen. Each character is scanned once and deltas are kept as a list of
+    chunks, so feeding a document of size ``n`` costs ``O(n)`` overall. Anything
+    before the first ``{``/``[`` (e.g. a markdown fence) and after the root value
+    is ignored.
+    """
+
+    def __init__(self, path: Path = ()) -> None:
+        self.path = tuple(path)
+        self.done = False
+        self._chunks: List[str] = []
+        self._offsets: List[int] = []
+        self._length = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._is_key = False
+        self._escape = False
+        self._string_start = -1
+        self._scalar_start = -1
+        self._value_start = -1
+        self._root_start = -1
+        self._root_end = -1
+
+    @property
+    def document(self) -> str:
+        """The root JSON value (complete once :attr:`done` is set)."""
+        if self._root_start < 0:
+            return ""
+        end = self._root_end if self.done else self._length
+        return self._slice(self._root_start, end)
+
+    def feed(self, delta: str) -> List[Tuple[Any, str]]:
+        """Consume ``delta`` and return the children of ``path`` it completed."""
+        if not delta or self.done:
+            return []
+        base = self._length
+        self._chunks.append(delta)
+        self._offsets.append(base)
+        self._length += len(delta)
+
+        completed: List[Tuple[Any, str]] = []
+        i, n = 0, len(delta)
+        while i < n and not self.done:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    i += 1
+                    continue
+                match = _STRING_SPECIAL.search(delta, i)
+                if match is None:
+                    break
+                j = match.start()
+                if delta[j] == "\\":
+                    self._escape = True
+                    i = j + 1
+                    continue
+                self._in_string = False
+                i = j + 1
+                self._end_string(base + i, completed)
+                continue
+
+            c = delta[i]
+            if self._scalar_start >= 0:
+                if c not in _SCALAR_END:
+                    i += 1
+                    continue
+                self._scalar_start = -1
+                self._end_value(base + i, completed)
+
+            if c in _WHITESPACE:
+                i += 1
+            elif not self._stack and self._root_start < 0 and c not in "{[":
+                i += 1
+            elif c == '"':
+                self._in_string = True
+                self._is_key = bool(self._stack and self._stack[-1].expect_key)
+                if not self._is_key:
+                    self._begin_value(base + i)
+                self._string_start = base + i
+                i += 1
+            elif c in "{[":
+                self._begin_value(base + i)
+                top = self._stack[-1] if self._stack else None
+                path = top.path + (top.key,) if top else ()
+                self._stack.append(_Frame(c == "{", path))
+                i += 1
+            elif c in "}]":
+                if self._stack:
+                    self._stack.pop()
+                i += 1
+                self._end_value(base + i, completed)
+            elif c == ":":
+                if self._stack:
+                    self._stack[-1].expect_key = False
+                i += 1
+            elif c == ",":
+                if self._stack:
+                    top = self._stack[-1]
+                    if top.is_object:
+                        top.expect_key = True
+                    else:
+                        top.key += 1
+                i += 1
+            else:
+                self._begin_value(base + i)
+                self._scalar_start = base + i
+                i += 1
+        return completed
+
+    def _begin_value(self, position: int) -> None:
+        if not self._stack:
+            if self._root_start < 0:
+                self._root_start = position
+            return
+        if self._stack[-1].path == self.path:
+            self._value_start = position
+
+    def _end_string(self, end: int, completed: List[Tuple[Any, str]]) -> None:
+        if self._is_key:
+            self._stack[-1].key = json.loads(self._slice(self._string_start, end))
+            return
+        self._end_value(end, completed)
+
+    def _end_value(self, end: int, completed: List[Tuple[Any, str]]) -> None:
+        if not self._stack:
+            self._root_end = end
+            self.done = True
+            return
+        top = self._stack[-1]
+        if top.path == self.path and self._value_start >= 0:
+            completed.append((top.key, self._slice(self._value_start, end)))
+            self._value_start = -1
+
+    def _slice(self, start: int, end: int) -> str:
+        index = bisect_right(self._offsets, start) - 1
+        parts = []
+        while start < end:
+            chunk, offset = self._chunks[index], self._offsets[index]
+            parts.append(chunk[start - offset : end - offset])
+            start = offset + len(chunk)
+            index += 1
+        return "".join(parts)
+
+
+class StreamAssembler:
+    """
+    Turns raw JSON deltas for a compiled schema into partial and final content.
+
+    ``wrapped`` tells whether the provider was sent :attr:`CompiledSchema.
+    response_format` (list schemas wrapped under ``data``) or the declared schema.
+    List items and object fields are validated once, when they complete.
+
+    With ``deltas``, partial content holds only what each delta completed (new
+    list items, or a model with just the new top-level fields set) instead of
+    everything so far, so a stream of ``n`` items carries ``O(n)`` in total.
+    """
+
+    def __init__(
+        self, compiled: CompiledSchema, wrapped: bool = False, deltas: bool = False
+    ) -> None:
+        self.compiled = compiled
+        self.wrapped = wrapped
+        self.deltas = deltas
+        path: Path = ("data",) if wrapped and compiled.is_list else ()
+        self.parser = IncrementalJSONParser(path)
+        self._items: List[Any] = []
+        self._fields: Dict[str, Any] = {}
+
+    def feed(self, delta: str) -> Optional[Any]:
+        """Consume ``delta``; return the partial content if anything completed."""
+        completed = self.parser.feed(delta)
+        if not completed:
+            return None
+        if self.compiled.is_list:
+            validate = self.compiled.item_model.model_validate_json
+            items = [validate(raw) for _, raw in completed]
+            self._items.extend(items)
+            return items if self.deltas else list(self._items)
+        adapters = self.compiled.field_adapters
+        fields = {}
+        for key, raw in completed:
+            if key in adapters:
+                name, adapter = adapters[key]
+                fields[name] = adapter.validate_json(raw)
+        self._fields.update(fields)
+        if not self.deltas:
+            return self.compiled.item_model.model_construct(**self._fields)
+        return self.compiled.item_model.model_construct(**fields) if fields else None
+
+    def finish(self) -> Optional[Any]:
+        """Validate the complete document and return the final content."""
+        if self.compiled.is_list and self.parser.done:
+            return list(self._items)
+        document = self.parser.document
+        if not document:
+            return None
+        if self.wrapped:
+            return self.compiled.validate_wire_json(document)
+        return self.compiled.validate_json(document)
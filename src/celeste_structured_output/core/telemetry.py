@@ -0,0 +1,346 @@
+"""
+Per-call timing spans, hooks and span exporters.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import TracebackType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+from .types import StreamEvent
+
+if TYPE_CHECKING:
+    from .types import StructuredResponse
+
+R = TypeVar("R")
+Annotated = TypeVar("Annotated", "StructuredResponse", StreamEvent)
+
+TRACER_NAME = "celeste_structured_output"
+
+logger = logging.getLogger(__name__)
+
+_attempt: ContextVar[int] = ContextVar("celeste_attempt", default=0)
+
+
+@contextmanager
+def retry_attempt(number: int) -> Iterator[None]:
+    """Marks calls made inside the block as retry ``number`` (0 = first try)."""
+    token = _attempt.set(number)
+    try:
+        yield
+    finally:
+        _attempt.reset(token)
+
+
+class Span:
+    """
+    Timings of one provider call.
+
+    Offsets (``ttft``, ``first_partial``) are seconds from the start of the
+    call; ``compile`` and ``validation`` accumulate the time spent compiling
+    the schema and building its wire form, and parsing/validating output.
+    """
+
+    __slots__ = (
+        "name",
+        "provider",
+        "model",
+        "start_time_ns",
+        "retries",
+        "ttft",
+        "first_partial",
+        "compile",
+        "validation",
+        "wall",
+        "output_tokens",
+        "error",
+        "_started",
+        "_instrumentation",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        provider: Optional[str],
+        model: Optional[str],
+        instrumentation: Instrumentation,
+    ) -> None:
+        self.name = name
+        self.provider = provider
+        self.model = model
+        self.start_time_ns = time.time_ns()
+        self.retries = _attempt.get()
+        self.ttft: Optional[float] = None
+        self.first_partial: Optional[float] = None
+        self.compile = 0.0
+        self.validation = 0.0
+        self.wall: Optional[float] = None
+        self.output_tokens: Optional[int] = None
+        self.error: Optional[str] = None
+        self._instrumentation = instrumentation
+        self._started = time.perf_counter()
+
+    @property
+    def end_time_ns(self) -> int:
+        return self.start_time_ns + int((self.wall or 0.0) * 1e9)
+
+    @property
+    def output_tokens_per_second(self) -> Optional[float]:
+        """Output tokens over the generation time (after the first token if known)."""
+        if not self.output_tokens or not self.wall:
+            return None
+        generating = self.wall - (self.ttft or 0.0)
+        return self.output_tokens / generating if generating > 0 else None
+
+    def __enter__(self) -> Span:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.end()
+        self._instrumentation.export(self)
+
+    def mark_first_token(self) -> None:
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self._started
+
+    def mark_first_partial(self) -> None:
+        if self.first_partial is None:
+            self.first_partial = time.perf_counter() - self._started
+
+    def timed_compile(self, func: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.compile += time.perf_counter() - started
+
+    def timed_validation(self, func: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.validation += time.perf_counter() - started
+
+    def end(self, output_tokens: Optional[int] = None) -> None:
+        if output_tokens is not None:
+            self.output_tokens = output_tokens
+        if self.wall is None:
+            self.wall = time.perf_counter() - self._started
+
+    def timings(self) -> Dict[str, Any]:
+        values = {
+            "wall": self.wall,
+            "ttft": self.ttft,
+            "first_partial": self.first_partial,
+            "compile": self.compile,
+            "validation": self.validation,
+            "output_tokens_per_second": self.output_tokens_per_second,
+            "retries": self.retries,
+        }
+        return {key: value for key, value in values.items() if value is not None}
+
+    def attributes(self) -> Dict[str, Any]:
+        """Flat attributes in OpenTelemetry style."""
+        attributes = {f"celeste.{k}": v for k, v in self.timings().items()}
+        attributes["celeste.provider"] = self.provider
+        attributes["celeste.model"] = self.model
+        if self.output_tokens is not None:
+            attributes["celeste.output_tokens"] = self.output_tokens
+        if self.error is not None:
+            attributes["error.type"] = self.error
+        return {k: v for k, v in attributes.items() if v is not None}
+
+    def annotate(self, response: Annotated) -> Annotated:
+        """
+        Copies ``response`` with this span's timings in its metadata (stream
+        events get them set in place).
+        """
+        if not self._instrumentation.metadata:
+            return response
+        self.end(response.usage.output_tokens if response.usage else None)
+        if isinstance(response, StreamEvent):
+            response.metadata = {**(response.metadata or {}), "timings": self.timings()}
+            return response
+        return response.model_copy(
+            update={"metadata": {**response.metadata, "timings": self.timings()}}
+        )
+
+
+class _NoopSpan:
+    """Stand-in returned while instrumentation is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+    def mark_first_token(self) -> None:
+        return None
+
+    def mark_first_partial(self) -> None:
+        return None
+
+    def timed_compile(self, func: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        return func(*args, **kwargs)
+
+    def timed_validation(self, func: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        return func(*args, **kwargs)
+
+    def end(self, output_tokens: Optional[int] = None) -> None:
+        return None
+
+    def annotate(self, response: Annotated) -> Annotated:
+        return response
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(ABC):
+    """Receives finished spans, in the manner of an OpenTelemetry exporter."""
+
+    @abstractmethod
+    def export(self, spans: Sequence[Span]) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        return None
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps finished spans in a list, e.g. for tests."""
+
+    def __init__(self) -> None:
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[Span]) -> None:
+        with self._lock:
+            self._spans.extend(spans)
+
+    def get_finished_spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+class OpenTelemetrySpanExporter(SpanExporter):
+    """Re-emits spans through an OpenTelemetry tracer (``opentelemetry-api``)."""
+
+    def __init__(self, tracer: Any = None) -> None:
+        if tracer is None:
+            from opentelemetry import trace
+
+            tracer = trace.get_tracer(TRACER_NAME)
+        self.tracer = tracer
+
+    def export(self, spans: Sequence[Span]) -> None:
+        for span in spans:
+            otel_span = self.tracer.start_span(
+                span.name, start_time=span.start_time_ns, attributes=span.attributes()
+            )
+            otel_span.end(end_time=span.end_time_ns)
+
+
+class Instrumentation:
+    """
+    Process-wide switch, hooks and exporters for call spans.
+
+    Disabled by default: providers then get :data:`NOOP_SPAN`, whose methods
+    do nothing. Adding a hook or an exporter enables it; ``metadata`` controls
+    whether responses carry their ``timings``.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.metadata = True
+        self.hooks: List[Callable[[Span], None]] = []
+        self.exporters: List[SpanExporter] = []
+
+    def enable(self, metadata: bool = True) -> None:
+        self.metadata = metadata
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def add_hook(self, hook: Callable[[Span], None]) -> None:
+        self.hooks.append(hook)
+        self.enabled = True
+
+    def add_exporter(self, exporter: SpanExporter) -> None:
+        self.exporters.append(exporter)
+        self.enabled = True
+
+    def reset(self) -> None:
+        """Disables instrumentation and shuts down and removes all exporters."""
+        for exporter in self.exporters:
+            exporter.shutdown()
+        self.enabled = False
+        self.metadata = True
+        self.hooks.clear()
+        self.exporters.clear()
+
+    def start(self, client: Any, name: str) -> Span | _NoopSpan:
+        if not self.enabled:
+            return NOOP_SPAN
+        provider = getattr(client, "provider", None)
+        return Span(
+            name,
+            provider.value if provider is not None else type(client).__name__,
+            getattr(client, "model_name", None),
+            self,
+        )
+
+    def export(self, span: Span) -> None:
+        """
+        Hands ``span`` to every hook and exporter; a failing one is logged and
+        skipped, so telemetry never fails the call it measured.
+        """
+        for hook in self.hooks:
+            try:
+                hook(span)
+            except Exception:
+                logger.exception("Span hook %r failed", hook)
+        for exporter in self.exporters:
+            try:
+                exporter.export([span])
+            except Exception:
+                logger.exception("Span exporter %r failed", exporter)
+
+
+instrumentation = Instrumentation()
+
+
+def start_span(client: Any, name: str) -> Span | _NoopSpan:
+    """Starts a span for ``client``'s call ``name`` (a no-op when disabled)."""
+    return instrumentation.start(client, name)
@@ -2,7 +2,7 @@
 Core data types for agent communication.
 """
 
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Literal, Optional, Union
 
 from pydantic import BaseModel, ConfigDict
 
@@ -10,13 +10,21 @@ from .enums import StructuredOutputProvider
 
 
 class AIUsage(BaseModel):
-    """Token usage metrics for AI responses."""
+    """
+    Token usage metrics for AI responses.
+
+    ``input_tokens`` counts the whole prompt, including the tokens read from
+    (``cache_read_tokens``) or written to (``cache_write_tokens``) the
+    provider's prompt cache.
+    """
 
     model_config = ConfigDict(frozen=True)
 
     input_tokens: int
     output_tokens: int
     total_tokens: int
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
 
 
 class StructuredResponse(BaseModel):
@@ -24,7 +32,127 @@ class StructuredResponse(BaseModel):
 
     model_config = ConfigDict(frozen=True)
 
-    content: Union[BaseModel, List[BaseModel]]
+    content: Optional[Union[BaseModel, List[BaseModel]]] = None
+    usage: Optional[AIUsage] = None
+    provider: Optional[StructuredOutputProvider] = None
+    metadata: Dict[str, Any] = {}
+
+
+class MultiSchemaResponse(BaseModel):
+    """Per-schema contents of one ``generate_multi`` call, with its usage."""
+
+    model_config = ConfigDict(frozen=True)
+
+    contents: Dict[str, Any] = {}
     usage: Optional[AIUsage] = None
     provider: Optional[StructuredOutputProvider] = None
     metadata: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        return self.contents[name]
+
+
+StreamEventKind = Literal["partial", "delta", "final", "usage", "text"]
+
+# Response metadata flags of each event kind, shared rather than built per event
+_EVENT_FLAGS: Dict[str, Dict[str, bool]] = {
+    "partial": {"is_stream_chunk": True, "is_partial": True},
+    "delta": {"is_stream_chunk": True, "is_partial": True, "is_delta": True},
+    "final": {"is_stream_chunk": True},
+    "usage": {"is_final_usage": True},
+    "text": {"is_stream_chunk": True},
+}
+
+
+class StreamEvent:
+    """
+    One event of a stream, cheap enough to build for every token delta.
+
+    ``kind`` is ``"partial"`` (a validated prefix of the output), ``"delta"``
+    (only the list items or fields completed since the previous event, when
+    streaming with ``deltas=True``), ``"final"`` (the complete output),
+    ``"usage"`` (token counts once the stream ends) or ``"text"`` (a raw delta
+    of an unstructured stream). Unlike ``StructuredResponse`` it is a plain
+    slotted object with no per-event metadata dict; ``metadata`` only holds
+    extras such as ``timings``.
+    ``to_response`` builds the equivalent ``StructuredResponse``.
+    """
+
+    __slots__ = ("kind", "content", "provider", "model", "usage", "metadata")
+
+    def __init__(
+        self,
+        kind: StreamEventKind,
+        content: Any,
+        provider: Optional[StructuredOutputProvider],
+        model: Optional[str],
+        usage: Optional[AIUsage] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.kind = kind
+        self.content = content
+        self.provider = provider
+        self.model = model
+        self.usage = usage
+        self.metadata = metadata
+
+    def __repr__(self) -> str:
+        return (
+            f"StreamEvent(kind={self.kind!r}, content={self.content!r}, "
+            f"usage={self.usage!r})"
+        )
+
+    @property
+    def is_partial(self) -> bool:
+        return self.kind in ("partial", "delta")
+
+    def to_response(self) -> StructuredResponse:
+        metadata: Dict[str, Any] = {"model": self.model, **_EVENT_FLAGS[self.kind]}
+        if self.metadata:
+            metadata.update(self.metadata)
+        return StructuredResponse(
+            content=self.content,
+            usage=self.usage,
+            provider=self.provider,
+            metadata=metadata,
+        )
+
+    @classmethod
+    def from_response(cls, response: StructuredResponse) -> "StreamEvent":
+        """The event for a chunk of ``stream_generate_content``."""
+        metadata = dict(response.metadata)
+        model = metadata.pop("model", None)
+        kind: StreamEventKind
+        if metadata.pop("is_final_usage", False):
+            kind = "usage"
+        elif metadata.pop("is_delta", False):
+            metadata.pop("is_partial", None)
+            kind = "delta"
+        elif metadata.pop("is_partial", False):
+            kind = "partial"
+        else:
+            kind = "text" if isinstance(response.content, str) else "final"
+        metadata.pop("is_stream_chunk", None)
+        return cls(
+            kind,
+            response.content,
+            response.provider,
+            model,
+            response.usage,
+            metadata or None,
+        )
+
+
+class BatchResult(BaseModel):
+    """Outcome of one prompt in a batch; failures are reported, not raised."""
+
+    model_config = ConfigDict(frozen=True, arbitrary_types_allowed=True)
+
+    index: int
+    prompt: str
+    response: Optional[StructuredResponse] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
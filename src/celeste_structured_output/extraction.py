@@ -0,0 +1,279 @@
+"""
+Map-reduce extraction of lists from documents longer than the context window.
+"""
+
+from __future__ import annotations
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from pydantic import BaseModel
+
+from .base import BaseStructuredClient
+from .core.concurrency import DEFAULT_MAX_CONCURRENCY
+from .core.prefix import PromptPrefix
+from .core.schema import CHARS_PER_TOKEN
+from .core.types import AIUsage, StructuredResponse
+
+DEFAULT_CHUNK_TOKENS = 4000
+DEFAULT_OVERLAP_TOKENS = 200
+DEFAULT_INSTRUCTIONS = (
+    "Extract every matching item from the following excerpt of a longer "
+    "document. Only report items stated in the excerpt."
+)
+# Split points tried in order: paragraphs, lines, sentences, words
+SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+TokenCounter = Callable[[str], int]
+ItemKey = Union[str, Sequence[str], Callable[[Any], Hashable]]
+Reconcile = Callable[[Any, Any], Any]
+
+
+def estimate_text_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def split_document(
+    text: str,
+    max_tokens: int = DEFAULT_CHUNK_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    count_tokens: TokenCounter = estimate_text_tokens,
+) -> List[str]:
+    """
+    Splits ``text`` into chunks of at most ``max_tokens``, each starting with
+    up to ``overlap_tokens`` of the end of the previous one.
+
+    Text is cut at paragraph, line, sentence or word boundaries, whichever is
+    the coarsest that fits, into pieces no larger than the overlap; chunks
+    are then packed from whole pieces, so joining them without the overlaps
+    gives back ``text``. ``count_tokens`` defaults to a character estimate;
+    pass a tokenizer's for exact bounds (text without any separator is cut
+    by the estimate either way).
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be at least 1")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("overlap_tokens must be between 0 and max_tokens")
+    size = count_tokens(text)
+    if size <= max_tokens:
+        return [text] if text else []
+    piece_tokens = overlap_tokens or max_tokens
+    pieces = _pieces(text, size, piece_tokens, count_tokens, SEPARATORS)
+
+    chunks: List[str] = []
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+    for piece, tokens in pieces:
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("".join(part for part, _ in current))
+            # Carry the tail of this chunk over into the next one
+            kept: List[Tuple[str, int]] = []
+            kept_tokens = 0
+            for part, part_tokens in reversed(current):
+                if kept_tokens + part_tokens > overlap_tokens:
+                    break
+                kept.append((part, part_tokens))
+                kept_tokens += part_tokens
+            current, current_tokens = kept[::-1], kept_tokens
+            while current and current_tokens + tokens > max_tokens:
+                current_tokens -= current.pop(0)[1]
+        current.append((piece, tokens))
+        current_tokens += tokens
+    if current:
+        chunks.append("".join(part for part, _ in current))
+    return chunks
+
+
+def _pieces(
+    text: str,
+    tokens: int,
+    max_tokens: int,
+    count_tokens: TokenCounter,
+    separators: Sequence[str],
+) -> List[Tuple[str, int]]:
+    if tokens <= max_tokens:
+        return [(text, tokens)]
+    if not separators:
+        width = max_tokens * CHARS_PER_TOKEN
+        return [
+            (text[start : start + width], count_tokens(text[start : start + width]))
+            for start in range(0, len(text), width)
+        ]
+    separator, finer = separators[0], separators[1:]
+    parts = text.split(separator)
+    pieces: List[Tuple[str, int]] = []
+    for position, part in enumerate(parts):
+        # Separators stay attached so the pieces add up to the text
+        if position < len(parts) - 1:
+            part += separator
+        if part:
+            pieces.extend(
+                _pieces(part, count_tokens(part), max_tokens, count_tokens, finer)
+            )
+    return pieces
+
+
+def _empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def fill_missing(existing: Any, duplicate: Any) -> Any:
+    """Keeps ``existing``, taking the fields it left empty from ``duplicate``."""
+    if not isinstance(existing, BaseModel):
+        return existing
+    updates = {
+        name: getattr(duplicate, name)
+        for name in type(existing).model_fields
+        if _empty(getattr(existing, name)) and not _empty(getattr(duplicate, name))
+    }
+    return existing.model_copy(update=updates) if updates else existing
+
+
+def _normalized(value: Any) -> Hashable:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, (list, dict, BaseModel)):
+        return repr(value)
+    return value
+
+
+def _key_function(key: Optional[ItemKey]) -> Callable[[Any], Hashable]:
+    if callable(key):
+        return key
+    if key is None:
+        return lambda item: (
+            item.model_dump_json() if isinstance(item, BaseModel) else repr(item)
+        )
+    fields = (key,) if isinstance(key, str) else tuple(key)
+    return lambda item: tuple(_normalized(getattr(item, name)) for name in fields)
+
+
+def merge_items(
+    chunks: Sequence[Sequence[Any]],
+    key: Optional[ItemKey] = None,
+    reconcile: Reconcile = fill_missing,
+) -> Tuple[List[Any], int]:
+    """
+    Merges per-chunk item lists in document order, returning the items and
+    the number of duplicates merged away.
+
+    Without a ``key``, only identical items are duplicates. A ``key`` names
+    the identifying field(s), compared with whitespace and case normalized,
+    or is a function of the item; items sharing it are combined with
+    ``reconcile(kept, duplicate)``.
+    """
+    key_of = _key_function(key)
+    merged: Dict[Hashable, Any] = {}
+    duplicates = 0
+    for items in chunks:
+        for item in items:
+            item_key = key_of(item)
+            if item_key in merged:
+                merged[item_key] = reconcile(merged[item_key], item)
+                duplicates += 1
+            else:
+                merged[item_key] = item
+    return list(merged.values()), duplicates
+
+
+def combine_usage(usages: Sequence[Optional[AIUsage]]) -> Optional[AIUsage]:
+    """Sum of the known ``usages``; None when there is none."""
+    known = [usage for usage in usages if usage is not None]
+    if not known:
+        return None
+    return AIUsage(
+        **{
+            name: sum(getattr(usage, name) for usage in known)
+            for name in AIUsage.model_fields
+        }
+    )
+
+
+class DocumentExtractor:
+    """
+    Extracts a ``list[item_schema]`` from a document of any length.
+
+    The document is split with :func:`split_document`, every chunk is sent
+    concurrently through ``client.map_structured`` with ``instructions`` as
+    a shared, cacheable :class:`PromptPrefix`, and the per-chunk lists are
+    merged with :func:`merge_items`. The result is one ``StructuredResponse``
+    with the combined usage. A failed chunk raises its error, unless
+    ``allow_partial`` is set; its index is then listed in the metadata's
+    ``failed_chunks``.
+    """
+
+    def __init__(
+        self,
+        client: BaseStructuredClient,
+        max_chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+        count_tokens: TokenCounter = estimate_text_tokens,
+        key: Optional[ItemKey] = None,
+        reconcile: Reconcile = fill_missing,
+        instructions: str = DEFAULT_INSTRUCTIONS,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        allow_partial: bool = False,
+    ) -> None:
+        if not 0 <= overlap_tokens < max_chunk_tokens:
+            raise ValueError("overlap_tokens must be between 0 and max_chunk_tokens")
+        self.client = client
+        self.max_chunk_tokens = max_chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens = count_tokens
+        self.key = key
+        self.reconcile = reconcile
+        self.prefix = PromptPrefix(system=instructions)
+        self.max_concurrency = max_concurrency
+        self.allow_partial = allow_partial
+
+    def split(self, document: str) -> List[str]:
+        return split_document(
+            document, self.max_chunk_tokens, self.overlap_tokens, self.count_tokens
+        )
+
+    async def extract(
+        self, document: str, item_schema: type[BaseModel], **kwargs: Any
+    ) -> StructuredResponse:
+        """Items of ``item_schema`` found anywhere in ``document``."""
+        chunks = self.split(document)
+        kwargs.setdefault("prefix", self.prefix)
+        results = await self.client.generate_batch(
+            chunks,
+            list[item_schema],  # type: ignore[valid-type]
+            max_concurrency=self.max_concurrency,
+            **kwargs,
+        )
+
+        failed = [result.index for result in results if not result.ok]
+        if failed and not self.allow_partial:
+            error = results[failed[0]].error
+            assert error is not None
+            raise error
+        responses = [result.response for result in results if result.response]
+        items, duplicates = merge_items(
+            [response.content or [] for response in responses],  # type: ignore[misc]
+            self.key,
+            self.reconcile,
+        )
+        metadata: Dict[str, Any] = {
+            "model": self.client.model_name,
+            "chunks": len(chunks),
+            "duplicates": duplicates,
+        }
+        if failed:
+            metadata["failed_chunks"] = failed
+        return StructuredResponse(
+            content=items,
+            usage=combine_usage([response.usage for response in responses]),
+            provider=self.client.provider,
+            metadata=metadata,
+        )
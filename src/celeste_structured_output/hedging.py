@@ -0,0 +1,178 @@
+"""
+Hedged requests: a backup call for attempts that run past the usual latency.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Optional
+
+from pydantic import BaseModel
+
+from .base import BaseStructuredClient
+from .core.types import AIUsage, StreamEvent, StructuredResponse
+
+DEFAULT_PERCENTILE = 0.95
+DEFAULT_INITIAL_DELAY = 2.0
+DEFAULT_MAX_HEDGE_RATE = 0.05
+DEFAULT_WINDOW = 512
+MIN_SAMPLES = 20
+# Unused hedge allowance carried over between quiet and busy periods
+MAX_HEDGE_BUDGET = 10.0
+
+
+class HedgeStats(BaseModel):
+    """Counters of a ``HedgedStructuredClient``."""
+
+    requests: int = 0
+    hedges: int = 0
+    throttled: int = 0
+    primary_wins: int = 0
+    hedge_wins: int = 0
+    failures: int = 0
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedges / self.requests if self.requests else 0.0
+
+    @property
+    def hedge_win_rate(self) -> float:
+        return self.hedge_wins / self.hedges if self.hedges else 0.0
+
+
+def _failed(task: asyncio.Task[StructuredResponse]) -> bool:
+    return task.cancelled() or task.exception() is not None
+
+
+def _valid(task: asyncio.Task[StructuredResponse]) -> bool:
+    return not _failed(task) and task.result().content is not None
+
+
+class HedgedStructuredClient(BaseStructuredClient):
+    """
+    Wraps a client so slow ``generate_content`` calls get a second attempt.
+
+    When the first attempt has not answered after the ``percentile`` latency of
+    recent calls (``initial_delay`` until ``MIN_SAMPLES`` are recorded), the same
+    request is sent again, to ``alternate`` when given. The first valid response
+    wins and the other attempt is cancelled. Each call earns ``max_hedge_rate``
+    of a hedge, so backups never exceed that share of traffic. Streams are
+    passed through unhedged.
+    """
+
+    def __init__(
+        self,
+        client: BaseStructuredClient,
+        alternate: Optional[BaseStructuredClient] = None,
+        percentile: float = DEFAULT_PERCENTILE,
+        initial_delay: float = DEFAULT_INITIAL_DELAY,
+        max_hedge_rate: float = DEFAULT_MAX_HEDGE_RATE,
+        window: int = DEFAULT_WINDOW,
+    ) -> None:
+        if not 0.0 < percentile < 1.0:
+            raise ValueError("percentile must be between 0 and 1")
+        self.client = client
+        self.alternate = alternate or client
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.max_hedge_rate = max_hedge_rate
+        self.stats = HedgeStats()
+        self.provider = client.provider
+        self.model_name = client.model_name
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._budget = 1.0
+
+    @property
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the first attempt before sending the hedge."""
+        if len(self._latencies) < MIN_SAMPLES:
+            return self.initial_delay
+        ordered = sorted(self._latencies)
+        return ordered[int(self.percentile * (len(ordered) - 1))]
+
+    def format_usage(self, usage_data: Any) -> Optional[AIUsage]:
+        return self.client.format_usage(usage_data)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+        if self.alternate is not self.client:
+            await self.alternate.aclose()
+
+    def _take_hedge(self) -> bool:
+        if self._budget < 1.0:
+            self.stats.throttled += 1
+            return False
+        self._budget -= 1.0
+        self.stats.hedges += 1
+        return True
+
+    async def generate_content(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> StructuredResponse:
+        self.stats.requests += 1
+        self._budget = min(MAX_HEDGE_BUDGET, self._budget + self.max_hedge_rate)
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(
+            self.client.generate_content(prompt, response_schema, **kwargs)
+        )
+        hedge: Optional[asyncio.Task[StructuredResponse]] = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay)
+            if done or not self._take_hedge():
+                response = await primary
+                self._latencies.append(time.perf_counter() - started)
+                return response
+
+            hedge = asyncio.ensure_future(
+                self.alternate.generate_content(prompt, response_schema, **kwargs)
+            )
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                winner = next((task for task in done if _valid(task)), None)
+                if winner is not None:
+                    break
+            else:
+                self.stats.failures += 1
+                winner = hedge if _failed(primary) else primary
+
+            response = winner.result()
+            self._latencies.append(time.perf_counter() - started)
+            if response.content is not None:
+                if winner is primary:
+                    self.stats.primary_wins += 1
+                else:
+                    self.stats.hedge_wins += 1
+            return response.model_copy(
+                update={
+                    "metadata": {
+                        **response.metadata,
+                        "hedged": True,
+                        "hedge_won": winner is hedge,
+                    }
+                }
+            )
+        finally:
+            losers = [task for task in (primary, hedge) if task and not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                await asyncio.gather(*losers, return_exceptions=True)
+
+    async def stream_generate_content(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> AsyncIterator[StructuredResponse]:
+        async for chunk in self.client.stream_generate_content(
+            prompt, response_schema, **kwargs
+        ):
+            yield chunk
+
+    async def stream_events(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> AsyncIterator[StreamEvent]:
+        async for event in self.client.stream_events(prompt, response_schema, **kwargs):
+            yield event
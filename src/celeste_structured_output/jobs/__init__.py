@@ -0,0 +1,24 @@
+"""
+Provider batch jobs for non-interactive workloads.
+"""
+
+from .base import BaseBatchJobClient, BatchJob
+
+__all__ = [
+    "AnthropicBatchJobClient",
+    "BaseBatchJobClient",
+    "BatchJob",
+    "OpenAIBatchJobClient",
+]
+
+
+def __getattr__(name: str) -> type:
+    if name == "OpenAIBatchJobClient":
+        from .openai import OpenAIBatchJobClient
+
+        return OpenAIBatchJobClient
+    if name == "AnthropicBatchJobClient":
+        from .anthropic import AnthropicBatchJobClient
+
+        return AnthropicBatchJobClient
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..core.enums import StructuredOutputProvider
+from ..core.schema import CompiledSchema
+from ..core.types import StructuredResponse
+from ..providers.anthropic import AnthropicStructuredClient
+from .base import BaseBatchJobClient, BatchJob
+
+
+class AnthropicBatchJobClient(BaseBatchJobClient):
+    """Structured output through Anthropic Message Batches."""
+
+    provider = StructuredOutputProvider.ANTHROPIC
+    client: AnthropicStructuredClient
+
+    def __init__(
+        self, client: Optional[AnthropicStructuredClient] = None, **kwargs: Any
+    ) -> None:
+        super().__init__(client or AnthropicStructuredClient(), **kwargs)
+
+    def request_line(
+        self, custom_id: str, prompt: str, compiled: CompiledSchema, **kwargs: Any
+    ) -> Dict[str, Any]:
+        return {
+            "custom_id": custom_id,
+            "params": self.client.request_params(prompt, compiled, **kwargs),
+        }
+
+    def prompt_of(self, line: Dict[str, Any]) -> str:
+        # Last: a prompt prefix puts its system text and examples first
+        return line["params"]["messages"][-1]["content"]
+
+    def _to_job(self, batch: Any, spool_path: str, request_count: int) -> BatchJob:
+        return BatchJob(
+            id=batch.id,
+            provider=self.provider,
+            model=self.client.model_name,
+            status=batch.processing_status,
+            done=batch.processing_status == "ended",
+            spool_path=spool_path,
+            request_count=request_count,
+            metadata={"request_counts": batch.request_counts.model_dump()},
+        )
+
+    async def _submit(self, spool_path: Path, request_count: int) -> BatchJob:
+        text = await asyncio.to_thread(spool_path.read_text, encoding="utf-8")
+        requests = [json.loads(line) for line in text.splitlines() if line.strip()]
+        batch = await self.client.client.messages.batches.create(requests=requests)
+        return self._to_job(batch, str(spool_path), request_count)
+
+    async def refresh(self, job: BatchJob) -> BatchJob:
+        batch = await self.client.client.messages.batches.retrieve(job.id)
+        return self._to_job(batch, job.spool_path, job.request_count)
+
+    async def cancel(self, job: BatchJob) -> BatchJob:
+        batch = await self.client.client.messages.batches.cancel(job.id)
+        return self._to_job(batch, job.spool_path, job.request_count)
+
+    async def _fetch_results(self, job: BatchJob) -> Dict[str, Any]:
+        decoder = await self.client.client.messages.batches.results(job.id)
+        return {entry.custom_id: entry.result async for entry in decoder}
+
+    def _to_response(self, result: Any, compiled: CompiledSchema) -> StructuredResponse:
+        if result.type != "succeeded":
+            raise RuntimeError(
+                f"Batch request {result.type}: {getattr(result, 'error', None)}"
+            )
+        message = result.message
+        return StructuredResponse(
+            content=self.client.parse_message(message, compiled),
+            usage=self.client.format_usage(message.usage),
+            provider=self.provider,
+            metadata={"model": message.model},
+        )
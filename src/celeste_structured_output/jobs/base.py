@@ -0,0 +1,176 @@
+"""
+Provider batch jobs spooled through JSONL files.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import tempfile
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Tuple, Union
+
+from pydantic import BaseModel, ConfigDict
+
+from ..base import BaseStructuredClient
+from ..core.concurrency import iterate
+from ..core.enums import StructuredOutputProvider
+from ..core.schema import CompiledSchema, compile_schema
+from ..core.types import BatchResult, StructuredResponse
+
+DEFAULT_POLL_INTERVAL = 30.0
+DEFAULT_SPOOL_DIR = Path(tempfile.gettempdir()) / "celeste-batch-jobs"
+
+
+class BatchJob(BaseModel):
+    """A submitted provider batch job and the spool file it was built from."""
+
+    model_config = ConfigDict(frozen=True)
+
+    id: str
+    provider: StructuredOutputProvider
+    model: str
+    status: str
+    done: bool = False
+    spool_path: str
+    request_count: int
+    metadata: Dict[str, Any] = {}
+
+
+class BaseBatchJobClient(ABC):
+    """
+    Runs prompts through a provider's asynchronous batch endpoint.
+
+    Requests are serialized with their compiled schema to a JSONL spool file,
+    submitted, polled until the provider reports the job as finished, then
+    parsed back into ``BatchResult`` objects validated against the schema. The
+    spool file is the record of the job: results can be fetched from another
+    process given only the ``BatchJob``.
+    """
+
+    provider: StructuredOutputProvider
+
+    def __init__(
+        self,
+        client: BaseStructuredClient,
+        spool_dir: Union[str, Path, None] = None,
+    ) -> None:
+        self.client = client
+        self.spool_dir = Path(spool_dir) if spool_dir else DEFAULT_SPOOL_DIR
+
+    @abstractmethod
+    def request_line(
+        self, custom_id: str, prompt: str, compiled: CompiledSchema, **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Builds one JSONL request line for the provider's batch endpoint."""
+        pass
+
+    @abstractmethod
+    def prompt_of(self, line: Dict[str, Any]) -> str:
+        """Recovers the prompt from a spooled request line."""
+        pass
+
+    @abstractmethod
+    async def _submit(self, spool_path: Path, request_count: int) -> BatchJob:
+        pass
+
+    @abstractmethod
+    async def refresh(self, job: BatchJob) -> BatchJob:
+        """Fetches the current status of ``job``."""
+        pass
+
+    @abstractmethod
+    async def cancel(self, job: BatchJob) -> BatchJob:
+        """Asks the provider to cancel ``job``."""
+        pass
+
+    @abstractmethod
+    async def _fetch_results(self, job: BatchJob) -> Dict[str, Any]:
+        """Maps custom ids to the provider's raw per-request results."""
+        pass
+
+    @abstractmethod
+    def _to_response(self, result: Any, compiled: CompiledSchema) -> StructuredResponse:
+        """Validates one raw result, raising if the request failed."""
+        pass
+
+    async def submit(
+        self,
+        prompts: Union[Iterable[str], AsyncIterable[str]],
+        response_schema: BaseModel,
+        **kwargs: Any,
+    ) -> BatchJob:
+        compiled = compile_schema(response_schema)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        spool_path = self.spool_dir / f"{self.provider.value}-{uuid.uuid4().hex}.jsonl"
+
+        lines = []
+        index = 0
+        async for prompt in iterate(prompts):
+            line = self.request_line(f"request-{index}", prompt, compiled, **kwargs)
+            lines.append(json.dumps(line, separators=(",", ":")))
+            index += 1
+        if not lines:
+            raise ValueError("Cannot submit an empty batch")
+
+        await asyncio.to_thread(
+            spool_path.write_text, "\n".join(lines) + "\n", encoding="utf-8"
+        )
+        return await self._submit(spool_path, index)
+
+    async def wait(
+        self,
+        job: BatchJob,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        timeout: Optional[float] = None,
+    ) -> BatchJob:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not job.done:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Batch job {job.id} still {job.status}")
+            await asyncio.sleep(poll_interval)
+            job = await self.refresh(job)
+        return job
+
+    async def results(
+        self, job: BatchJob, response_schema: BaseModel
+    ) -> List[BatchResult]:
+        """Parses the results of a finished job, in submission order."""
+        compiled = compile_schema(response_schema)
+        requests = await asyncio.to_thread(self._read_spool, Path(job.spool_path))
+        raw_results = await self._fetch_results(job)
+
+        results = []
+        for index, (custom_id, prompt) in enumerate(requests):
+            if custom_id not in raw_results:
+                error = LookupError(f"No result for {custom_id} ({job.status})")
+                results.append(BatchResult(index=index, prompt=prompt, error=error))
+                continue
+            try:
+                response = self._to_response(raw_results[custom_id], compiled)
+            except Exception as error:
+                results.append(BatchResult(index=index, prompt=prompt, error=error))
+                continue
+            results.append(BatchResult(index=index, prompt=prompt, response=response))
+        return results
+
+    async def run(
+        self,
+        prompts: Union[Iterable[str], AsyncIterable[str]],
+        response_schema: BaseModel,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[BatchResult]:
+        """Submits, waits for and parses a batch job in one call."""
+        job = await self.submit(prompts, response_schema, **kwargs)
+        job = await self.wait(job, poll_interval=poll_interval, timeout=timeout)
+        return await self.results(job, response_schema)
+
+    def _read_spool(self, spool_path: Path) -> List[Tuple[str, str]]:
+        with spool_path.open(encoding="utf-8") as spool:
+            lines = [json.loads(line) for line in spool if line.strip()]
+        return [(line["custom_id"], self.prompt_of(line)) for line in lines]
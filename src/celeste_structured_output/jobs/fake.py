@@ -0,0 +1,377 @@
+"""
+Local stand-in for the OpenAI Batch API and Anthropic Message Batches.
+
+``FakeBatchServer`` speaks just enough of both wire protocols for the official
+SDKs, so the batch-job pipeline can be exercised offline::
+
+    with FakeBatchServer() as server:
+        jobs = OpenAIBatchJobClient(server.openai_client())
+        results = await jobs.run(prompts, Person, poll_interval=0.01)
+
+Every request is answered by ``responder(schema, prompt)``, which defaults to
+a minimal instance generated from the request's JSON schema.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+Responder = Callable[[Dict[str, Any], str], Any]
+
+
+def sample_from_schema(
+    schema: Dict[str, Any], defs: Optional[Dict[str, Any]] = None
+) -> Any:
+    """Builds a minimal value that satisfies a (pydantic-generated) JSON schema."""
+    defs = schema.get("$defs", defs or {})
+    if "$ref" in schema:
+        return sample_from_schema(defs[schema["$ref"].rsplit("/", 1)[-1]], defs)
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return schema["enum"][0]
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            options = [s for s in schema[key] if s.get("type") != "null"]
+            return sample_from_schema((options or schema[key])[0], defs)
+
+    kind = schema.get("type", "object")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        return {name: sample_from_schema(sub, defs) for name, sub in properties.items()}
+    if kind == "array":
+        count = max(schema.get("minItems", 1), 1)
+        return [sample_from_schema(schema.get("items", {}), defs)] * count
+    if kind == "string":
+        if schema.get("format") == "date-time":
+            return "2025-01-01T00:00:00Z"
+        if schema.get("format") == "date":
+            return "2025-01-01"
+        return "x" * schema.get("minLength", 1)
+    if kind == "integer":
+        return int(schema.get("minimum", 0))
+    if kind == "number":
+        return float(schema.get("minimum", 0))
+    if kind == "boolean":
+        return False
+    return None
+
+
+def _default_responder(schema: Dict[str, Any], prompt: str) -> Any:
+    return sample_from_schema(schema)
+
+
+class _State:
+    def __init__(self, responder: Responder, processing_time: float) -> None:
+        self.responder = responder
+        self.processing_time = processing_time
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+
+class FakeBatchServer:
+    """In-process HTTP server emulating the providers' batch endpoints."""
+
+    def __init__(
+        self,
+        responder: Optional[Responder] = None,
+        processing_time: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.state = _State(responder or _default_responder, processing_time)
+        handler = type("Handler", (_Handler,), {"state": self.state})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> FakeBatchServer:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> FakeBatchServer:
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def openai_client(self, **kwargs: Any) -> Any:
+        from ..providers.openai import OpenAIClient
+
+        return OpenAIClient(api_key="fake", base_url=f"{self.base_url}/v1", **kwargs)
+
+    def anthropic_client(self, **kwargs: Any) -> Any:
+        from ..providers.anthropic import AnthropicStructuredClient
+
+        return AnthropicStructuredClient(
+            api_key="fake", base_url=self.base_url, **kwargs
+        )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    state: _State
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, payload: Any, status: int = 200, raw: bool = False) -> None:
+        body = payload if raw else json.dumps(payload).encode()
+        self.send_response(status)
+        content_type = "application/octet-stream" if raw else "application/json"
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self) -> None:
+        path = self.path.split("?")[0]
+        if path == "/v1/files":
+            return self._send(self._create_file())
+        if path == "/v1/batches":
+            return self._send(self._create_openai_batch(json.loads(self._body())))
+        if path == "/v1/messages/batches":
+            return self._send(self._create_anthropic_batch(json.loads(self._body())))
+        if path.endswith("/cancel"):
+            batch = self.state.batches.get(path.split("/")[-2])
+            if batch is None:
+                return self._send({"error": "not found"}, 404)
+            batch["cancelled"] = not self._ready(batch)
+            return self._send(self._render(batch))
+        self._send({"error": f"unknown path {path}"}, 404)
+
+    def do_GET(self) -> None:
+        path = self.path.split("?")[0]
+        parts = path.strip("/").split("/")
+        if path.startswith("/v1/files/") and path.endswith("/content"):
+            content = self.state.files.get(parts[2])
+            if content is None:
+                return self._send({"error": "not found"}, 404)
+            return self._send(content, raw=True)
+        if path.endswith("/results"):
+            batch = self.state.batches.get(parts[-2])
+            if batch is None:
+                return self._send({"error": "not found"}, 404)
+            if batch["cancelled"]:
+                canceled = [
+                    {"custom_id": custom_id, "result": {"type": "canceled"}}
+                    for custom_id in batch["custom_ids"]
+                ]
+                return self._send(_jsonl(canceled), raw=True)
+            return self._send(batch["results"], raw=True)
+        batch = self.state.batches.get(parts[-1])
+        if batch is None:
+            return self._send({"error": "not found"}, 404)
+        self._send(self._render(batch))
+
+    def _create_file(self) -> Dict[str, Any]:
+        header = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+        message = BytesParser(policy=HTTP).parsebytes(header + self._body())
+        content = b""
+        for part in message.iter_parts():
+            if part.get_param("name", header="content-disposition") == "file":
+                content = part.get_payload(decode=True)
+        file_id = f"file-{uuid.uuid4().hex}"
+        with self.state.lock:
+            self.state.files[file_id] = content
+        return self._file_object(file_id, "batch", len(content))
+
+    @staticmethod
+    def _file_object(file_id: str, purpose: str, size: int) -> Dict[str, Any]:
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": size,
+            "created_at": int(time.time()),
+            "filename": f"{file_id}.jsonl",
+            "purpose": purpose,
+            "status": "processed",
+        }
+
+    def _create_openai_batch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        lines = self.state.files[request["input_file_id"]].decode().splitlines()
+        output = []
+        for line in filter(None, (raw.strip() for raw in lines)):
+            entry = json.loads(line)
+            body = entry["body"]
+            schema = body["response_format"]["json_schema"]["schema"]
+            prompt = body["messages"][0]["content"]
+            answer = self.state.responder(schema, prompt)
+            completion = {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {
+                            "role": "assistant",
+                            "content": json.dumps(answer),
+                        },
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": len(prompt.split()),
+                    "completion_tokens": len(json.dumps(answer).split()),
+                    "total_tokens": len(prompt.split())
+                    + len(json.dumps(answer).split()),
+                },
+            }
+            output.append(
+                {
+                    "id": f"batch_req_{uuid.uuid4().hex}",
+                    "custom_id": entry["custom_id"],
+                    "response": {"status_code": 200, "body": completion},
+                    "error": None,
+                }
+            )
+        output_file_id = f"file-{uuid.uuid4().hex}"
+        batch = {
+            "kind": "openai",
+            "id": f"batch_{uuid.uuid4().hex}",
+            "created": time.time(),
+            "request": request,
+            "count": len(output),
+            "output_file_id": output_file_id,
+            "cancelled": False,
+        }
+        with self.state.lock:
+            self.state.files[output_file_id] = _jsonl(output)
+            self.state.batches[batch["id"]] = batch
+        return self._render(batch)
+
+    def _create_anthropic_batch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        results = []
+        for entry in request["requests"]:
+            params = entry["params"]
+            schema = params["tools"][0]["input_schema"]
+            prompt = params["messages"][0]["content"]
+            answer = self.state.responder(schema, prompt)
+            message = {
+                "id": f"msg_{uuid.uuid4().hex}",
+                "type": "message",
+                "role": "assistant",
+                "model": params["model"],
+                "content": [
+                    {
+                        "type": "tool_use",
+                        "id": f"toolu_{uuid.uuid4().hex}",
+                        "name": params["tools"][0]["name"],
+                        "input": answer,
+                    }
+                ],
+                "stop_reason": "tool_use",
+                "stop_sequence": None,
+                "usage": {
+                    "input_tokens": len(prompt.split()),
+                    "output_tokens": len(json.dumps(answer).split()),
+                },
+            }
+            results.append(
+                {
+                    "custom_id": entry["custom_id"],
+                    "result": {"type": "succeeded", "message": message},
+                }
+            )
+        batch = {
+            "kind": "anthropic",
+            "id": f"msgbatch_{uuid.uuid4().hex}",
+            "created": time.time(),
+            "count": len(results),
+            "results": _jsonl(results),
+            "custom_ids": [result["custom_id"] for result in results],
+            "cancelled": False,
+        }
+        with self.state.lock:
+            self.state.batches[batch["id"]] = batch
+        return self._render(batch)
+
+    def _ready(self, batch: Dict[str, Any]) -> bool:
+        return time.time() - batch["created"] >= self.state.processing_time
+
+    def _render(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        ready = self._ready(batch) and not batch["cancelled"]
+        created = int(batch["created"])
+        count = batch["count"]
+        if batch["kind"] == "openai":
+            status = "completed" if ready else "in_progress"
+            if batch["cancelled"]:
+                status = "cancelled"
+            return {
+                "id": batch["id"],
+                "object": "batch",
+                "endpoint": batch["request"]["endpoint"],
+                "input_file_id": batch["request"]["input_file_id"],
+                "completion_window": batch["request"]["completion_window"],
+                "status": status,
+                "created_at": created,
+                "output_file_id": batch["output_file_id"] if ready else None,
+                "error_file_id": None,
+                "request_counts": {
+                    "total": count,
+                    "completed": count if ready else 0,
+                    "failed": 0,
+                },
+            }
+
+        ended = ready or batch["cancelled"]
+        return {
+            "id": batch["id"],
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "created_at": _iso(created),
+            "expires_at": _iso(created + 86400),
+            "ended_at": _iso(int(time.time())) if ended else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": (
+                f"{_base_url(self)}/v1/messages/batches/{batch['id']}/results"
+                if ended
+                else None
+            ),
+            "request_counts": {
+                "processing": 0 if ended else count,
+                "succeeded": count if ready else 0,
+                "errored": 0,
+                "canceled": count if batch["cancelled"] else 0,
+                "expired": 0,
+            },
+        }
+
+
+def _jsonl(entries: List[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(entry) + "\n" for entry in entries).encode()
+
+
+def _iso(timestamp: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+def _base_url(handler: BaseHTTPRequestHandler) -> str:
+    host, port = handler.server.server_address[:2]
+    return f"http://{host}:{port}"
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from openai.types.chat import ChatCompletion
+
+from ..core.enums import StructuredOutputProvider
+from ..core.schema import CompiledSchema
+from ..core.types import StructuredResponse
+from ..providers.openai import OpenAIClient
+from .base import BaseBatchJobClient, BatchJob
+
+ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+class OpenAIBatchJobClient(BaseBatchJobClient):
+    """Structured output through the OpenAI Batch API."""
+
+    provider = StructuredOutputProvider.OPENAI
+    client: OpenAIClient
+
+    def __init__(self, client: Optional[OpenAIClient] = None, **kwargs: Any) -> None:
+        super().__init__(client or OpenAIClient(), **kwargs)
+
+    def request_line(
+        self, custom_id: str, prompt: str, compiled: CompiledSchema, **kwargs: Any
+    ) -> Dict[str, Any]:
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": ENDPOINT,
+            "body": self.client.request_body(prompt, compiled, **kwargs),
+        }
+
+    def prompt_of(self, line: Dict[str, Any]) -> str:
+        # Last: a prompt prefix puts its system text and examples first
+        return line["body"]["messages"][-1]["content"]
+
+    def _to_job(self, batch: Any, spool_path: str) -> BatchJob:
+        return BatchJob(
+            id=batch.id,
+            provider=self.provider,
+            model=self.client.model_name,
+            status=batch.status,
+            done=batch.status in TERMINAL_STATUSES,
+            spool_path=spool_path,
+            request_count=batch.request_counts.total if batch.request_counts else 0,
+            metadata={
+                "output_file_id": batch.output_file_id,
+                "error_file_id": batch.error_file_id,
+            },
+        )
+
+    async def _submit(self, spool_path: Path, request_count: int) -> BatchJob:
+        input_file = await self.client.client.files.create(
+            file=spool_path, purpose="batch"
+        )
+        batch = await self.client.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=ENDPOINT,
+            completion_window=COMPLETION_WINDOW,
+        )
+        job = self._to_job(batch, str(spool_path))
+        return job.model_copy(update={"request_count": request_count})
+
+    async def refresh(self, job: BatchJob) -> BatchJob:
+        batch = await self.client.client.batches.retrieve(job.id)
+        return self._to_job(batch, job.spool_path)
+
+    async def cancel(self, job: BatchJob) -> BatchJob:
+        batch = await self.client.client.batches.cancel(job.id)
+        return self._to_job(batch, job.spool_path)
+
+    async def _fetch_results(self, job: BatchJob) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        for key in ("error_file_id", "output_file_id"):
+            file_id = job.metadata.get(key)
+            if not file_id:
+                continue
+            content = await self.client.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    results[entry["custom_id"]] = entry
+        return results
+
+    def _to_response(
+        self, result: Dict[str, Any], compiled: CompiledSchema
+    ) -> StructuredResponse:
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            raise RuntimeError(result.get("error") or response.get("body"))
+        completion = ChatCompletion.model_validate(response["body"])
+        return StructuredResponse(
+            content=self.client.parse_completion(completion, compiled),
+            usage=self.client.format_usage(completion.usage),
+            provider=self.provider,
+            metadata={"model": completion.model, "batch_request_id": result["id"]},
+        )
@@ -0,0 +1,107 @@
+"""
+Process-wide pool of provider clients.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import weakref
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .base import BaseStructuredClient
+
+ClientFactory = Callable[..., BaseStructuredClient]
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class ClientPool:
+    """
+    Reuses one client per event loop, provider, model, credentials and
+    transport settings.
+
+    Each pooled client owns a long-lived HTTP connection pool, so repeated
+    ``create_structured_client`` calls stop paying TCP/TLS setup. Connections
+    belong to the event loop that opened them, so every running loop gets its
+    own clients, dropped once the loop is closed; ``aclose`` the pool before a
+    long-running loop shuts down to close them cleanly. Outside a running
+    loop the client's loop is unknown and ``get`` returns an unpooled client.
+    """
+
+    def __init__(self) -> None:
+        self._clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, Dict[str, BaseStructuredClient]
+        ] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(provider: str, kwargs: Dict[str, Any]) -> str:
+        material = dict(kwargs)
+        if material.get("api_key"):
+            secret = str(material["api_key"]).encode()
+            material["api_key"] = hashlib.sha256(secret).hexdigest()
+        return json.dumps([provider, material], sort_keys=True, default=repr)
+
+    def get(
+        self,
+        provider: str,
+        factory: ClientFactory,
+        **kwargs: Any,
+    ) -> BaseStructuredClient:
+        loop = _running_loop()
+        if loop is None:
+            return factory(**kwargs)
+        key = self.key(provider, kwargs)
+        with self._lock:
+            self._drop_closed()
+            clients = self._clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None:
+                client = clients[key] = factory(**kwargs)
+            return client
+
+    def _drop_closed(self) -> None:
+        for loop in [loop for loop in self._clients if loop.is_closed()]:
+            del self._clients[loop]
+
+    @property
+    def clients(self) -> List[BaseStructuredClient]:
+        """The running loop's clients (every open loop's outside a loop)."""
+        loop = _running_loop()
+        with self._lock:
+            self._drop_closed()
+            if loop is not None:
+                return list(self._clients.get(loop, {}).values())
+            return [
+                client
+                for by_key in self._clients.values()
+                for client in by_key.values()
+            ]
+
+    async def warmup(self, schemas: Iterable[Any] = ()) -> None:
+        """
+        Precompiles ``schemas`` for and opens connections on every client of
+        the running loop.
+        """
+        schemas = list(schemas)
+        await asyncio.gather(*(client.warmup(schemas) for client in self.clients))
+
+    async def aclose(self) -> None:
+        """Closes the running loop's clients and removes them from the pool."""
+        with self._lock:
+            clients = self._clients.pop(asyncio.get_running_loop(), {})
+        await asyncio.gather(*(client.aclose() for client in clients.values()))
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+
+client_pool = ClientPool()
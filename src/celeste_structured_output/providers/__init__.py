@@ -1,5 +1,84 @@
 """
 StructuredOutputProvider providers for format translation.
+
+Provider modules (and their SDKs) are only imported when a client for that
+provider is first created. Third-party packages can add providers through
+the ``celeste_structured_output.providers`` entry-point group, e.g.::
+
+    [project.entry-points."celeste_structured_output.providers"]
+    my_provider = "my_package.client:MyStructuredClient"
 """
 
-__all__: list[str] = []
+from __future__ import annotations
+
+import threading
+from importlib import import_module
+from typing import TYPE_CHECKING, Dict, List, Union
+
+if TYPE_CHECKING:
+    from ..base import BaseStructuredClient
+
+ENTRY_POINT_GROUP = "celeste_structured_output.providers"
+
+ProviderTarget = Union[str, "type[BaseStructuredClient]"]
+
+_BUILTIN_PROVIDERS: Dict[str, str] = {
+    "google": f"{__name__}.google:GoogleStructuredClient",
+    "openai": f"{__name__}.openai:OpenAIClient",
+    "huggingface": f"{__name__}.huggingface:HuggingFaceStructuredClient",
+    "mistral": f"{__name__}.mistral:MistralStructuredClient",
+    "anthropic": f"{__name__}.anthropic:AnthropicStructuredClient",
+    "ollama": f"{__name__}.ollama:OllamaStructuredClient",
+}
+
+
+class ProviderRegistry:
+    """Maps provider names to client classes given as ``"module:Class"`` paths."""
+
+    def __init__(self) -> None:
+        self._targets: Dict[str, ProviderTarget] = dict(_BUILTIN_PROVIDERS)
+        self._entry_points_loaded = False
+        self._lock = threading.Lock()
+
+    def register(self, name: str, target: ProviderTarget) -> None:
+        """Adds or replaces the client class (or its import path) for ``name``."""
+        with self._lock:
+            self._targets[name] = target
+
+    def names(self) -> List[str]:
+        self._load_entry_points()
+        return sorted(self._targets)
+
+    def resolve(self, name: str) -> type[BaseStructuredClient]:
+        """Returns the client class for ``name``, importing it on first use."""
+        if name not in self._targets:
+            self._load_entry_points()
+        target = self._targets.get(name)
+        if target is None:
+            raise ValueError(f"StructuredOutputProvider {name} not implemented")
+        if isinstance(target, str):
+            module_name, _, attribute = target.partition(":")
+            target = getattr(import_module(module_name), attribute)
+            with self._lock:
+                self._targets[name] = target
+        return target
+
+    def _load_entry_points(self) -> None:
+        if self._entry_points_loaded:
+            return
+        from importlib.metadata import entry_points
+
+        with self._lock:
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                self._targets.setdefault(entry_point.name, entry_point.value)
+            self._entry_points_loaded = True
+
+
+provider_registry = ProviderRegistry()
+
+
+def register_provider(name: str, target: ProviderTarget) -> None:
+    provider_registry.register(name, target)
+
+
+__all__ = ["ProviderRegistry", "provider_registry", "register_provider"]
@@ -1,111 +1,265 @@
 from __future__ import annotations
 
-from typing import Any, AsyncIterator, Optional
+import copy
+import functools
+from typing import (
+    Annotated,
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from anthropic import AsyncAnthropic
-from anthropic.types import MessageParam
-from pydantic import BaseModel
+from anthropic.types import MessageParam, Usage
+from pydantic import BaseModel, Field, TypeAdapter, create_model
 
 from ..base import BaseStructuredClient
-from ..core.config import ANTHROPIC_API_KEY
+from ..core.config import get_setting
 from ..core.enums import AnthropicStructuredModel as AnthropicModel
 from ..core.enums import StructuredOutputProvider
-from ..core.types import AIUsage, StructuredResponse
+from ..core.http import HTTPConfig
+from ..core.minify import minimized_schema
+from ..core.prefix import PromptPrefix
+from ..core.schema import CompiledSchema, compile_schema
+from ..core.streaming import StreamAssembler
+from ..core.telemetry import start_span
+from ..core.types import AIUsage, StreamEvent, StructuredResponse
 
 MAX_TOKENS = 1024
+TOOL_NAME = "structured_output"
+
+
+def _build_tool(
+    compiled: CompiledSchema, cache_control: Optional[Dict[str, str]] = None
+) -> list[dict[str, Any]]:
+    tool: Dict[str, Any] = {
+        "name": TOOL_NAME,
+        "description": "Return a JSON object matching the provided schema",
+        "input_schema": minimized_schema(compiled, StructuredOutputProvider.ANTHROPIC),
+    }
+    if cache_control is not None:
+        tool["cache_control"] = cache_control
+    return [tool]
+
+
+def _cache_control(prefix: PromptPrefix) -> Dict[str, str]:
+    return {"type": "ephemeral", "ttl": prefix.ttl}
+
+
+def _build_reply(compiled: CompiledSchema) -> TypeAdapter[Any]:
+    """
+    Validator for a whole Messages API body whose ``tool_use`` input is
+    validated as :attr:`CompiledSchema.response_format` in the same pass, so
+    the body is never decoded into SDK objects first. Other blocks, and a
+    tool call whose input does not validate, are kept as plain dicts.
+    """
+    tool_use = create_model(
+        "ReplyToolUse",
+        type=(Literal["tool_use"], ...),
+        input=(compiled.response_format, ...),
+    )
+    block = Annotated[
+        Union[tool_use, Dict[str, Any]],  # type: ignore[valid-type]
+        Field(union_mode="left_to_right"),
+    ]
+    return TypeAdapter(
+        create_model("Reply", content=(List[block], ...), usage=(Usage, ...))
+    )
 
 
 class AnthropicStructuredClient(BaseStructuredClient):
+    provider = StructuredOutputProvider.ANTHROPIC
+
     def __init__(
         self,
         model: str | AnthropicModel = AnthropicModel.CLAUDE_3_7_SONNET,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        http_config: Optional[HTTPConfig] = None,
+        max_retries: Optional[int] = None,
         **kwargs: Any,
     ) -> None:
         super().__init__(**kwargs)
 
-        self.client = AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
+        self.http_config = http_config or HTTPConfig()
+        # None keeps the SDK's default
+        retry_options = {} if max_retries is None else {"max_retries": max_retries}
+        self.client = AsyncAnthropic(
+            api_key=api_key or get_setting("ANTHROPIC_API_KEY"),
+            base_url=base_url,
+            http_client=self.http_config.async_client(),
+            **retry_options,
+        )
         self.model_name = model.value if isinstance(model, AnthropicModel) else model
 
     def format_usage(self, usage_data: Any) -> Optional[AIUsage]:
         """Convert Anthropic usage data to AIUsage."""
         if not usage_data:
             return None
+        # input_tokens only counts what came after the last cache breakpoint
+        cache_read = usage_data.cache_read_input_tokens or 0
+        cache_write = usage_data.cache_creation_input_tokens or 0
+        input_tokens = usage_data.input_tokens + cache_read + cache_write
         return AIUsage(
-            input_tokens=usage_data.input_tokens,
+            input_tokens=input_tokens,
             output_tokens=usage_data.output_tokens,
-            total_tokens=usage_data.input_tokens + usage_data.output_tokens,
+            total_tokens=input_tokens + usage_data.output_tokens,
+            cache_read_tokens=cache_read,
+            cache_write_tokens=cache_write,
         )
 
-    async def generate_content(
-        self, prompt: str, response_schema: BaseModel, **kwargs: Any
-    ) -> StructuredResponse:
+    def prepare_schema(self, compiled: CompiledSchema) -> None:
+        super().prepare_schema(compiled)
+        compiled.wire_form(StructuredOutputProvider.ANTHROPIC, _build_tool)
+        compiled.wire_form((StructuredOutputProvider.ANTHROPIC, "reply"), _build_reply)
+
+    def without_sdk_retries(self) -> BaseStructuredClient:
+        clone = copy.copy(self)
+        clone.client = self.client.with_options(max_retries=0)
+        return clone
+
+    async def open_connection(self) -> None:
+        await self.client.models.retrieve(self.model_name)
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+    def request_params(
+        self,
+        prompt: str,
+        compiled: CompiledSchema,
+        prefix: Optional[PromptPrefix] = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        """
+        Messages API parameters for ``prompt`` with the cached tool definition.
+
+        The tool is always the one to call, so the tool definitions and
+        ``tool_choice`` stay identical between calls. With a ``prefix``, cache
+        breakpoints are set on the tool, the system block and the last
+        example, each level reusable on its own.
+        """
         max_tokens = kwargs.pop("max_tokens", MAX_TOKENS)
-        tools = [
-            {
-                "name": "structured_output",
-                "description": "Return a JSON object matching the provided schema",
-                "input_schema": response_schema.model_json_schema(),
-            }
-        ]
-
-        response = await self.client.messages.create(
-            max_tokens=max_tokens,
-            messages=[MessageParam(role="user", content=prompt)],
-            model=self.model_name,
-            tools=tools,
-            tool_choice="auto",
+        messages: List[MessageParam] = []
+        params: Dict[str, Any] = {"max_tokens": max_tokens, "model": self.model_name}
+        if prefix is None:
+            tools = compiled.wire_form(StructuredOutputProvider.ANTHROPIC, _build_tool)
+        else:
+            cache_control = _cache_control(prefix)
+            tools = compiled.wire_form(
+                (StructuredOutputProvider.ANTHROPIC, "tool", prefix.ttl),
+                functools.partial(_build_tool, cache_control=cache_control),
+            )
+            if prefix.system:
+                params["system"] = [
+                    {
+                        "type": "text",
+                        "text": prefix.system,
+                        "cache_control": cache_control,
+                    }
+                ]
+            for example_input, example_output in prefix.examples:
+                messages.append(MessageParam(role="user", content=example_input))
+                messages.append(MessageParam(role="assistant", content=example_output))
+            if messages:
+                messages[-1] = MessageParam(
+                    role="assistant",
+                    content=[
+                        {
+                            "type": "text",
+                            "text": prefix.examples[-1][1],
+                            "cache_control": cache_control,
+                        }
+                    ],
+                )
+        messages.append(MessageParam(role="user", content=prompt))
+        return {
+            **params,
+            "messages": messages,
+            "tools": tools,
+            "tool_choice": {"type": "tool", "name": TOOL_NAME},
             **kwargs,
-        )
+        }
 
+    def parse_message(self, message: Any, compiled: CompiledSchema) -> Any:
+        """Validate the ``structured_output`` tool call of a Messages API reply."""
         tool_use = next(
-            (b.input for b in response.content if getattr(b, "type", "") == "tool_use"),
+            (b.input for b in message.content if getattr(b, "type", "") == "tool_use"),
             None,
         )
-        content = response_schema.model_validate(tool_use or {})
+        return compiled.validate_wire(tool_use or {})
 
-        return StructuredResponse(
-            content=content,
-            usage=self.format_usage(response.usage),
-            provider=StructuredOutputProvider.ANTHROPIC,
-            metadata={"model": self.model_name},
-        )
+    def parse_reply(self, body: bytes, compiled: CompiledSchema) -> Tuple[Any, Any]:
+        """Content and usage of a raw Messages API body, validated in one pass."""
+        reply = compiled.wire_form(
+            (StructuredOutputProvider.ANTHROPIC, "reply"), _build_reply
+        ).validate_json(body)
+        for block in reply.content:
+            if not isinstance(block, dict):
+                return compiled.unwrap(block.input), reply.usage
+            if block.get("type") == "tool_use":
+                # Invalid input; validating it again raises the detailed error
+                return compiled.validate_wire(block.get("input") or {}), reply.usage
+        return compiled.validate_wire({}), reply.usage
 
-    async def stream_generate_content(
+    async def generate_content(
         self, prompt: str, response_schema: BaseModel, **kwargs: Any
-    ) -> AsyncIterator[StructuredResponse]:
-        max_tokens = kwargs.pop("max_tokens", MAX_TOKENS)
-        tools = [
-            {
-                "name": "structured_output",
-                "description": "Return a JSON object matching the provided schema",
-                "input_schema": response_schema.model_json_schema(),
-            }
-        ]
-
-        async with self.client.messages.stream(
-            model=self.model_name,
-            max_tokens=max_tokens,
-            messages=[MessageParam(role="user", content=prompt)],
-            tools=tools,
-            tool_choice="auto",
-            **kwargs,
-        ) as stream:
-            snapshot: dict[str, Any] | None = None
-            async for event in stream:
-                if getattr(event, "type", "") == "input_json":
-                    snapshot = event.snapshot
-                    yield StructuredResponse(
-                        content=response_schema.model_validate(snapshot),
-                        provider=StructuredOutputProvider.ANTHROPIC,
-                        metadata={"model": self.model_name, "is_stream_chunk": True},
-                    )
-
-            final_message = await stream.get_final_message()
-            usage = self.format_usage(final_message.usage if final_message else None)
-            if usage:
-                yield StructuredResponse(
-                    content=None,
-                    usage=usage,
+    ) -> StructuredResponse:
+        with start_span(self, "generate_content") as span:
+            compiled = span.timed_compile(compile_schema, response_schema)
+            params = span.timed_compile(self.request_params, prompt, compiled, **kwargs)
+            raw = await self.client.messages.with_raw_response.create(**params)
+            # Validate the raw body once instead of building SDK objects
+            content, usage = span.timed_validation(
+                self.parse_reply, raw.content, compiled
+            )
+
+            return span.annotate(
+                StructuredResponse(
+                    content=content,
+                    usage=self.format_usage(usage),
                     provider=StructuredOutputProvider.ANTHROPIC,
-                    metadata={"model": self.model_name, "is_final_usage": True},
+                    metadata={"model": self.model_name},
+                )
+            )
+
+    async def stream_events(
+        self,
+        prompt: str,
+        response_schema: BaseModel,
+        deltas: bool = False,
+        **kwargs: Any,
+    ) -> AsyncIterator[StreamEvent]:
+        provider, model = StructuredOutputProvider.ANTHROPIC, self.model_name
+        partial_kind = "delta" if deltas else "partial"
+        with start_span(self, "stream_generate_content") as span:
+            compiled = span.timed_compile(compile_schema, response_schema)
+            params = span.timed_compile(self.request_params, prompt, compiled, **kwargs)
+
+            async with self.client.messages.stream(**params) as stream:
+                assembler = StreamAssembler(compiled, wrapped=True, deltas=deltas)
+                async for event in stream:
+                    if getattr(event, "type", "") != "input_json":
+                        continue
+                    span.mark_first_token()
+                    partial = span.timed_validation(assembler.feed, event.partial_json)
+                    if partial is not None:
+                        span.mark_first_partial()
+                        yield StreamEvent(partial_kind, partial, provider, model)
+
+                content = span.timed_validation(assembler.finish)
+                final_message = await stream.get_final_message()
+                usage = self.format_usage(
+                    final_message.usage if final_message else None
                 )
+                span.end(usage.output_tokens if usage else None)
+                if content is not None:
+                    yield span.annotate(StreamEvent("final", content, provider, model))
+
+                if usage:
+                    yield StreamEvent("usage", None, provider, model, usage)
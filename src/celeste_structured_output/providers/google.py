@@ -1,28 +1,76 @@
-from typing import Any, AsyncIterator, Optional
+import asyncio
+import math
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 from pydantic import BaseModel
 
 from ..base import BaseStructuredClient
-from ..core.config import GOOGLE_API_KEY
+from ..core.concurrency import PerLoop
+from ..core.config import get_setting
 from ..core.enums import (
     GoogleStructuredModel as GoogleModel,
 )
 from ..core.enums import (
     StructuredOutputProvider,
 )
-from ..core.types import AIUsage, StructuredResponse
+from ..core.http import HTTPConfig
+from ..core.minify import minimized_schema
+from ..core.prefix import PromptPrefix
+from ..core.schema import compile_schema
+from ..core.streaming import StreamAssembler
+from ..core.telemetry import start_span
+from ..core.types import AIUsage, StreamEvent, StructuredResponse
+
+# Stop using a cached content this long before the server expires it
+CACHE_EXPIRY_MARGIN = 30.0
+# Seconds before retrying a cached content that failed for a passing reason
+# (rate limits, credentials, server errors); the prefix is sent inline meanwhile
+CACHE_RETRY_DELAY = 60.0
+# The prefix is below the model's minimum cacheable size, or the model cannot
+# cache at all: no point in asking again
+_UNCACHEABLE_CODES = frozenset({400, 404})
+
+
+def _example_contents(prefix: PromptPrefix) -> List[types.Content]:
+    contents = []
+    for example_input, example_output in prefix.examples:
+        contents.append(
+            types.Content(role="user", parts=[types.Part(text=example_input)])
+        )
+        contents.append(
+            types.Content(role="model", parts=[types.Part(text=example_output)])
+        )
+    return contents
 
 
 class GoogleStructuredClient(BaseStructuredClient):
+    provider = StructuredOutputProvider.GOOGLE
+
     def __init__(
-        self, model: str | GoogleModel = GoogleModel.FLASH_LITE, **kwargs: Any
+        self,
+        model: str | GoogleModel = GoogleModel.FLASH_LITE,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        http_config: Optional[HTTPConfig] = None,
+        **kwargs: Any,
     ) -> None:
         super().__init__(**kwargs)  # type: ignore[misc, safe-super]
 
-        self.client = genai.Client(api_key=GOOGLE_API_KEY)
+        self.http_config = http_config or HTTPConfig()
+        self._http_client = self.http_config.async_client()
+        self.client = genai.Client(
+            api_key=api_key or get_setting("GOOGLE_API_KEY"),
+            http_options=types.HttpOptions(
+                base_url=base_url, httpx_async_client=self._http_client
+            ),
+        )
         self.model_name = model.value if isinstance(model, GoogleModel) else model
+        # Prefix digest -> (cached content name or None if uncacheable, expiry)
+        self._cached_contents: Dict[str, Tuple[Optional[str], float]] = {}
+        self._cache_lock = PerLoop(asyncio.Lock)
 
     def format_usage(self, usage_data: Any) -> Optional[AIUsage]:
         """Convert Gemini usage data to AIUsage."""
@@ -32,71 +80,168 @@ class GoogleStructuredClient(BaseStructuredClient):
             input_tokens=getattr(usage_data, "prompt_token_count", 0),
             output_tokens=getattr(usage_data, "candidates_token_count", 0),
             total_tokens=getattr(usage_data, "total_token_count", 0),
+            cache_read_tokens=getattr(usage_data, "cached_content_token_count", 0) or 0,
         )
 
+    async def open_connection(self) -> None:
+        await self.client.aio.models.get(model=self.model_name)
+
+    async def cached_content(self, prefix: PromptPrefix) -> Optional[str]:
+        """
+        Name of a cached content holding ``prefix``, created on first use and
+        again once it expires; None when the model cannot cache it (e.g. it
+        is below the minimum cacheable size), or for ``CACHE_RETRY_DELAY``
+        seconds after creating it failed otherwise.
+        """
+        key = prefix.cache_key()
+        entry = self._cached_contents.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            async with self._cache_lock.get():
+                entry = self._cached_contents.get(key)
+                if entry is None or entry[1] <= time.monotonic():
+                    entry = await self._create_cached_content(prefix)
+                    self._cached_contents[key] = entry
+        return entry[0]
+
+    async def _create_cached_content(
+        self, prefix: PromptPrefix
+    ) -> Tuple[Optional[str], float]:
+        config = types.CreateCachedContentConfig(
+            system_instruction=prefix.system,
+            contents=_example_contents(prefix) or None,
+            ttl=f"{prefix.ttl_seconds}s",
+        )
+        try:
+            cached = await self.client.aio.caches.create(
+                model=self.model_name, config=config
+            )
+        except errors.APIError as error:
+            if error.code in _UNCACHEABLE_CODES:
+                return None, math.inf
+            return None, time.monotonic() + CACHE_RETRY_DELAY
+        return cached.name, time.monotonic() + prefix.ttl_seconds - CACHE_EXPIRY_MARGIN
+
+    async def request_contents(
+        self, prompt: str, prefix: Optional[PromptPrefix], config: Dict[str, Any]
+    ) -> Any:
+        """
+        Contents for ``prompt``; a ``prefix`` is referenced from its cached
+        content through ``config``, or sent inline when it cannot be cached.
+        """
+        if prefix is None:
+            return prompt
+        name = await self.cached_content(prefix)
+        if name is not None:
+            config["cached_content"] = name
+            return prompt
+        if prefix.system:
+            config["system_instruction"] = prefix.system
+        return [
+            *_example_contents(prefix),
+            types.Content(role="user", parts=[types.Part(text=prompt)]),
+        ]
+
+    async def aclose(self) -> None:
+        for name, _ in self._cached_contents.values():
+            if name is not None:
+                try:
+                    await self.client.aio.caches.delete(name=name)
+                except errors.APIError:
+                    pass
+        self._cached_contents.clear()
+        # The SDK leaves closing a client it was given to its owner
+        await self._http_client.aclose()
+
     async def generate_content(
         self, prompt: str, response_schema: BaseModel, **kwargs: Any
     ) -> StructuredResponse:
-        config = kwargs.pop("config", {})
-
-        config["response_mime_type"] = "application/json"
-        config["response_schema"] = response_schema
-
-        response = await self.client.aio.models.generate_content(
-            model=self.model_name,
-            contents=prompt,
-            config=types.GenerateContentConfig(**config),
-        )
+        config = dict(kwargs.pop("config", None) or {})
+        prefix = kwargs.pop("prefix", None)
+        with start_span(self, "generate_content") as span:
+            compiled = span.timed_compile(compile_schema, response_schema)
+
+            config["response_mime_type"] = "application/json"
+            config["response_json_schema"] = span.timed_compile(
+                minimized_schema, compiled, StructuredOutputProvider.GOOGLE, False
+            )
 
-        # Extract usage information if available
-        usage = None
-        if hasattr(response, "usage_metadata"):
-            usage = self.format_usage(response.usage_metadata)
+            contents = await self.request_contents(prompt, prefix, config)
+            response = await self.client.aio.models.generate_content(
+                model=self.model_name,
+                contents=contents,
+                config=types.GenerateContentConfig(**config),
+            )
 
-        # Return parsed content if using response_schema, otherwise return text
-        content = response.parsed
+            # Extract usage information if available
+            usage = None
+            if hasattr(response, "usage_metadata"):
+                usage = self.format_usage(response.usage_metadata)
 
-        return StructuredResponse(
-            content=content,
-            usage=usage,
-            provider=StructuredOutputProvider.GOOGLE,
-            metadata={"model": self.model_name},
-        )
+            # Validate the raw JSON once against the cached schema validator
+            content = None
+            if response.text:
+                content = span.timed_validation(compiled.validate_json, response.text)
 
-    async def stream_generate_content(  # type: ignore[override, misc]
-        self, prompt: str, response_schema: BaseModel, **kwargs: Any
-    ) -> AsyncIterator[StructuredResponse]:
-        config = kwargs.pop("config", {})
-
-        config["response_mime_type"] = "application/json"
-        config["response_schema"] = response_schema
-
-        last_usage_metadata = None
-        has_yielded_content = False
-
-        async for chunk in self.client.aio.models.generate_content_stream(
-            model=self.model_name,
-            contents=prompt,
-            config=types.GenerateContentConfig(**config),
-        ):
-            # Track usage metadata
-            if hasattr(chunk, "usage_metadata") and chunk.usage_metadata:
-                last_usage_metadata = chunk.usage_metadata
-
-            # When using structured output, Google returns the parsed object directly
-            if hasattr(chunk, "parsed") and chunk.parsed:
-                has_yielded_content = True
-                yield StructuredResponse(
-                    content=chunk.parsed,
+            return span.annotate(
+                StructuredResponse(
+                    content=content,
+                    usage=usage,
                     provider=StructuredOutputProvider.GOOGLE,
-                    metadata={"model": self.model_name, "is_stream_chunk": True},
+                    metadata={"model": self.model_name},
                 )
+            )
 
-        # Yield final usage information if we have it and content was streamed
-        if last_usage_metadata and has_yielded_content:
-            yield StructuredResponse(
-                content=None,  # No content in final usage response
-                usage=self.format_usage(last_usage_metadata),
-                provider=StructuredOutputProvider.GOOGLE,
-                metadata={"model": self.model_name, "is_final_usage": True},
+    async def stream_events(  # type: ignore[override, misc]
+        self,
+        prompt: str,
+        response_schema: BaseModel,
+        deltas: bool = False,
+        **kwargs: Any,
+    ) -> AsyncIterator[StreamEvent]:
+        provider, model = StructuredOutputProvider.GOOGLE, self.model_name
+        partial_kind = "delta" if deltas else "partial"
+        config = dict(kwargs.pop("config", None) or {})
+        prefix = kwargs.pop("prefix", None)
+        with start_span(self, "stream_generate_content") as span:
+            compiled = span.timed_compile(compile_schema, response_schema)
+
+            config["response_mime_type"] = "application/json"
+            config["response_json_schema"] = span.timed_compile(
+                minimized_schema, compiled, StructuredOutputProvider.GOOGLE, False
             )
+
+            assembler = StreamAssembler(compiled, deltas=deltas)
+            last_usage_metadata = None
+            has_yielded_content = False
+
+            contents = await self.request_contents(prompt, prefix, config)
+            stream = await self.client.aio.models.generate_content_stream(
+                model=self.model_name,
+                contents=contents,
+                config=types.GenerateContentConfig(**config),
+            )
+            async for chunk in stream:
+                # Track usage metadata
+                if hasattr(chunk, "usage_metadata") and chunk.usage_metadata:
+                    last_usage_metadata = chunk.usage_metadata
+
+                # Feed the raw JSON text; fields and list items surface as they complete
+                if not chunk.text:
+                    continue
+                span.mark_first_token()
+                partial = span.timed_validation(assembler.feed, chunk.text)
+                if partial is not None:
+                    span.mark_first_partial()
+                    has_yielded_content = True
+                    yield StreamEvent(partial_kind, partial, provider, model)
+
+            content = span.timed_validation(assembler.finish)
+            usage = self.format_usage(last_usage_metadata)
+            span.end(usage.output_tokens if usage else None)
+            if content is not None:
+                has_yielded_content = True
+                yield span.annotate(StreamEvent("final", content, provider, model))
+
+            # Yield final usage information if we have it and content was streamed
+            if usage and has_yielded_content:
+                yield StreamEvent("usage", None, provider, model, usage)
@@ -1,25 +1,46 @@
 from __future__ import annotations
 
-import asyncio
-import json
-from typing import Any, AsyncIterator, Optional, get_args, get_origin
+from typing import Any, AsyncIterator, Optional
 
-from huggingface_hub import InferenceClient
+from huggingface_hub import AsyncInferenceClient, get_async_session
 from pydantic import BaseModel
 
 from ..base import BaseStructuredClient
-from ..core.config import HUGGINGFACE_TOKEN
+from ..core.config import get_setting
 from ..core.enums import HuggingFaceModel, StructuredOutputProvider
-from ..core.types import AIUsage, StructuredResponse
+from ..core.http import HTTPConfig
+from ..core.prefix import chat_messages
+from ..core.schema import compile_schema
+from ..core.streaming import StreamAssembler
+from ..core.telemetry import start_span
+from ..core.types import AIUsage, StreamEvent, StructuredResponse
 
 
 class HuggingFaceStructuredClient(BaseStructuredClient):
+    provider = StructuredOutputProvider.HUGGINGFACE
+
     def __init__(
-        self, model: str | HuggingFaceModel = HuggingFaceModel.GEMMA_2_2B, **kwargs: Any
+        self,
+        model: str | HuggingFaceModel = HuggingFaceModel.GEMMA_2_2B,
+        api_key: Optional[str] = None,
+        http_config: Optional[HTTPConfig] = None,
+        **kwargs: Any,
     ) -> None:
         super().__init__(**kwargs)  # type: ignore[misc, safe-super]
         self.model_name = model.value if isinstance(model, HuggingFaceModel) else model
-        self.client = InferenceClient(model=self.model_name, token=HUGGINGFACE_TOKEN)
+        self.http_config = http_config or HTTPConfig()
+        self.client = AsyncInferenceClient(
+            model=self.model_name,
+            token=api_key or get_setting("HUGGINGFACE_TOKEN"),
+            timeout=self.http_config.timeout,
+        )
+        if self.http_config.cassette is not None:
+            # AsyncInferenceClient opens its own httpx session on first use and
+            # takes no client or transport argument (as of huggingface-hub
+            # 1.x), so it is handed one routed through the cassette instead
+            session = self.http_config.cassette.wrap(get_async_session())
+            self.client._async_client = session
+            self.client.exit_stack.push_async_callback(session.aclose)
 
     def format_usage(self, usage_data: Any) -> Optional[AIUsage]:
         """Convert HuggingFace usage data to AIUsage."""
@@ -31,58 +52,63 @@ class HuggingFaceStructuredClient(BaseStructuredClient):
             total_tokens=getattr(usage_data, "total_tokens", 0),
         )
 
-    def _parse_content(self, data: Any, schema: BaseModel) -> Any:
-        if get_origin(schema) is list:
-            model = get_args(schema)[0]
-            return [model.model_validate(item) for item in data]
-        return schema.model_validate(data)
+    async def aclose(self) -> None:
+        await self.client.close()
 
     async def generate_content(
         self, prompt: str, response_schema: BaseModel, **kwargs: Any
     ) -> StructuredResponse:
-        messages = [{"role": "user", "content": prompt}]
+        messages = chat_messages(prompt, kwargs.pop("prefix", None))
         kwargs.setdefault("response_format", {"type": "json_object"})
-        response = await asyncio.to_thread(
-            self.client.chat_completion, messages=messages, **kwargs
-        )
-        usage = self.format_usage(getattr(response, "usage", None))
-        data = json.loads(response.choices[0].message.content)
-        content = self._parse_content(data, response_schema)
-        return StructuredResponse(
-            content=content,
-            usage=usage,
-            provider=StructuredOutputProvider.HUGGINGFACE,
-            metadata={"model": self.model_name},
-        )
+        with start_span(self, "generate_content") as span:
+            compiled = span.timed_compile(compile_schema, response_schema)
+            response = await self.client.chat_completion(messages=messages, **kwargs)
+            usage = self.format_usage(getattr(response, "usage", None))
+            content = None
+            if response.choices and response.choices[0].message.content:
+                content = span.timed_validation(
+                    compiled.validate_json, response.choices[0].message.content
+                )
+            return span.annotate(
+                StructuredResponse(
+                    content=content,
+                    usage=usage,
+                    provider=StructuredOutputProvider.HUGGINGFACE,
+                    metadata={"model": self.model_name},
+                )
+            )
 
-    async def stream_generate_content(  # type: ignore[override, misc]
-        self, prompt: str, response_schema: BaseModel, **kwargs: Any
-    ) -> AsyncIterator[StructuredResponse]:
-        messages = [{"role": "user", "content": prompt}]
+    async def stream_events(  # type: ignore[override, misc]
+        self,
+        prompt: str,
+        response_schema: BaseModel,
+        deltas: bool = False,
+        **kwargs: Any,
+    ) -> AsyncIterator[StreamEvent]:
+        provider, model = StructuredOutputProvider.HUGGINGFACE, self.model_name
+        partial_kind = "delta" if deltas else "partial"
+        messages = chat_messages(prompt, kwargs.pop("prefix", None))
         kwargs.setdefault("response_format", {"type": "json_object"})
         kwargs["stream"] = True
-        stream = await asyncio.to_thread(
-            self.client.chat_completion, messages=messages, **kwargs
-        )
-        buffer = ""
-        usage_data = None
-        for chunk in stream:
-            if chunk.choices and chunk.choices[0].delta.content:
-                buffer += chunk.choices[0].delta.content
-            if hasattr(chunk, "usage") and chunk.usage:
-                usage_data = self.format_usage(chunk.usage)
-        if buffer:
-            data = json.loads(buffer)
-            content = self._parse_content(data, response_schema)
-            yield StructuredResponse(
-                content=content,
-                provider=StructuredOutputProvider.HUGGINGFACE,
-                metadata={"model": self.model_name, "is_stream_chunk": True},
-            )
-        if usage_data:
-            yield StructuredResponse(
-                content=None,
-                usage=usage_data,
-                provider=StructuredOutputProvider.HUGGINGFACE,
-                metadata={"model": self.model_name, "is_final_usage": True},
-            )
+        with start_span(self, "stream_generate_content") as span:
+            compiled = span.timed_compile(compile_schema, response_schema)
+            stream = await self.client.chat_completion(messages=messages, **kwargs)
+            assembler = StreamAssembler(compiled, deltas=deltas)
+            usage_data = None
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    span.mark_first_token()
+                    partial = span.timed_validation(
+                        assembler.feed, chunk.choices[0].delta.content
+                    )
+                    if partial is not None:
+                        span.mark_first_partial()
+                        yield StreamEvent(partial_kind, partial, provider, model)
+                if hasattr(chunk, "usage") and chunk.usage:
+                    usage_data = self.format_usage(chunk.usage)
+            content = span.timed_validation(assembler.finish)
+            span.end(usage_data.output_tokens if usage_data else None)
+            if content is not None:
+                yield span.annotate(StreamEvent("final", content, provider, model))
+            if usage_data:
+                yield StreamEvent("usage", None, provider, model, usage_data)
@@ -1,31 +1,112 @@
 from __future__ import annotations
 
-import json
+import copy
 from typing import Any, AsyncIterator, Optional
 
 from mistralai import Mistral
-from mistralai.extra.utils.response_format import pydantic_model_from_json
+from mistralai.models import JSONSchema, ResponseFormat
+from mistralai.utils import BackoffStrategy, RetryConfig
 from pydantic import BaseModel
 
 from ..base import BaseStructuredClient
-from ..core.config import MISTRAL_API_KEY
+from ..core.config import get_setting
 from ..core.enums import (
     MistralStructuredModel as MistralModel,
 )
 from ..core.enums import (
     StructuredOutputProvider,
 )
-from ..core.types import AIUsage, StructuredResponse
+from ..core.http import HTTPConfig
+from ..core.minify import minimized_schema
+from ..core.prefix import chat_messages
+from ..core.schema import CompiledSchema, compile_schema
+from ..core.streaming import StreamAssembler
+from ..core.telemetry import start_span
+from ..core.types import AIUsage, StreamEvent, StructuredResponse
+
+RETRY_INTERVAL_MS = 500
+MAX_RETRY_INTERVAL_MS = 60000
+RETRY_EXPONENT = 1.5
+
+
+def _strict(node: Any) -> Any:
+    """Copy of a JSON schema with ``additionalProperties: false`` on every object."""
+    if isinstance(node, list):
+        return [_strict(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+    strict = {key: _strict(value) for key, value in node.items()}
+    if strict.get("type") == "object":
+        strict["additionalProperties"] = False
+    return strict
+
+
+def _build_response_format(compiled: CompiledSchema) -> Any:
+    # Built here rather than with the SDK's helper, which rejects numeric
+    # defaults and constraints
+    schema = minimized_schema(compiled, StructuredOutputProvider.MISTRAL)
+    json_schema = JSONSchema.model_validate(
+        {
+            "name": compiled.response_format.__name__,
+            "schema": _strict(schema),
+            "strict": True,
+        }
+    )
+    return ResponseFormat(type="json_schema", json_schema=json_schema)
 
 
 class MistralStructuredClient(BaseStructuredClient):
+    provider = StructuredOutputProvider.MISTRAL
+
     def __init__(
-        self, model: str | MistralModel = MistralModel.SMALL_LATEST, **kwargs: Any
+        self,
+        model: str | MistralModel = MistralModel.SMALL_LATEST,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        http_config: Optional[HTTPConfig] = None,
+        max_retries: Optional[int] = None,
+        **kwargs: Any,
     ) -> None:
         super().__init__(**kwargs)
-        self.client = Mistral(api_key=MISTRAL_API_KEY)
+        self.http_config = http_config or HTTPConfig()
+        self._http_client = self.http_config.async_client()
+        self._api_key = api_key or get_setting("MISTRAL_API_KEY")
+        self._base_url = base_url
+        self.max_retries = max_retries or 0
+        self.client = self._sdk_client(self.max_retries)
         self.model_name = model.value if isinstance(model, MistralModel) else model
 
+    def _sdk_client(self, max_retries: int) -> Mistral:
+        # The SDK only retries when given a retry config, and bounds retries
+        # by elapsed time: allow about ``max_retries`` back-off intervals
+        retry_config = None
+        if max_retries:
+            elapsed = sum(
+                int(RETRY_INTERVAL_MS * RETRY_EXPONENT**attempt)
+                for attempt in range(max_retries)
+            )
+            retry_config = RetryConfig(
+                "backoff",
+                BackoffStrategy(
+                    RETRY_INTERVAL_MS, MAX_RETRY_INTERVAL_MS, RETRY_EXPONENT, elapsed
+                ),
+                False,
+            )
+        return Mistral(
+            api_key=self._api_key,
+            server_url=self._base_url,
+            async_client=self._http_client,
+            retry_config=retry_config,
+        )
+
+    def without_sdk_retries(self) -> BaseStructuredClient:
+        if not self.max_retries:
+            return self
+        clone = copy.copy(self)
+        clone.max_retries = 0
+        clone.client = self._sdk_client(0)
+        return clone
+
     def format_usage(self, usage_data: Any) -> Optional[AIUsage]:
         """Convert Mistral usage data to AIUsage."""
         if not usage_data:
@@ -36,61 +117,93 @@ class MistralStructuredClient(BaseStructuredClient):
             total_tokens=getattr(usage_data, "total_tokens", 0),
         )
 
+    def prepare_schema(self, compiled: CompiledSchema) -> None:
+        super().prepare_schema(compiled)
+        compiled.wire_form(StructuredOutputProvider.MISTRAL, _build_response_format)
+
+    async def open_connection(self) -> None:
+        await self.client.models.retrieve_async(model_id=self.model_name)
+
+    async def aclose(self) -> None:
+        await self._http_client.aclose()
+
     async def generate_content(
         self, prompt: str, response_schema: type[BaseModel], **kwargs: Any
     ) -> StructuredResponse:
-        response = await self.client.chat.parse_async(
-            response_format=response_schema,
-            model=self.model_name,
-            messages=[{"role": "user", "content": prompt}],
-            **kwargs,
-        )
-
-        usage = self.format_usage(getattr(response, "usage", None))
-        content = None
-        if response.choices and response.choices[0].message:
-            content = response.choices[0].message.parsed
+        prefix = kwargs.pop("prefix", None)
+        with start_span(self, "generate_content") as span:
+            compiled = span.timed_compile(compile_schema, response_schema)
+            response_format = span.timed_compile(
+                compiled.wire_form,
+                StructuredOutputProvider.MISTRAL,
+                _build_response_format,
+            )
+            response = await self.client.chat.complete_async(
+                response_format=response_format,
+                model=self.model_name,
+                messages=chat_messages(prompt, prefix),
+                **kwargs,
+            )
 
-        return StructuredResponse(
-            content=content,
-            usage=usage,
-            provider=StructuredOutputProvider.MISTRAL,
-            metadata={"model": self.model_name},
-        )
+            usage = self.format_usage(getattr(response, "usage", None))
+            content = None
+            if response.choices and response.choices[0].message.content:
+                content = span.timed_validation(
+                    compiled.validate_wire_json, response.choices[0].message.content
+                )
 
-    async def stream_generate_content(
-        self, prompt: str, response_schema: type[BaseModel], **kwargs: Any
-    ) -> AsyncIterator[StructuredResponse]:
-        stream = await self.client.chat.parse_stream_async(
-            response_format=response_schema,
-            model=self.model_name,
-            messages=[{"role": "user", "content": prompt}],
-            **kwargs,
-        )
+            return span.annotate(
+                StructuredResponse(
+                    content=content,
+                    usage=usage,
+                    provider=StructuredOutputProvider.MISTRAL,
+                    metadata={"model": self.model_name},
+                )
+            )
 
-        buffer = ""
-        usage_data = None
-        async for chunk in stream:
-            if chunk.data.choices and chunk.data.choices[0].delta.content:
-                buffer += chunk.data.choices[0].delta.content
-            if chunk.data.usage:
-                usage_data = chunk.data.usage
-
-        if buffer:
-            content = pydantic_model_from_json(
-                json.loads(buffer),
-                response_schema,
+    async def stream_events(
+        self,
+        prompt: str,
+        response_schema: type[BaseModel],
+        deltas: bool = False,
+        **kwargs: Any,
+    ) -> AsyncIterator[StreamEvent]:
+        provider, model = StructuredOutputProvider.MISTRAL, self.model_name
+        partial_kind = "delta" if deltas else "partial"
+        prefix = kwargs.pop("prefix", None)
+        with start_span(self, "stream_generate_content") as span:
+            compiled = span.timed_compile(compile_schema, response_schema)
+            response_format = span.timed_compile(
+                compiled.wire_form,
+                StructuredOutputProvider.MISTRAL,
+                _build_response_format,
             )
-            yield StructuredResponse(
-                content=content,
-                provider=StructuredOutputProvider.MISTRAL,
-                metadata={"model": self.model_name, "is_stream_chunk": True},
+            stream = await self.client.chat.stream_async(
+                response_format=response_format,
+                model=self.model_name,
+                messages=chat_messages(prompt, prefix),
+                **kwargs,
             )
 
-        if usage_data:
-            yield StructuredResponse(
-                content=None,
-                usage=self.format_usage(usage_data),
-                provider=StructuredOutputProvider.MISTRAL,
-                metadata={"model": self.model_name, "is_final_usage": True},
-            )
+            assembler = StreamAssembler(compiled, wrapped=True, deltas=deltas)
+            usage_data = None
+            async for chunk in stream:
+                if chunk.data.choices and chunk.data.choices[0].delta.content:
+                    span.mark_first_token()
+                    partial = span.timed_validation(
+                        assembler.feed, chunk.data.choices[0].delta.content
+                    )
+                    if partial is not None:
+                        span.mark_first_partial()
+                        yield StreamEvent(partial_kind, partial, provider, model)
+                if chunk.data.usage:
+                    usage_data = chunk.data.usage
+
+            content = span.timed_validation(assembler.finish)
+            usage = self.format_usage(usage_data)
+            span.end(usage.output_tokens if usage else None)
+            if content is not None:
+                yield span.annotate(StreamEvent("final", content, provider, model))
+
+            if usage:
+                yield StreamEvent("usage", None, provider, model, usage)
@@ -1,71 +1,163 @@
-from typing import Any, AsyncIterator, Optional
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator, Optional, Union
 
 from ollama import AsyncClient
+from pydantic import BaseModel
 
-from celeste_client.base import BaseStructuredClient
-from celeste_client.core.config import OLLAMA_HOST
-from celeste_client.core.enums import StructuredOutputProvider, OllamaModel
-from celeste_client.core.types import AIResponse, AIUsage
+from ..base import BaseStructuredClient
+from ..core.concurrency import PerLoop
+from ..core.config import get_setting
+from ..core.enums import OllamaStructuredModel as OllamaModel
+from ..core.enums import StructuredOutputProvider
+from ..core.http import HTTPConfig
+from ..core.minify import minimized_schema
+from ..core.prefix import PromptPrefix, chat_messages
+from ..core.schema import compile_schema
+from ..core.streaming import StreamAssembler
+from ..core.telemetry import start_span
+from ..core.types import AIUsage, StreamEvent, StructuredResponse
 
+# Keep the model loaded between calls; Ollama unloads idle models after 5m
+DEFAULT_KEEP_ALIVE = "30m"
+# Matches the server's default OLLAMA_NUM_PARALLEL on most machines
+DEFAULT_LOCAL_CONCURRENCY = 4
 
-class OllamaClient(BaseStructuredClient):
-    def __init__(self, model: str = OllamaModel.LLAMA3_2.value, **kwargs: Any) -> None:
-        super().__init__(**kwargs)
 
-        self.client = AsyncClient(host=OLLAMA_HOST)
-        self.model_name = model
+class OllamaStructuredClient(BaseStructuredClient):
+    """
+    Structured output from a local Ollama server.
+
+    The compiled JSON schema is sent as Ollama's ``format`` so decoding is
+    constrained by the server. At most ``max_concurrency`` requests are sent at
+    once from each event loop; extra calls queue here instead of in the
+    server's own queue, where they would count against its request timeout.
+    """
+
+    provider = StructuredOutputProvider.OLLAMA
+
+    def __init__(
+        self,
+        model: str | OllamaModel = OllamaModel.LLAMA3_2,
+        host: Optional[str] = None,
+        keep_alive: Union[float, str, None] = DEFAULT_KEEP_ALIVE,
+        max_concurrency: int = DEFAULT_LOCAL_CONCURRENCY,
+        http_config: Optional[HTTPConfig] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.model_name = model.value if isinstance(model, OllamaModel) else model
+        self.keep_alive = keep_alive
+        self.max_concurrency = max_concurrency
+        self.http_config = http_config or HTTPConfig(http2=False)
+        self.client = AsyncClient(
+            host=host or get_setting("OLLAMA_HOST"), **self.http_config.client_args()
+        )
+        self._slots = PerLoop(lambda: asyncio.Semaphore(max_concurrency))
 
     def format_usage(self, usage_data: Any) -> Optional[AIUsage]:
         """Convert Ollama usage data to AIUsage."""
-
-        prompt_tokens = usage_data.get("prompt_eval_count", 0)
-        completion_tokens = usage_data.get("eval_count", 0)
+        if not usage_data:
+            return None
+        prompt_tokens = usage_data.get("prompt_eval_count") or 0
+        completion_tokens = usage_data.get("eval_count") or 0
         return AIUsage(
             input_tokens=prompt_tokens,
             output_tokens=completion_tokens,
             total_tokens=prompt_tokens + completion_tokens,
         )
 
-    async def generate_content(self, prompt: str, **kwargs: Any) -> AIResponse:
-        message = {"role": "user", "content": prompt}
-        # Ensure we get usage data by setting stream=False explicitly
-        if "stream" not in kwargs:
-            kwargs["stream"] = False
+    async def preload(self) -> None:
+        """Loads the model into memory without generating anything."""
+        async with self._slots.get():
+            await self.client.generate(
+                model=self.model_name, prompt="", keep_alive=self.keep_alive
+            )
 
-        response = await self.client.chat(
-            model=self.model_name, messages=[message], **kwargs
-        )
+    async def open_connection(self) -> None:
+        await self.preload()
 
-        # Extract usage information if available
-        usage = self.format_usage(response)
+    async def aclose(self) -> None:
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            await close()
 
-        return AIResponse(
-            content=response["message"]["content"],
-            usage=usage,
-            provider=StructuredOutputProvider.OLLAMA,
-            metadata={"model": self.model_name},
-        )
+    def request_params(
+        self,
+        prompt: str,
+        response_schema: Any,
+        prefix: Optional[PromptPrefix] = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        kwargs.setdefault("keep_alive", self.keep_alive)
+        return {
+            "model": self.model_name,
+            # A shared prefix first lets the server reuse its KV cache
+            "messages": chat_messages(prompt, prefix),
+            "format": minimized_schema(
+                compile_schema(response_schema), StructuredOutputProvider.OLLAMA
+            ),
+            **kwargs,
+        }
 
-    async def stream_generate_content(
-        self, prompt: str, **kwargs: Any
-    ) -> AsyncIterator[AIResponse]:
-        message = {"role": "user", "content": prompt}
-        stream = await self.client.chat(
-            model=self.model_name, messages=[message], stream=True, **kwargs
-        )
-        async for chunk in stream:
-            if not chunk.get("done"):
-                yield AIResponse(
-                    content=chunk["message"]["content"],
+    async def generate_content(
+        self, prompt: str, response_schema: type[BaseModel], **kwargs: Any
+    ) -> StructuredResponse:
+        with start_span(self, "generate_content") as span:
+            compiled = span.timed_compile(compile_schema, response_schema)
+            params = span.timed_compile(self.request_params, prompt, compiled, **kwargs)
+            async with self._slots.get():
+                response = await self.client.chat(**params, stream=False)
+
+            content = None
+            if response["message"]["content"]:
+                content = span.timed_validation(
+                    compiled.validate_wire_json, response["message"]["content"]
+                )
+
+            return span.annotate(
+                StructuredResponse(
+                    content=content,
+                    usage=self.format_usage(response),
                     provider=StructuredOutputProvider.OLLAMA,
-                    metadata={"model": self.model_name, "is_stream_chunk": True},
+                    metadata={"model": self.model_name},
                 )
-            else:
-                usage = self.format_usage(chunk)
-                if usage:
-                    yield AIResponse(
-                        content="",
-                        usage=usage,
-                        provider=StructuredOutputProvider.OLLAMA,
-                        metadata={"model": self.model_name, "is_final_usage": True},
-                    )
+            )
+
+    async def stream_events(
+        self,
+        prompt: str,
+        response_schema: type[BaseModel],
+        deltas: bool = False,
+        **kwargs: Any,
+    ) -> AsyncIterator[StreamEvent]:
+        provider, model = StructuredOutputProvider.OLLAMA, self.model_name
+        partial_kind = "delta" if deltas else "partial"
+        with start_span(self, "stream_generate_content") as span:
+            compiled = span.timed_compile(compile_schema, response_schema)
+            params = span.timed_compile(self.request_params, prompt, compiled, **kwargs)
+            assembler = StreamAssembler(compiled, wrapped=True, deltas=deltas)
+            usage_data = None
+            async with self._slots.get():
+                stream = await self.client.chat(**params, stream=True)
+                async for chunk in stream:
+                    delta = chunk["message"]["content"]
+                    if delta:
+                        span.mark_first_token()
+                        partial = span.timed_validation(assembler.feed, delta)
+                        if partial is not None:
+                            span.mark_first_partial()
+                            yield StreamEvent(partial_kind, partial, provider, model)
+                    if chunk.get("done"):
+                        usage_data = self.format_usage(chunk)
+
+            content = span.timed_validation(assembler.finish)
+            span.end(usage_data.output_tokens if usage_data else None)
+            if content is not None:
+                yield span.annotate(StreamEvent("final", content, provider, model))
+
+            if usage_data:
+                yield StreamEvent("usage", None, provider, model, usage_data)
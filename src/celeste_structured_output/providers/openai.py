@@ -1,152 +1,244 @@
-from typing import Any, AsyncIterator, List, Optional, get_origin
+import copy
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from openai import AsyncOpenAI
-from openai.types.chat import (
-    ChatCompletionMessageParam,
-    ChatCompletionStreamOptionsParam,
-    ChatCompletionUserMessageParam,
-)
-from pydantic import BaseModel, create_model
+from openai import AsyncOpenAI, pydantic_function_tool
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletionStreamOptionsParam
+from pydantic import BaseModel, Json, TypeAdapter, create_model
 
 from ..base import BaseStructuredClient
-from ..core.config import OPENAI_API_KEY
+from ..core.config import get_setting
 from ..core.enums import OpenAIStructuredModel, StructuredOutputProvider
-from ..core.types import AIUsage, StructuredResponse
+from ..core.http import HTTPConfig
+from ..core.minify import minimize_schema, schema_policy
+from ..core.prefix import PromptPrefix, chat_messages
+from ..core.schema import CompiledSchema, compile_schema
+from ..core.streaming import StreamAssembler
+from ..core.telemetry import start_span
+from ..core.types import AIUsage, StreamEvent, StructuredResponse
+
+
+def _build_response_format(compiled: CompiledSchema) -> Any:
+    # The public tool helper gives the same strict schema as structured outputs
+    function = pydantic_function_tool(compiled.response_format)["function"]
+    policy = schema_policy(StructuredOutputProvider.OPENAI)
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": function["name"],
+            "schema": minimize_schema(function["parameters"], policy),
+            "strict": True,
+        },
+    }
+
+
+def _build_reply(compiled: CompiledSchema) -> TypeAdapter[Any]:
+    """
+    Validator for a whole chat completion body whose message content (a JSON
+    string) is validated as :attr:`CompiledSchema.response_format` in the same
+    pass, so the body is never decoded into SDK objects first.
+    """
+    message = create_model(
+        "ReplyMessage", content=(Optional[Json[compiled.response_format]], None)
+    )
+    choice = create_model("ReplyChoice", message=(message, ...))
+    return TypeAdapter(
+        create_model(
+            "Reply",
+            choices=(List[choice], ...),  # type: ignore[valid-type]
+            usage=(Optional[CompletionUsage], None),
+        )
+    )
+
+
+def _sdk_params(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    ``body`` as ``chat.completions.create`` arguments; ``prompt_cache_key`` is
+    sent through ``extra_body`` since older supported SDKs lack the keyword.
+    """
+    if "prompt_cache_key" not in body:
+        return body
+    params = dict(body)
+    extra_body = {
+        "prompt_cache_key": params.pop("prompt_cache_key"),
+        **(params.get("extra_body") or {}),
+    }
+    return {**params, "extra_body": extra_body}
 
 
 class OpenAIClient(BaseStructuredClient):
+    provider = StructuredOutputProvider.OPENAI
+
     def __init__(
-        self, model: str = OpenAIStructuredModel.GPT_O4_MINI.value, **kwargs: Any
+        self,
+        model: str = OpenAIStructuredModel.GPT_O4_MINI.value,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        http_config: Optional[HTTPConfig] = None,
+        max_retries: Optional[int] = None,
+        **kwargs: Any,
     ) -> None:
         super().__init__(**kwargs)
 
-        self.client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+        self.http_config = http_config or HTTPConfig()
+        # None keeps the SDK's default
+        retry_options = {} if max_retries is None else {"max_retries": max_retries}
+        self.client = AsyncOpenAI(
+            api_key=api_key or get_setting("OPENAI_API_KEY"),
+            base_url=base_url,
+            http_client=self.http_config.async_client(),
+            **retry_options,
+        )
         self.model_name = model
 
     def format_usage(self, usage_data: Any) -> Optional[AIUsage]:
         """Convert OpenAI usage data to AIUsage."""
         if not usage_data:
             return None
+        details = usage_data.prompt_tokens_details
         return AIUsage(
             input_tokens=usage_data.prompt_tokens,
             output_tokens=usage_data.completion_tokens,
             total_tokens=usage_data.total_tokens,
+            cache_read_tokens=(details.cached_tokens or 0) if details else 0,
         )
 
+    def prepare_schema(self, compiled: CompiledSchema) -> None:
+        super().prepare_schema(compiled)
+        compiled.wire_form(StructuredOutputProvider.OPENAI, _build_response_format)
+        compiled.wire_form((StructuredOutputProvider.OPENAI, "reply"), _build_reply)
+
+    def without_sdk_retries(self) -> BaseStructuredClient:
+        clone = copy.copy(self)
+        clone.client = self.client.with_options(max_retries=0)
+        return clone
+
+    async def open_connection(self) -> None:
+        await self.client.models.retrieve(self.model_name)
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+    def request_body(
+        self,
+        prompt: str,
+        compiled: CompiledSchema,
+        prefix: Optional[PromptPrefix] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """
+        Chat completion parameters for ``prompt`` with a cached response_format.
+
+        A ``prefix`` goes first so repeated calls share a cacheable prompt
+        prefix; its digest becomes the ``prompt_cache_key``.
+        """
+        body: Dict[str, Any] = {
+            "messages": chat_messages(prompt, prefix),
+            "model": self.model_name,
+            "response_format": compiled.wire_form(
+                StructuredOutputProvider.OPENAI, _build_response_format
+            ),
+        }
+        if prefix is not None:
+            body["prompt_cache_key"] = prefix.cache_key(compiled)
+        body.update(kwargs)
+        return body
+
+    def parse_completion(self, completion: Any, compiled: CompiledSchema) -> Any:
+        """Validate the JSON message of a chat completion against ``compiled``."""
+        text = completion.choices[0].message.content
+        # If we wrapped a list, extract the data field
+        return compiled.validate_wire_json(text) if text else None
+
+    def parse_reply(self, body: bytes, compiled: CompiledSchema) -> Tuple[Any, Any]:
+        """Content and usage of a raw chat completion body, validated in one pass."""
+        reply = compiled.wire_form(
+            (StructuredOutputProvider.OPENAI, "reply"), _build_reply
+        ).validate_json(body)
+        return compiled.unwrap(reply.choices[0].message.content), reply.usage
+
     async def generate_content(
         self, prompt: str, response_schema: Optional[BaseModel] = None, **kwargs: Any
     ) -> StructuredResponse:
-        messages: List[ChatCompletionMessageParam] = [
-            ChatCompletionUserMessageParam(role="user", content=prompt)
-        ]
-
-        if response_schema is not None:
-            # Handle list types by wrapping them in a Pydantic model
-            if get_origin(response_schema) is list:
-                # Create a dynamic model with the list type
-                ListWrapper = create_model(
-                    "ListWrapper",
-                    data=(list[response_schema], ...),  # type: ignore[valid-type]
+        with start_span(self, "generate_content") as span:
+            if response_schema is not None:
+                # List schemas are sent wrapped in a cached object model
+                compiled = span.timed_compile(compile_schema, response_schema)
+                body = span.timed_compile(self.request_body, prompt, compiled, **kwargs)
+                raw = await self.client.chat.completions.with_raw_response.create(
+                    **_sdk_params(body)
                 )
-
-                response = await self.client.chat.completions.parse(
-                    messages=messages,
-                    model=self.model_name,
-                    response_format=ListWrapper,
-                    **kwargs,
+                # Validate the raw body once instead of building SDK objects
+                content, usage_data = span.timed_validation(
+                    self.parse_reply, raw.content, compiled
                 )
             else:
-                response = await self.client.chat.completions.parse(
-                    messages=messages,
+                prefix = kwargs.pop("prefix", None)
+                response = await self.client.chat.completions.create(
+                    messages=chat_messages(prompt, prefix),
                     model=self.model_name,
-                    response_format=response_schema,
                     **kwargs,
                 )
-        else:
-            response = await self.client.chat.completions.create(
-                messages=messages, model=self.model_name, **kwargs
-            )
+                content = response.choices[0].message.content or ""
+                usage_data = response.usage
 
-        usage = self.format_usage(response.usage)
-
-        # Return parsed content if using response_schema, otherwise return text
-        if response_schema is not None and hasattr(
-            response.choices[0].message, "parsed"
-        ):
-            parsed = response.choices[0].message.parsed
-            # If we wrapped a list, extract the data field
-            if get_origin(response_schema) is list and hasattr(parsed, "data"):
-                content = parsed.data
-            else:
-                content = parsed
-        else:
-            content = response.choices[0].message.content or ""
-
-        return StructuredResponse(
-            content=content,
-            usage=usage,
-            provider=StructuredOutputProvider.OPENAI,
-            metadata={"model": self.model_name},
-        )
+            return span.annotate(
+                StructuredResponse(
+                    content=content,
+                    usage=self.format_usage(usage_data),
+                    provider=StructuredOutputProvider.OPENAI,
+                    metadata={"model": self.model_name},
+                )
+            )
 
-    async def stream_generate_content(
-        self, prompt: str, response_schema: Optional[BaseModel] = None, **kwargs: Any
-    ) -> AsyncIterator[StructuredResponse]:
-        messages: List[ChatCompletionMessageParam] = [
-            ChatCompletionUserMessageParam(role="user", content=prompt)
-        ]
+    async def stream_events(
+        self,
+        prompt: str,
+        response_schema: Optional[BaseModel] = None,
+        deltas: bool = False,
+        **kwargs: Any,
+    ) -> AsyncIterator[StreamEvent]:
+        provider, model = StructuredOutputProvider.OPENAI, self.model_name
+        partial_kind = "delta" if deltas else "partial"
 
-        # For structured output in streaming, use the beta streaming API
+        # For structured output in streaming, parse the raw deltas ourselves
         if response_schema is not None:
-            # Handle list types by wrapping them in a Pydantic model
-            actual_schema = response_schema
-            is_list = get_origin(response_schema) is list
-
-            if is_list:
-                # Create a dynamic model with the list type
-                ListWrapper = create_model(
-                    "ListWrapper",
-                    data=(list[response_schema], ...),  # type: ignore[valid-type]
+            with start_span(self, "stream_generate_content") as span:
+                # List schemas are sent wrapped in a cached object model
+                compiled = span.timed_compile(compile_schema, response_schema)
+                body = span.timed_compile(self.request_body, prompt, compiled, **kwargs)
+                assembler = StreamAssembler(compiled, wrapped=True, deltas=deltas)
+                usage = None
+
+                stream = await self.client.chat.completions.create(
+                    **_sdk_params(body),
+                    stream=True,
+                    stream_options=ChatCompletionStreamOptionsParam(include_usage=True),
                 )
-                actual_schema = ListWrapper
-
-            async with self.client.beta.chat.completions.stream(
-                messages=messages,
-                model=self.model_name,
-                response_format=actual_schema,
-                **kwargs,
-            ) as stream:
-                async for event in stream:
-                    if event.type == "content.delta" and event.parsed is not None:
-                        # Extract content from parsed data
-                        content = (
-                            event.parsed.data
-                            if is_list and hasattr(event.parsed, "data")
-                            else event.parsed
-                        )
-                        yield StructuredResponse(
-                            content=content,
-                            provider=StructuredOutputProvider.OPENAI,
-                            metadata={
-                                "model": self.model_name,
-                                "is_stream_chunk": True,
-                            },
-                        )
-
-                # Get final completion for usage data
-                final_completion = await stream.get_final_completion()
-                usage = self.format_usage(final_completion.usage)
-                if usage:
-                    yield StructuredResponse(
-                        content="",
-                        usage=usage,
-                        provider=StructuredOutputProvider.OPENAI,
-                        metadata={"model": self.model_name, "is_final_usage": True},
+                async for chunk in stream:
+                    if chunk.usage:
+                        usage = self.format_usage(chunk.usage)
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    span.mark_first_token()
+                    partial = span.timed_validation(
+                        assembler.feed, chunk.choices[0].delta.content
                     )
+                    if partial is not None:
+                        span.mark_first_partial()
+                        yield StreamEvent(partial_kind, partial, provider, model)
+
+                content = span.timed_validation(assembler.finish)
+                span.end(usage.output_tokens if usage else None)
+                if content is not None:
+                    yield span.annotate(StreamEvent("final", content, provider, model))
+                if usage:
+                    yield StreamEvent("usage", None, provider, model, usage)
             return
 
+        prefix = kwargs.pop("prefix", None)
         response = await self.client.chat.completions.create(
-            messages=messages,
+            messages=chat_messages(prompt, prefix),
             model=self.model_name,
             stream=True,
             stream_options=ChatCompletionStreamOptionsParam(include_usage=True),
@@ -154,17 +246,11 @@ class OpenAIClient(BaseStructuredClient):
         )
         async for chunk in response:
             if chunk.choices and chunk.choices[0].delta.content:
-                yield StructuredResponse(
-                    content=chunk.choices[0].delta.content,
-                    provider=StructuredOutputProvider.OPENAI,
-                    metadata={"model": self.model_name, "is_stream_chunk": True},
+                yield StreamEvent(
+                    "text", chunk.choices[0].delta.content, provider, model
                 )
             elif chunk.usage:
                 usage = self.format_usage(chunk.usage)
                 if usage:
-                    yield StructuredResponse(
-                        content="",  # Empty content for the usage-only response
-                        usage=usage,
-                        provider=StructuredOutputProvider.OPENAI,
-                        metadata={"model": self.model_name, "is_final_usage": True},
-                    )
+                    # Empty content for the usage-only response
+                    yield StreamEvent("usage", "", provider, model, usage)
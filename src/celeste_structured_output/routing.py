@@ -0,0 +1,220 @@
+"""
+Latency-aware routing of calls across several provider clients.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from pydantic import BaseModel
+
+from .base import BaseStructuredClient
+from .core.types import AIUsage, StreamEvent, StructuredResponse
+
+DEFAULT_ALPHA = 0.2
+# Backends not used for this long get one call to refresh their estimates
+DEFAULT_PROBE_INTERVAL = 30.0
+MAX_ERROR_RATE = 0.95
+
+
+class BackendStats(BaseModel):
+    """Exponentially weighted health estimates of one backend."""
+
+    latency: Optional[float] = None
+    error_rate: float = 0.0
+    throughput: float = 0.0
+    in_flight: int = 0
+    requests: int = 0
+    errors: int = 0
+    last_used: float = 0.0
+
+    def expected_latency(self) -> float:
+        """Latency a new call should see given the current load and errors."""
+        if self.latency is None:
+            return float("inf") if self.errors else 0.0
+        error_rate = min(self.error_rate, MAX_ERROR_RATE)
+        return self.latency * (1 + self.in_flight) / (1 - error_rate)
+
+
+class Backend:
+    """A provider client and the router's view of its health."""
+
+    def __init__(self, name: str, client: BaseStructuredClient, alpha: float) -> None:
+        self.name = name
+        self.client = client
+        self.alpha = alpha
+        self.stats = BackendStats()
+
+    def start(self) -> float:
+        now = time.monotonic()
+        self.stats.in_flight += 1
+        self.stats.requests += 1
+        self.stats.last_used = now
+        return now
+
+    def finish(self, started: float, ok: bool) -> None:
+        now = time.monotonic()
+        stats, alpha = self.stats, self.alpha
+        stats.in_flight -= 1
+        stats.error_rate += alpha * ((0.0 if ok else 1.0) - stats.error_rate)
+        if not ok:
+            stats.errors += 1
+            return
+        elapsed = now - started
+        if stats.latency is None:
+            stats.latency = elapsed
+        else:
+            stats.latency += alpha * (elapsed - stats.latency)
+        rate = (1 + stats.in_flight) / elapsed if elapsed > 0 else 0.0
+        stats.throughput += alpha * (rate - stats.throughput)
+
+
+def _name_of(client: BaseStructuredClient) -> str:
+    provider = client.provider.value if client.provider else type(client).__name__
+    return f"{provider}:{client.model_name}"
+
+
+class RoutedStructuredClient(BaseStructuredClient):
+    """
+    Sends each call to the backend expected to answer fastest.
+
+    Backends are ranked by EWMA latency scaled by their in-flight calls and
+    error rate; unmeasured and idle backends are probed first so estimates stay
+    current. ``allowed`` maps a response schema to the backend names that give
+    acceptable output for it. A failed call is retried on the next-best backend
+    (streams only until their first chunk) until ``max_attempts`` is reached.
+    """
+
+    def __init__(
+        self,
+        clients: Union[
+            Sequence[BaseStructuredClient], Mapping[str, BaseStructuredClient]
+        ],
+        allowed: Optional[Mapping[Any, Iterable[str]]] = None,
+        max_attempts: Optional[int] = None,
+        alpha: float = DEFAULT_ALPHA,
+        probe_interval: float = DEFAULT_PROBE_INTERVAL,
+    ) -> None:
+        if not isinstance(clients, Mapping):
+            clients = {_name_of(client): client for client in clients}
+        if not clients:
+            raise ValueError("RoutedStructuredClient needs at least one client")
+        self.backends = {
+            name: Backend(name, client, alpha) for name, client in clients.items()
+        }
+        self.allowed: Dict[Any, List[str]] = {}
+        for schema, names in (allowed or {}).items():
+            self.allow(schema, names)
+        self.max_attempts = max_attempts or len(self.backends)
+        self.probe_interval = probe_interval
+        self.provider = None
+        self.model_name = ",".join(self.backends)
+
+    def allow(self, response_schema: Any, names: Iterable[str]) -> None:
+        """Restricts ``response_schema`` to the backends called ``names``."""
+        names = list(names)
+        unknown = [name for name in names if name not in self.backends]
+        if unknown:
+            raise ValueError(f"Unknown backends: {', '.join(unknown)}")
+        self.allowed[response_schema] = names
+
+    def stats(self) -> Dict[str, BackendStats]:
+        return {name: backend.stats for name, backend in self.backends.items()}
+
+    def rank(self, response_schema: Any) -> List[Backend]:
+        """Candidate backends for ``response_schema``, best first."""
+        names = self.allowed.get(response_schema) or list(self.backends)
+        now = time.monotonic()
+
+        def score(backend: Backend) -> float:
+            stats = backend.stats
+            if stats.in_flight == 0 and now - stats.last_used > self.probe_interval:
+                return 0.0
+            return stats.expected_latency()
+
+        return sorted((self.backends[name] for name in names), key=score)
+
+    def format_usage(self, usage_data: Any) -> Optional[AIUsage]:
+        return next(iter(self.backends.values())).client.format_usage(usage_data)
+
+    async def warmup(self, schemas: Iterable[Any] = ()) -> None:
+        schemas = list(schemas)
+        for backend in self.backends.values():
+            await backend.client.warmup(schemas)
+
+    async def aclose(self) -> None:
+        for backend in self.backends.values():
+            await backend.client.aclose()
+
+    async def generate_content(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> StructuredResponse:
+        candidates = self.rank(response_schema)[: self.max_attempts]
+        for position, backend in enumerate(candidates):
+            started = backend.start()
+            try:
+                response = await backend.client.generate_content(
+                    prompt, response_schema, **kwargs
+                )
+            except Exception:
+                backend.finish(started, ok=False)
+                if position == len(candidates) - 1:
+                    raise
+                continue
+            except BaseException:
+                backend.stats.in_flight -= 1
+                raise
+            backend.finish(started, ok=True)
+            return response
+        raise AssertionError("no candidate backend")
+
+    async def stream_generate_content(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> AsyncIterator[StructuredResponse]:
+        async for chunk in self._stream(
+            "stream_generate_content", prompt, response_schema, **kwargs
+        ):
+            yield chunk
+
+    async def stream_events(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> AsyncIterator[StreamEvent]:
+        async for event in self._stream(
+            "stream_events", prompt, response_schema, **kwargs
+        ):
+            yield event
+
+    async def _stream(
+        self, method: str, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        candidates = self.rank(response_schema)[: self.max_attempts]
+        for position, backend in enumerate(candidates):
+            started = backend.start()
+            streamed = False
+            try:
+                async for chunk in getattr(backend.client, method)(
+                    prompt, response_schema, **kwargs
+                ):
+                    streamed = True
+                    yield chunk
+            except Exception:
+                backend.finish(started, ok=False)
+                if streamed or position == len(candidates) - 1:
+                    raise
+                continue
+            except BaseException:
+                backend.stats.in_flight -= 1
+                raise
+            backend.finish(started, ok=True)
+            return
@@ -0,0 +1,435 @@
+"""
+Quota-aware scheduling of provider calls.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import json
+import threading
+import time
+from enum import IntEnum
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict
+
+from .base import BaseStructuredClient
+from .core.schema import CHARS_PER_TOKEN, CompiledSchema, compile_schema
+from .core.telemetry import retry_attempt
+from .core.types import AIUsage, StreamEvent, StructuredResponse
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_OUTPUT_TOKENS = 512
+DEFAULT_BACKOFF = 1.0
+DEFAULT_MAX_RETRIES = 3
+OUTPUT_TOKEN_KWARGS = ("max_tokens", "max_completion_tokens", "max_output_tokens")
+
+
+class Priority(IntEnum):
+    """Scheduling class of a call; lower values are served first."""
+
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+class QuotaLimits(BaseModel):
+    """Request and token quotas of one provider/model pair."""
+
+    model_config = ConfigDict(frozen=True)
+
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    min_concurrency: int = 1
+
+
+class LaneStats(BaseModel):
+    """Counters of a ``QuotaLane``."""
+
+    granted: int = 0
+    rate_limited: int = 0
+    estimated_tokens: int = 0
+    settled_tokens: int = 0
+    queued_seconds: float = 0.0
+
+
+class TokenBucket:
+    """
+    Refills ``capacity`` units per minute, continuously.
+
+    The level may go negative when a settled cost exceeds its estimate; the
+    debt is paid back by refills before anything else is granted.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = float(capacity)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` units are available."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """Charges ``amount`` more units (or refunds them when negative)."""
+        self.level = min(self.capacity, self.level - amount)
+
+    def drain(self, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+
+class Ticket:
+    """A granted slot; settle it with the real usage once the call returns."""
+
+    def __init__(self, lane: QuotaLane, estimated_tokens: int) -> None:
+        self.lane = lane
+        self.estimated_tokens = estimated_tokens
+        self.settled = False
+
+    def settle(self, usage: Optional[AIUsage]) -> None:
+        if self.settled:
+            return
+        self.settled = True
+        self.lane.settle(self, usage)
+
+
+class QuotaLane:
+    """
+    Admission control for one provider/model pair.
+
+    Calls wait in a priority queue until a concurrency slot is free and both
+    token buckets can cover them. The concurrency limit grows additively after
+    successes and halves on rate-limit errors (AIMD), while ``retry-after``
+    pauses the whole lane and empties its buckets, so the lane settles just
+    under the provider's real ceiling instead of bursting into it.
+    """
+
+    def __init__(self, limits: QuotaLimits) -> None:
+        self.limits = limits
+        self.requests = (
+            TokenBucket(limits.requests_per_minute)
+            if limits.requests_per_minute
+            else None
+        )
+        self.tokens = (
+            TokenBucket(limits.tokens_per_minute) if limits.tokens_per_minute else None
+        )
+        self.concurrency = float(limits.max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.stats = LaneStats()
+        self._queue: List[Tuple[int, int, int]] = []
+        self._sequence = itertools.count()
+        self._waiters: List[asyncio.Future[None]] = []
+        self._lock = threading.Lock()
+
+    def _delay(self, tokens: int, now: float) -> float:
+        delay = self.paused_until - now
+        if self.requests is not None:
+            delay = max(delay, self.requests.delay(1, now))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.delay(tokens, now))
+        return delay
+
+    def _try_grant(self, entry: Tuple[int, int, int]) -> Optional[float]:
+        """Grants ``entry`` if it heads the queue; otherwise returns a wait hint."""
+        with self._lock:
+            if self._queue[0] is not entry or self.in_flight >= int(self.concurrency):
+                return None
+            now = time.monotonic()
+            tokens = entry[2]
+            delay = self._delay(tokens, now)
+            if delay > 0:
+                return delay
+            heapq.heappop(self._queue)
+            if self.requests is not None:
+                self.requests.take(1, now)
+            if self.tokens is not None:
+                self.tokens.take(tokens, now)
+            self.in_flight += 1
+            self.stats.granted += 1
+            self.stats.estimated_tokens += tokens
+        self._notify()
+        return 0.0
+
+    async def acquire(
+        self, estimated_tokens: int, priority: Priority = Priority.INTERACTIVE
+    ) -> Ticket:
+        entry = (int(priority), next(self._sequence), estimated_tokens)
+        with self._lock:
+            heapq.heappush(self._queue, entry)
+        started = time.monotonic()
+        try:
+            while True:
+                delay = self._try_grant(entry)
+                if delay == 0.0:
+                    self.stats.queued_seconds += time.monotonic() - started
+                    return Ticket(self, estimated_tokens)
+                await self._wait(delay)
+        except BaseException:
+            with self._lock:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+            self._notify()
+            raise
+
+    async def _wait(self, timeout: Optional[float]) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        with self._lock:
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def _notify(self) -> None:
+        with self._lock:
+            waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+
+    def settle(self, ticket: Ticket, usage: Optional[AIUsage]) -> None:
+        """Frees the ticket's slot and corrects the token bucket with ``usage``."""
+        with self._lock:
+            self.in_flight -= 1
+            if usage is not None:
+                self.stats.settled_tokens += usage.total_tokens
+                if self.tokens is not None:
+                    self.tokens.adjust(usage.total_tokens - ticket.estimated_tokens)
+            limits = self.limits
+            self.concurrency = min(
+                float(limits.max_concurrency), self.concurrency + 1 / self.concurrency
+            )
+        self._notify()
+
+    def release(self, ticket: Ticket, retry_after: Optional[float]) -> None:
+        """Frees the ticket's slot after a failed call, backing off on 429s."""
+        with self._lock:
+            self.in_flight -= 1
+            if retry_after is not None:
+                now = time.monotonic()
+                self.stats.rate_limited += 1
+                self.concurrency = max(
+                    float(self.limits.min_concurrency), self.concurrency / 2
+                )
+                self.paused_until = max(self.paused_until, now + retry_after)
+                for bucket in (self.requests, self.tokens):
+                    if bucket is not None:
+                        bucket.drain(now)
+        self._notify()
+
+
+def _resolve(waiter: asyncio.Future[None]) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Seconds to back off if ``error`` is a provider rate-limit (HTTP 429) error.
+
+    Works with the SDK errors that carry ``status_code``/``code`` and the
+    ``httpx`` response, reading ``retry-after-ms`` or ``retry-after`` headers.
+    """
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    if status != 429:
+        return None
+    headers = getattr(response, "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return max(float(headers.get(name)) * scale, 0.0)
+        except (TypeError, ValueError):
+            continue
+    return DEFAULT_BACKOFF
+
+
+class QuotaScheduler:
+    """Holds one ``QuotaLane`` per provider and model."""
+
+    def __init__(self, default_limits: Optional[QuotaLimits] = None) -> None:
+        self.default_limits = default_limits or QuotaLimits()
+        self._limits: Dict[Tuple[str, Optional[str]], QuotaLimits] = {}
+        self._lanes: Dict[Tuple[str, str], QuotaLane] = {}
+        self._lock = threading.Lock()
+
+    def configure(
+        self, provider: str, limits: QuotaLimits, model: Optional[str] = None
+    ) -> None:
+        """Sets the quotas of ``provider`` (for every model unless ``model``)."""
+        with self._lock:
+            self._limits[(provider, model)] = limits
+            for key in [key for key in self._lanes if key[0] == provider]:
+                if model is None or key[1] == model:
+                    del self._lanes[key]
+
+    def lane(self, provider: str, model: str) -> QuotaLane:
+        with self._lock:
+            lane = self._lanes.get((provider, model))
+            if lane is None:
+                limits = (
+                    self._limits.get((provider, model))
+                    or self._limits.get((provider, None))
+                    or self.default_limits
+                )
+                lane = self._lanes[(provider, model)] = QuotaLane(limits)
+            return lane
+
+    def lanes(self) -> Dict[Tuple[str, str], QuotaLane]:
+        return dict(self._lanes)
+
+
+quota_scheduler = QuotaScheduler()
+
+
+def estimate_tokens(
+    prompt: str, compiled: CompiledSchema, kwargs: Dict[str, Any]
+) -> int:
+    """
+    Rough upper estimate of the tokens a call will be charged for.
+
+    Counts the prompt and the schema at ``CHARS_PER_TOKEN`` characters per
+    token plus the requested output budget, since providers reserve
+    ``max_tokens`` against the token quota when a request is admitted.
+    """
+    schema_chars = compiled.wire_form("schema_chars", _schema_chars)
+    output = next(
+        (kwargs[name] for name in OUTPUT_TOKEN_KWARGS if kwargs.get(name)),
+        DEFAULT_OUTPUT_TOKENS,
+    )
+    return (len(prompt) + schema_chars) // CHARS_PER_TOKEN + int(output)
+
+
+def _schema_chars(compiled: CompiledSchema) -> int:
+    return len(json.dumps(compiled.json_schema, separators=(",", ":")))
+
+
+class ScheduledStructuredClient(BaseStructuredClient):
+    """
+    Wraps any ``BaseStructuredClient`` so its calls go through a ``QuotaScheduler``.
+
+    Pass ``priority=Priority.BATCH`` to a call (or to ``map_structured``) to let
+    interactive traffic go first. Rate-limit errors are retried up to
+    ``max_retries`` times after the lane's back-off. Calls go through
+    ``client.without_sdk_retries()``, so the SDK does not retry 429s on its
+    own, adding bursts the lane never sees.
+    """
+
+    def __init__(
+        self,
+        client: BaseStructuredClient,
+        scheduler: Optional[QuotaScheduler] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ) -> None:
+        self.client = client.without_sdk_retries()
+        self.scheduler = scheduler or quota_scheduler
+        self.priority = priority
+        self.max_retries = max_retries
+        self.provider = client.provider
+        self.model_name = client.model_name
+
+    @property
+    def lane(self) -> QuotaLane:
+        provider = self.provider.value if self.provider else type(self.client).__name__
+        return self.scheduler.lane(provider, self.model_name)
+
+    def format_usage(self, usage_data: Any) -> Optional[AIUsage]:
+        return self.client.format_usage(usage_data)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def generate_content(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> StructuredResponse:
+        priority = kwargs.pop("priority", self.priority)
+        estimate = estimate_tokens(prompt, compile_schema(response_schema), kwargs)
+        lane = self.lane
+        attempt = 0
+        while True:
+            ticket = await lane.acquire(estimate, priority)
+            try:
+                with retry_attempt(attempt):
+                    response = await self.client.generate_content(
+                        prompt, response_schema, **kwargs
+                    )
+            except BaseException as error:
+                delay = retry_after(error) if isinstance(error, Exception) else None
+                lane.release(ticket, delay)
+                if delay is None or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                continue
+            ticket.settle(response.usage)
+            return response
+
+    async def stream_generate_content(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> AsyncIterator[StructuredResponse]:
+        async for chunk in self._stream(
+            "stream_generate_content", prompt, response_schema, **kwargs
+        ):
+            yield chunk
+
+    async def stream_events(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> AsyncIterator[StreamEvent]:
+        async for event in self._stream(
+            "stream_events", prompt, response_schema, **kwargs
+        ):
+            yield event
+
+    async def _stream(
+        self, method: str, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        priority = kwargs.pop("priority", self.priority)
+        estimate = estimate_tokens(prompt, compile_schema(response_schema), kwargs)
+        lane = self.lane
+        attempt = 0
+        while True:
+            ticket = await lane.acquire(estimate, priority)
+            usage = None
+            started = False
+            try:
+                with retry_attempt(attempt):
+                    async for chunk in getattr(self.client, method)(
+                        prompt, response_schema, **kwargs
+                    ):
+                        started = True
+                        if chunk.usage is not None:
+                            usage = chunk.usage
+                        yield chunk
+            except BaseException as error:
+                delay = retry_after(error) if isinstance(error, Exception) else None
+                lane.release(ticket, delay)
+                if delay is None or started or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                continue
+            ticket.settle(usage)
+            return
@@ -0,0 +1,232 @@
+"""
+Blocking clients for synchronous code, backed by one long-lived event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import concurrent.futures
+import os
+import threading
+from types import TracebackType
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    TypeVar,
+)
+
+from pydantic import BaseModel
+
+from .base import BaseStructuredClient
+from .core.concurrency import DEFAULT_MAX_CONCURRENCY
+from .core.types import (
+    AIUsage,
+    BatchResult,
+    MultiSchemaResponse,
+    StreamEvent,
+    StructuredResponse,
+)
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """
+    An event loop running in a daemon thread, started on first use.
+
+    Any thread can hand it coroutines with ``run`` or async iterators with
+    ``iterate`` and block for the results. Clients used only through one
+    loop keep their HTTP connection pools from call to call. After a fork the
+    child starts its own loop on first use.
+    """
+
+    def __init__(self, name: str = "celeste-event-loop") -> None:
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop, starting it if needed."""
+        if self._loop is not None:
+            return self._loop
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                started = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._serve,
+                    args=(loop, started),
+                    name=self.name,
+                    daemon=True,
+                )
+                self._thread.start()
+                started.wait()
+                self._loop = loop
+            return self._loop
+
+    @staticmethod
+    def _serve(loop: asyncio.AbstractEventLoop, started: threading.Event) -> None:
+        asyncio.set_event_loop(loop)
+        loop.call_soon(started.set)
+        loop.run_forever()
+
+    def run(self, awaitable: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """
+        Runs ``awaitable`` on the loop and waits for its result, cancelling
+        it on ``timeout`` (seconds) or when the waiting thread is interrupted.
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("BackgroundLoop.run called from its own loop")
+        future = asyncio.run_coroutine_threadsafe(_awaited(awaitable), self.loop)
+        try:
+            return future.result(timeout)
+        except (concurrent.futures.TimeoutError, KeyboardInterrupt):
+            future.cancel()
+            raise
+
+    def iterate(
+        self, iterator: AsyncIterator[T], timeout: Optional[float] = None
+    ) -> Iterator[T]:
+        """
+        Iterates ``iterator`` on the loop, one item at a time; closing the
+        returned iterator early closes ``iterator`` too.
+        """
+        try:
+            while True:
+                try:
+                    yield self.run(iterator.__anext__(), timeout)
+                except StopAsyncIteration:
+                    return
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None and self._loop is not None:
+                self.run(aclose())
+
+    def close(self) -> None:
+        """Stops the loop and its thread; the next call starts a new one."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or thread is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+
+    def _forget(self) -> None:
+        # The thread does not survive a fork; the child's first call starts one
+        self._loop = self._thread = None
+        self._lock = threading.Lock()
+
+
+async def _awaited(awaitable: Awaitable[T]) -> T:
+    return await awaitable
+
+
+background_loop = BackgroundLoop()
+atexit.register(background_loop.close)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=background_loop._forget)
+
+
+class SyncStructuredClient:
+    """
+    Blocking facade over an async client.
+
+    Every call runs on ``loop`` (the process-wide :data:`background_loop` by
+    default), so the wrapped client's connections are reused across calls and
+    the facade can be shared between threads. Streams are plain iterators.
+    ``timeout`` bounds each call, or each stream item, in seconds. Do not use
+    the wrapped client from another event loop at the same time.
+    """
+
+    def __init__(
+        self,
+        client: BaseStructuredClient,
+        loop: Optional[BackgroundLoop] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        self.client = client
+        self.loop = loop or background_loop
+        self.timeout = timeout
+        self.provider = client.provider
+        self.model_name = client.model_name
+
+    def generate_content(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> StructuredResponse:
+        return self.loop.run(
+            self.client.generate_content(prompt, response_schema, **kwargs),
+            self.timeout,
+        )
+
+    def stream_generate_content(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> Iterator[StructuredResponse]:
+        return self.loop.iterate(
+            self.client.stream_generate_content(prompt, response_schema, **kwargs),
+            self.timeout,
+        )
+
+    def stream_events(
+        self, prompt: str, response_schema: BaseModel, **kwargs: Any
+    ) -> Iterator[StreamEvent]:
+        return self.loop.iterate(
+            self.client.stream_events(prompt, response_schema, **kwargs),
+            self.timeout,
+        )
+
+    def generate_multi(
+        self, prompt: str, schemas: Mapping[str, Any], **kwargs: Any
+    ) -> MultiSchemaResponse:
+        return self.loop.run(
+            self.client.generate_multi(prompt, schemas, **kwargs), self.timeout
+        )
+
+    def generate_batch(
+        self,
+        prompts: Iterable[str],
+        response_schema: BaseModel,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        **kwargs: Any,
+    ) -> List[BatchResult]:
+        return self.loop.run(
+            self.client.generate_batch(
+                prompts, response_schema, max_concurrency=max_concurrency, **kwargs
+            )
+        )
+
+    def format_usage(self, usage_data: Any) -> Optional[AIUsage]:
+        return self.client.format_usage(usage_data)
+
+    def warmup(self, schemas: Iterable[Any] = ()) -> None:
+        self.loop.run(self.client.warmup(schemas))
+
+    def close(self) -> None:
+        """
+        Closes the wrapped client's connections (the loop keeps running); a
+        pooled client is closed for all its users.
+        """
+        self.loop.run(self.client.aclose())
+
+    def __enter__(self) -> SyncStructuredClient:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
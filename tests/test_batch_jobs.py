@@ -0,0 +1,37 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from pydantic import BaseModel
+
+from celeste_structured_output import PromptPrefix
+from celeste_structured_output.jobs.anthropic import AnthropicBatchJobClient
+from celeste_structured_output.jobs.fake import FakeBatchServer
+from celeste_structured_output.jobs.openai import OpenAIBatchJobClient
+
+
+class Person(BaseModel):
+    name: str
+
+
+@pytest.mark.parametrize(
+    ("job_client", "make_client"),
+    [
+        (OpenAIBatchJobClient, FakeBatchServer.openai_client),
+        (AnthropicBatchJobClient, FakeBatchServer.anthropic_client),
+    ],
+)
+def test_results_report_prompts_with_prefix(
+    tmp_path: Path, job_client: type, make_client: object
+) -> None:
+    prefix = PromptPrefix(system="sys", examples=[("ex in", Person(name="Ann"))])
+    prompts = ["first", "second"]
+
+    async def run() -> list:
+        with FakeBatchServer() as server:
+            jobs = job_client(make_client(server), spool_dir=tmp_path)
+            return await jobs.run(prompts, Person, poll_interval=0.01, prefix=prefix)
+
+    results = asyncio.run(run())
+    assert [result.prompt for result in results] == prompts
+    assert all(result.ok for result in results)
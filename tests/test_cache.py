@@ -0,0 +1,44 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Optional
+
+import pytest
+from pydantic import BaseModel, Field
+
+from celeste_structured_output.cache import CachedStructuredClient, ResponseCache
+from celeste_structured_output.core.types import StructuredResponse
+
+
+class Person(BaseModel):
+    full_name: str = Field(alias="fullName")
+    age: int
+
+
+class FakeClient:
+    provider = None
+    model_name = "fake"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def generate_content(
+        self, prompt: str, response_schema: Any, **kwargs: Any
+    ) -> StructuredResponse:
+        self.calls += 1
+        content = [Person(fullName="Ada Lovelace", age=36)]
+        return StructuredResponse(content=content, provider=None)
+
+
+@pytest.mark.parametrize("disk", [False, True])
+def test_aliased_content_round_trips(tmp_path: Path, disk: bool) -> None:
+    path: Optional[Path] = tmp_path / "cache.db" if disk else None
+    upstream = FakeClient()
+    client = CachedStructuredClient(upstream, ResponseCache(path=path))
+
+    async def twice() -> list:
+        return [await client.generate_content("prompt", list[Person]) for _ in range(2)]
+
+    miss, hit = asyncio.run(twice())
+    assert upstream.calls == 1
+    assert hit.content == miss.content
+    assert hit.metadata["cache_hit"]
@@ -0,0 +1,43 @@
+import asyncio
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from celeste_structured_output.coalescing import CoalescingStructuredClient
+from celeste_structured_output.core.types import StructuredResponse
+
+
+class Person(BaseModel):
+    full_name: str = Field(alias="fullName")
+
+
+class SlowClient:
+    provider = None
+    model_name = "fake"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def generate_content(
+        self, prompt: str, response_schema: Any, **kwargs: Any
+    ) -> StructuredResponse:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return StructuredResponse(content=Person(fullName="Ada"), provider=None)
+
+
+def test_waiters_get_their_own_copy_of_aliased_content() -> None:
+    upstream = SlowClient()
+    client = CoalescingStructuredClient(upstream)
+
+    async def run() -> list:
+        calls = [client.generate_content("prompt", Person) for _ in range(3)]
+        return await asyncio.gather(*calls)
+
+    leader, *waiters = asyncio.run(run())
+    assert upstream.calls == 1
+    assert client.stats.deduplicated == 2
+    for waiter in waiters:
+        assert waiter.content == leader.content
+        assert waiter.content is not leader.content
+        assert waiter.metadata["coalesced"]
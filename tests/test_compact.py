@@ -0,0 +1,143 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, List, Optional
+
+import pytest
+from pydantic import BaseModel, Field, field_validator
+
+from celeste_structured_output.compact import CompactStructuredClient, compact_schema
+from celeste_structured_output.core.schema import compile_schema
+from celeste_structured_output.core.streaming import StreamAssembler
+from celeste_structured_output.core.types import (
+    AIUsage,
+    StreamEvent,
+    StructuredResponse,
+)
+
+
+class Address(BaseModel):
+    city: str
+
+
+class Person(BaseModel):
+    full_name: str = Field(alias="fullName", description="Given and family name")
+    age: int = Field(ge=0)
+    address: Optional[Address] = None
+    friends: List["Person"] = []
+
+    @field_validator("full_name")
+    @classmethod
+    def _strip(cls, value: str) -> str:
+        return value.strip()
+
+
+FULL = {
+    "fullName": "Ada",
+    "age": 36,
+    "address": {"city": "London"},
+    "friends": [{"fullName": " Bob ", "age": 5, "address": None, "friends": []}],
+}
+# The same answer with Person's fields as a-d and Address's as a
+COMPACT = {
+    "a": "Ada",
+    "b": 36,
+    "c": {"a": "London"},
+    "d": [{"a": " Bob ", "b": 5, "c": None, "d": []}],
+}
+
+
+def test_compact_schema_round_trips_to_the_original_models() -> None:
+    compact = compact_schema(Person)
+    content = compact.compiled.validate_json(json.dumps(COMPACT))
+    restored = compact.restore(content)
+    assert restored == Person.model_validate(FULL)
+    assert restored.friends[0].full_name == "Bob"
+    assert compact.saved_tokens(content, restored) > 0
+    # Keys stay documented on the wire
+    wire = json.dumps(compact.compiled.json_schema)
+    assert "fullName: Given and family name" in wire
+    assert "Person: a=fullName, b=age, c=address, d=friends" in compact.legend()
+
+
+def test_compact_lists_round_trip() -> None:
+    compact = compact_schema(list[Person])
+    content = compact.compiled.validate_json(json.dumps([COMPACT, COMPACT]))
+    assert compact.restore(content) == [Person.model_validate(FULL)] * 2
+
+
+class FakeClient:
+    provider = None
+    model_name = "fake"
+
+    def __init__(self, answer: Any) -> None:
+        self.text = json.dumps(answer)
+        self.prompts: List[str] = []
+
+    async def generate_content(
+        self, prompt: str, response_schema: Any, **kwargs: Any
+    ) -> StructuredResponse:
+        self.prompts.append(prompt)
+        return StructuredResponse(
+            content=compile_schema(response_schema).validate_json(self.text),
+            usage=AIUsage(input_tokens=1, output_tokens=10, total_tokens=11),
+            provider=None,
+        )
+
+    async def stream_events(
+        self, prompt: str, response_schema: Any, deltas: bool = False
+    ) -> AsyncIterator[StreamEvent]:
+        assembler = StreamAssembler(compile_schema(response_schema), deltas=deltas)
+        kind = "delta" if deltas else "partial"
+        for start in range(0, len(self.text), 7):
+            partial = assembler.feed(self.text[start : start + 7])
+            if partial is not None:
+                yield StreamEvent(kind, partial, None, self.model_name)
+        yield StreamEvent("final", assembler.finish(), None, self.model_name)
+
+
+def test_client_returns_original_models_and_counts_savings() -> None:
+    upstream = FakeClient(COMPACT)
+    client = CompactStructuredClient(upstream, legend=True)
+    response = asyncio.run(client.generate_content("prompt", Person))
+    assert response.content == Person.model_validate(FULL)
+    assert response.metadata["saved_output_tokens"] > 0
+    assert client.stats.output_tokens == 10
+    assert upstream.prompts[0].endswith(compact_schema(Person).legend())
+
+
+@pytest.mark.parametrize("deltas", [False, True])
+def test_object_streams_restore_partials(deltas: bool) -> None:
+    client = CompactStructuredClient(FakeClient(COMPACT))
+
+    async def collect() -> List[StreamEvent]:
+        stream = client.stream_events("prompt", Person, deltas=deltas)
+        return [event async for event in stream]
+
+    events = asyncio.run(collect())
+    *partials, final = events
+    assert final.content == Person.model_validate(FULL)
+    assert final.metadata["saved_output_tokens"] > 0
+    assert all(isinstance(event.content, Person) for event in partials)
+    fields = [event.content.model_fields_set for event in partials]
+    if deltas:
+        assert set().union(*fields) == set(Person.model_fields)
+    else:
+        assert fields[-1] == set(Person.model_fields)
+    assert partials[-1].content.friends[0].full_name == "Bob"
+
+
+@pytest.mark.parametrize("deltas", [False, True])
+def test_list_streams_restore_items(deltas: bool) -> None:
+    client = CompactStructuredClient(FakeClient([COMPACT, COMPACT]))
+
+    async def collect() -> List[StreamEvent]:
+        stream = client.stream_events("prompt", list[Person], deltas=deltas)
+        return [event async for event in stream]
+
+    *partials, final = asyncio.run(collect())
+    expected = [Person.model_validate(FULL)] * 2
+    assert final.content == expected
+    if deltas:
+        assert [item for event in partials for item in event.content] == expected
+    else:
+        assert partials[-1].content == expected
@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any, List
+
+import pytest
+from google.genai import errors
+
+from celeste_structured_output import PromptPrefix
+from celeste_structured_output.providers import google
+from celeste_structured_output.providers.google import GoogleStructuredClient
+
+
+class FakeCaches:
+    def __init__(self, outcomes: List[Any]) -> None:
+        self.outcomes = outcomes
+        self.calls = 0
+
+    async def create(self, **kwargs: Any) -> Any:
+        outcome = self.outcomes[min(self.calls, len(self.outcomes) - 1)]
+        self.calls += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(name=outcome)
+
+
+def cached_names(outcomes: List[Any], calls: int) -> tuple[List[Any], int]:
+    client = GoogleStructuredClient(api_key="test")
+    caches = FakeCaches(outcomes)
+    client.client = SimpleNamespace(aio=SimpleNamespace(caches=caches))
+    prefix = PromptPrefix(system="sys")
+
+    async def run() -> List[Any]:
+        return [await client.cached_content(prefix) for _ in range(calls)]
+
+    return asyncio.run(run()), caches.calls
+
+
+def error(code: int, status: str) -> errors.ClientError:
+    return errors.ClientError(code, {"error": {"code": code, "status": status}})
+
+
+def test_too_small_prefix_is_never_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(google, "CACHE_RETRY_DELAY", 0.0)
+    names, calls = cached_names([error(400, "INVALID_ARGUMENT")], 3)
+    assert names == [None, None, None]
+    assert calls == 1
+
+
+@pytest.mark.parametrize(
+    ("code", "status"), [(429, "RESOURCE_EXHAUSTED"), (403, "PERMISSION_DENIED")]
+)
+def test_passing_errors_are_retried(
+    monkeypatch: pytest.MonkeyPatch, code: int, status: str
+) -> None:
+    monkeypatch.setattr(google, "CACHE_RETRY_DELAY", 0.0)
+    names, calls = cached_names([error(code, status), "cachedContents/1"], 3)
+    assert names == [None, "cachedContents/1", "cachedContents/1"]
+    assert calls == 2
+
+
+def test_passing_errors_back_off() -> None:
+    names, calls = cached_names([error(429, "RESOURCE_EXHAUSTED"), "unused"], 2)
+    assert names == [None, None]
+    assert calls == 1
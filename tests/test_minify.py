@@ -0,0 +1,152 @@
+from typing import Any, Dict, List, Literal, Optional
+
+import pytest
+from jsonschema import Draft202012Validator
+from pydantic import BaseModel, Field
+
+from celeste_structured_output.core.enums import StructuredOutputProvider
+from celeste_structured_output.core.minify import (
+    DEFAULT_POLICY,
+    PRESERVE,
+    SchemaPolicy,
+    minimize_schema,
+    schema_policy,
+)
+from celeste_structured_output.core.schema import compile_schema
+
+
+class Home(BaseModel):
+    city: str
+    zip: Optional[str] = None
+
+
+# Identical to Home once titles are gone
+class Office(BaseModel):
+    city: str
+    zip: Optional[str] = None
+
+
+class Meta(BaseModel):
+    # Property names that are also keywords stripped by minimization
+    title: str
+    default: int = 3
+    description: Optional[str] = Field(None, description="Free text")
+    examples: List[str] = Field(default_factory=list, examples=[["a"]])
+    enum: Literal["x", "y"] = "x"
+
+
+class Node(BaseModel):
+    label: str = Field(title="Label", description="Shown to users")
+    children: List["Node"] = []
+
+
+class Document(BaseModel):
+    home: Home
+    office: Office
+    meta: Meta
+    tree: Node
+    nodes: List[Node] = []
+    kind: Literal["a", "b"] = "a"
+
+
+NODE = {"label": "root", "children": [{"label": "leaf", "children": []}]}
+VALID = {
+    "home": {"city": "Paris", "zip": None},
+    "office": {"city": "Rome"},
+    "meta": {"title": "t", "default": 1, "examples": ["e"], "enum": "y"},
+    "tree": NODE,
+    "nodes": [NODE],
+}
+DOCUMENTS: List[Any] = [
+    VALID,
+    {**VALID, "kind": "b"},
+    {**VALID, "kind": "c"},
+    {**VALID, "office": {"zip": "1"}},
+    {**VALID, "meta": {"default": 1}},
+    {**VALID, "meta": {"title": 1}},
+    {**VALID, "meta": {"title": "t", "enum": "z"}},
+    {**VALID, "tree": {"label": "root", "children": [{"children": []}]}},
+    {**VALID, "nodes": [{"label": 1}]},
+    {key: value for key, value in VALID.items() if key != "tree"},
+    [],
+    "text",
+]
+POLICIES = [
+    DEFAULT_POLICY,
+    PRESERVE,
+    schema_policy(StructuredOutputProvider.OLLAMA),
+    SchemaPolicy(dedupe_defs=False),
+    SchemaPolicy(inline_defs=False),
+]
+
+
+def keywords(node: Any, found: set) -> set:
+    """Keywords used anywhere in ``node``, skipping property names."""
+    if isinstance(node, list):
+        for item in node:
+            keywords(item, found)
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            found.add(key)
+            if key in ("properties", "$defs"):
+                for sub in value.values():
+                    keywords(sub, found)
+            elif key not in ("enum", "const", "default", "examples", "required"):
+                keywords(value, found)
+    return found
+
+
+@pytest.mark.parametrize("policy", POLICIES)
+@pytest.mark.parametrize("wrapped", [False, True])
+def test_minimized_schemas_accept_the_same_documents(
+    policy: SchemaPolicy, wrapped: bool
+) -> None:
+    compiled = compile_schema(list[Document] if wrapped else Document)
+    schema = compiled.wire_json_schema if wrapped else compiled.json_schema
+    original = Draft202012Validator(schema)
+    minimized = Draft202012Validator(minimize_schema(schema, policy))
+    documents = [{"data": [doc]} for doc in DOCUMENTS] if wrapped else DOCUMENTS
+    results = [original.is_valid(doc) for doc in documents]
+    assert results == [minimized.is_valid(doc) for doc in documents]
+    assert results[:2] == [True, True] and not any(results[2:])
+
+
+def test_keywords_are_stripped_but_property_names_kept() -> None:
+    schema = minimize_schema(compile_schema(Document).json_schema)
+    assert not keywords(schema, set()) & {"title", "default"}
+    assert "description" in keywords(schema, set())
+    meta = schema["properties"]["meta"]["properties"]
+    assert list(meta) == ["title", "default", "description", "examples", "enum"]
+
+    ollama = minimize_schema(
+        compile_schema(Document).json_schema,
+        schema_policy(StructuredOutputProvider.OLLAMA),
+    )
+    assert not keywords(ollama, set()) & {"title", "default", "description"}
+
+
+def test_identical_definitions_are_merged_and_single_uses_inlined() -> None:
+    schema = minimize_schema(compile_schema(Document).json_schema)
+    # Home and Office merge into a shared definition, Meta is used once and
+    # inlined, Node is recursive and stays
+    assert list(schema["$defs"]) == ["Home", "Node"]
+    assert schema["properties"]["office"] == {"$ref": "#/$defs/Home"}
+    assert schema["properties"]["home"] == {"$ref": "#/$defs/Home"}
+    assert "$ref" not in schema["properties"]["meta"]
+    node = schema["$defs"]["Node"]
+    assert node["properties"]["children"]["items"] == {"$ref": "#/$defs/Node"}
+
+
+def test_shared_definitions_stay_referenced() -> None:
+    class Pair(BaseModel):
+        first: Home
+        second: Home
+
+    schema = minimize_schema(compile_schema(Pair).json_schema)
+    assert schema["properties"]["first"] == {"$ref": "#/$defs/Home"}
+    assert list(schema["$defs"]) == ["Home"]
+
+
+def test_preserve_returns_the_schema_unchanged() -> None:
+    schema: Dict[str, Any] = compile_schema(Document).json_schema
+    assert minimize_schema(schema, PRESERVE) == schema
@@ -0,0 +1,57 @@
+import asyncio
+import json
+from typing import Any, Dict, List
+
+import httpx
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+
+from celeste_structured_output import PromptPrefix
+from celeste_structured_output.core.schema import compile_schema
+from celeste_structured_output.providers.openai import OpenAIClient
+
+
+class Person(BaseModel):
+    name: str
+
+
+def completion(content: str) -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-test",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }
+        ],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+def test_prompt_cache_key_is_sent_in_the_request_body() -> None:
+    bodies: List[Dict[str, Any]] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json=completion('{"name": "Ada"}'))
+
+    client = OpenAIClient(model="gpt-test", api_key="test")
+    client.client = AsyncOpenAI(
+        api_key="test",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handle)),
+    )
+    prefix = PromptPrefix(system="sys")
+
+    async def run() -> Any:
+        return await client.generate_content(
+            "prompt", Person, prefix=prefix, extra_body={"user": "u1"}
+        )
+
+    response = asyncio.run(run())
+    assert response.content == Person(name="Ada")
+    assert bodies[0]["prompt_cache_key"] == prefix.cache_key(compile_schema(Person))
+    assert bodies[0]["user"] == "u1"
@@ -0,0 +1,86 @@
+import asyncio
+from typing import Any
+
+from celeste_structured_output import (
+    ClientPool,
+    background_loop,
+    create_structured_client,
+    create_sync_client,
+    register_provider,
+)
+from celeste_structured_output.core.concurrency import PerLoop
+
+
+class FakeClient:
+    def __init__(self, **kwargs: Any) -> None:
+        self.kwargs = kwargs
+        self.closed = False
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def test_clients_are_shared_within_a_loop_only() -> None:
+    pool = ClientPool()
+
+    async def pair() -> tuple:
+        return (
+            pool.get("fake", FakeClient, model="m"),
+            pool.get("fake", FakeClient, model="m"),
+        )
+
+    first, again = asyncio.run(pair())
+    second, _ = asyncio.run(pair())
+    assert first is again
+    assert second is not first
+    # Both loops are closed, so their clients were dropped
+    assert len(pool) == 0
+
+
+def test_clients_outside_a_loop_are_not_pooled() -> None:
+    pool = ClientPool()
+    assert pool.get("fake", FakeClient) is not pool.get("fake", FakeClient)
+    assert len(pool) == 0
+
+
+def test_aclose_closes_the_running_loops_clients() -> None:
+    pool = ClientPool()
+
+    async def run() -> FakeClient:
+        client = pool.get("fake", FakeClient)
+        await pool.aclose()
+        return client
+
+    assert asyncio.run(run()).closed
+    assert len(pool) == 0
+
+
+def test_per_loop_values() -> None:
+    locks = PerLoop(asyncio.Lock)
+
+    async def lock() -> asyncio.Lock:
+        async with locks.get():
+            return locks.get()
+
+    first = asyncio.run(lock())
+    assert asyncio.run(lock()) is not first
+
+
+class LoopClient(FakeClient):
+    provider = None
+    model_name = "fake"
+
+    async def generate_content(self, prompt: str, response_schema: Any) -> Any:
+        return asyncio.get_running_loop()
+
+
+def test_sync_clients_are_pooled_on_the_background_loop() -> None:
+    register_provider("fake-loop", LoopClient)
+    sync_client = create_sync_client("fake-loop")
+
+    async def create() -> Any:
+        return create_structured_client("fake-loop")
+
+    assert create_sync_client("fake-loop").client is sync_client.client
+    assert asyncio.run(create()) is not sync_client.client
+    assert sync_client.generate_content("x", None) is background_loop.loop
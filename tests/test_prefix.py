@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+
+from celeste_structured_output import PromptPrefix
+
+
+class Author(BaseModel):
+    full_name: str = Field(alias="fullName")
+
+
+def test_example_outputs_use_aliases() -> None:
+    prefix = PromptPrefix(examples=[("in", Author(fullName="Ann"))])
+    assert prefix.messages()[-1]["content"] == '{"fullName":"Ann"}'
@@ -0,0 +1,263 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Any, List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from celeste_structured_output import scheduling
+from celeste_structured_output.core.types import AIUsage, StructuredResponse
+from celeste_structured_output.providers.anthropic import AnthropicStructuredClient
+from celeste_structured_output.providers.mistral import MistralStructuredClient
+from celeste_structured_output.providers.openai import OpenAIClient
+from celeste_structured_output.scheduling import (
+    Priority,
+    QuotaLane,
+    QuotaLimits,
+    QuotaScheduler,
+    ScheduledStructuredClient,
+    TokenBucket,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(scheduling, "time", fake)
+    return fake
+
+
+def usage(total: int) -> AIUsage:
+    return AIUsage(input_tokens=total, output_tokens=0, total_tokens=total)
+
+
+def test_bucket_refills_continuously_up_to_capacity(clock: FakeClock) -> None:
+    bucket = TokenBucket(60)
+    assert bucket.delay(60, clock.now) == 0.0
+    bucket.take(60, clock.now)
+    assert bucket.delay(1, clock.now) == pytest.approx(1.0)
+    assert bucket.delay(30, clock.now) == pytest.approx(30.0)
+    clock.advance(10)
+    assert bucket.delay(10, clock.now) == 0.0
+    clock.advance(3600)
+    bucket.take(0, clock.now)
+    assert bucket.level == 60
+
+
+def test_bucket_debt_is_paid_back_first(clock: FakeClock) -> None:
+    bucket = TokenBucket(60)
+    bucket.take(60, clock.now)
+    bucket.adjust(30)  # settled 30 units above the estimate
+    assert bucket.delay(1, clock.now) == pytest.approx(31.0)
+    bucket.adjust(-45)
+    assert bucket.delay(15, clock.now) == 0.0
+
+
+def test_oversized_requests_wait_for_a_full_bucket(clock: FakeClock) -> None:
+    bucket = TokenBucket(60)
+    bucket.take(1, clock.now)
+    assert bucket.delay(600, clock.now) == pytest.approx(1.0)
+
+
+def test_drain_empties_the_bucket_but_keeps_debt(clock: FakeClock) -> None:
+    bucket = TokenBucket(60)
+    bucket.drain(clock.now)
+    assert bucket.level == 0
+    bucket.adjust(10)
+    bucket.drain(clock.now)
+    assert bucket.level == -10
+
+
+async def settle_soon() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_lane_caps_concurrency_and_serves_priorities_in_order(
+    clock: FakeClock,
+) -> None:
+    lane = QuotaLane(QuotaLimits(max_concurrency=1))
+    granted: List[str] = []
+
+    async def acquire(name: str, priority: Priority) -> Any:
+        ticket = await lane.acquire(10, priority)
+        granted.append(name)
+        return ticket
+
+    async def run() -> None:
+        first = await lane.acquire(10)
+        batch = asyncio.ensure_future(acquire("batch", Priority.BATCH))
+        await settle_soon()
+        interactive = asyncio.ensure_future(
+            acquire("interactive", Priority.INTERACTIVE)
+        )
+        await settle_soon()
+        assert granted == [] and lane.in_flight == 1
+        first.settle(usage(10))
+        (await interactive).settle(usage(10))
+        (await batch).settle(usage(10))
+
+    asyncio.run(run())
+    assert granted == ["interactive", "batch"]
+    assert lane.in_flight == 0
+
+
+def test_lane_waits_for_the_request_bucket(clock: FakeClock) -> None:
+    lane = QuotaLane(QuotaLimits(requests_per_minute=2))
+
+    async def run() -> None:
+        first, second = await lane.acquire(10), await lane.acquire(10)
+        third = asyncio.ensure_future(lane.acquire(10))
+        await settle_soon()
+        # Settling wakes the waiters; the bucket is still empty
+        first.settle(None)
+        await settle_soon()
+        assert not third.done()
+        clock.advance(30)
+        second.settle(None)
+        (await asyncio.wait_for(third, 1)).settle(None)
+
+    asyncio.run(run())
+    assert lane.stats.granted == 3
+
+
+def test_lane_settles_tokens_with_real_usage(clock: FakeClock) -> None:
+    lane = QuotaLane(QuotaLimits(tokens_per_minute=100))
+
+    async def run() -> None:
+        (await lane.acquire(40)).settle(usage(70))
+
+    asyncio.run(run())
+    assert lane.tokens is not None
+    assert lane.tokens.level == pytest.approx(30)
+    assert lane.stats.estimated_tokens == 40
+    assert lane.stats.settled_tokens == 70
+
+
+def test_aimd_halves_on_rate_limits_and_grows_additively(clock: FakeClock) -> None:
+    lane = QuotaLane(
+        QuotaLimits(max_concurrency=8, min_concurrency=2, tokens_per_minute=600)
+    )
+
+    async def acquire() -> Any:
+        # Past any pause, with refilled buckets
+        clock.advance(60)
+        return await lane.acquire(10)
+
+    lane.release(asyncio.run(acquire()), retry_after=5.0)
+    assert lane.concurrency == 4
+    assert lane.paused_until == clock.now + 5.0
+    assert lane.tokens is not None and lane.tokens.level <= 0
+    for _ in range(3):
+        lane.release(asyncio.run(acquire()), retry_after=0.0)
+    assert lane.concurrency == 2  # never below min_concurrency
+    assert lane.stats.rate_limited == 4
+
+    asyncio.run(acquire()).settle(None)
+    assert lane.concurrency == pytest.approx(2.5)
+    for _ in range(100):
+        asyncio.run(acquire()).settle(None)
+    assert lane.concurrency == 8
+
+
+def test_failures_other_than_rate_limits_do_not_back_off(clock: FakeClock) -> None:
+    lane = QuotaLane(QuotaLimits(max_concurrency=4))
+
+    async def acquire() -> Any:
+        return await lane.acquire(10)
+
+    lane.release(asyncio.run(acquire()), retry_after=None)
+    assert lane.concurrency == 4
+    assert lane.paused_until == 0.0
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after_ms: str = "0") -> None:
+        super().__init__("rate limited")
+        self.response = SimpleNamespace(headers={"retry-after-ms": retry_after_ms})
+
+
+class Person(BaseModel):
+    name: str
+
+
+class FakeClient:
+    provider = None
+    model_name = "fake"
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.calls = 0
+        self.sdk_retries = True
+
+    def without_sdk_retries(self) -> "FakeClient":
+        self.sdk_retries = False
+        return self
+
+    async def generate_content(
+        self, prompt: str, response_schema: Any, **kwargs: Any
+    ) -> StructuredResponse:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RateLimited()
+        return StructuredResponse(
+            content=Person(name="Ada"), usage=usage(5), provider=None
+        )
+
+
+def scheduled(failures: int, max_retries: int) -> tuple:
+    upstream = FakeClient(failures)
+    client = ScheduledStructuredClient(
+        upstream, scheduler=QuotaScheduler(), max_retries=max_retries
+    )
+    return upstream, client
+
+
+def test_rate_limits_are_retried_after_the_lane_backs_off(clock: FakeClock) -> None:
+    upstream, client = scheduled(failures=2, max_retries=3)
+    response = asyncio.run(client.generate_content("p", Person))
+    assert response.content == Person(name="Ada")
+    assert upstream.calls == 3
+    assert not upstream.sdk_retries
+    assert client.lane.stats.rate_limited == 2
+    assert client.lane.in_flight == 0
+
+
+def test_rate_limits_beyond_max_retries_are_raised(clock: FakeClock) -> None:
+    upstream, client = scheduled(failures=5, max_retries=2)
+    with pytest.raises(RateLimited):
+        asyncio.run(client.generate_content("p", Person))
+    assert upstream.calls == 3
+    assert client.lane.in_flight == 0
+
+
+@pytest.mark.parametrize("client_class", [OpenAIClient, AnthropicStructuredClient])
+def test_max_retries_reaches_the_sdk(client_class: type) -> None:
+    client = client_class(api_key="test", max_retries=5)
+    assert client.client.max_retries == 5
+    quiet = client.without_sdk_retries()
+    assert quiet.client.max_retries == 0
+    assert client.client.max_retries == 5
+    assert client_class(api_key="test").client.max_retries == 2  # SDK default
+
+
+def test_mistral_max_retries_reaches_the_sdk() -> None:
+    client = MistralStructuredClient(api_key="test", max_retries=3)
+    retry_config: Optional[Any] = client.client.sdk_configuration.retry_config
+    assert retry_config is not None and retry_config.strategy == "backoff"
+    quiet = client.without_sdk_retries()
+    assert quiet.client.sdk_configuration.retry_config is None
+    assert client.client.sdk_configuration.retry_config is retry_config
@@ -0,0 +1,166 @@
+import json
+from typing import Any, List, Tuple
+
+import pytest
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from celeste_structured_output.core.schema import compile_schema
+from celeste_structured_output.core.streaming import (
+    IncrementalJSONParser,
+    StreamAssembler,
+)
+
+DOCUMENT = json.dumps(
+    {
+        "name": 'Ada "the" \\ Countess\né中',
+        "age": 36,
+        "score": -1.5e3,
+        "alive": False,
+        "spouse": None,
+        "tags": ["a", "b]", "{c}"],
+        "address": {"city": "London", "lines": ["1", "2"]},
+    }
+)
+
+
+def chunked(text: str, size: int) -> List[str]:
+    return [text[start : start + size] for start in range(0, len(text), size)]
+
+
+def feed_all(parser: IncrementalJSONParser, chunks: List[str]) -> List[Tuple]:
+    completed = []
+    for chunk in chunks:
+        completed.extend(parser.feed(chunk))
+    return completed
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(DOCUMENT)])
+def test_object_members_complete_whatever_the_chunking(size: int) -> None:
+    parser = IncrementalJSONParser()
+    completed = feed_all(parser, chunked(DOCUMENT, size))
+    expected = json.loads(DOCUMENT)
+    assert [key for key, _ in completed] == list(expected)
+    assert {key: json.loads(raw) for key, raw in completed} == expected
+    assert parser.done
+    assert parser.document == DOCUMENT
+
+
+def test_members_are_reported_when_their_closing_character_arrives() -> None:
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": "x", "b": 12') == [("a", '"x"')]
+    # A number only ends at the next delimiter
+    assert parser.feed("3") == []
+    assert parser.feed(', "c": [1, ') == [("b", "123")]
+    assert parser.feed("2]}") == [("c", "[1, 2]")]
+    assert parser.done
+
+
+def test_escapes_split_across_chunks() -> None:
+    parser = IncrementalJSONParser()
+    completed = feed_all(parser, ['{"k": "a\\', '"}', '", "n": "\\\\', '"}'])
+    assert completed == [("k", '"a\\"}"'), ("n", '"\\\\"')]
+    assert json.loads(completed[0][1]) == 'a"}'
+
+
+def test_array_items_are_keyed_by_index_under_the_path() -> None:
+    parser = IncrementalJSONParser(("data",))
+    text = '{"data": [{"n": 1}, {"n": [2, 3]}, "x"], "other": [9]}'
+    completed = feed_all(parser, chunked(text, 4))
+    assert completed == [(0, '{"n": 1}'), (1, '{"n": [2, 3]}'), (2, '"x"')]
+
+
+def test_text_around_the_root_value_is_ignored() -> None:
+    parser = IncrementalJSONParser()
+    completed = feed_all(parser, ["```json\n[1, ", "2]\n```", "[3]"])
+    assert completed == [(0, "1"), (1, "2")]
+    assert parser.document == "[1, 2]"
+    assert parser.feed("[4]") == []
+
+
+def test_document_is_partial_until_done() -> None:
+    parser = IncrementalJSONParser()
+    assert parser.document == ""
+    parser.feed('{"a": [1')
+    assert not parser.done
+    assert parser.document == '{"a": [1'
+
+
+class Person(BaseModel):
+    full_name: str = Field(alias="fullName")
+    age: int = Field(ge=0)
+    tags: List[str] = []
+
+    @field_validator("full_name")
+    @classmethod
+    def _strip(cls, value: str) -> str:
+        return value.strip()
+
+
+PEOPLE = [
+    {"fullName": " Ada ", "age": 36, "tags": ["math"]},
+    {"fullName": "Alan", "age": 41},
+    {"fullName": "Grace", "age": 85, "tags": []},
+]
+
+
+def stream(assembler: StreamAssembler, text: str, size: int) -> List[Any]:
+    partials = [assembler.feed(chunk) for chunk in chunked(text, size)]
+    return [partial for partial in partials if partial is not None]
+
+
+@pytest.mark.parametrize("wrapped", [False, True])
+def test_list_partials_accumulate_validated_items(wrapped: bool) -> None:
+    compiled = compile_schema(list[Person])
+    text = json.dumps({"data": PEOPLE} if wrapped else PEOPLE)
+    assembler = StreamAssembler(compiled, wrapped=wrapped)
+    partials = stream(assembler, text, 5)
+    assert [len(partial) for partial in partials] == [1, 2, 3]
+    final = assembler.finish()
+    assert final == compiled.validate(PEOPLE)
+    assert partials[-1] == final
+    assert final[0].full_name == "Ada"
+
+
+def test_list_deltas_carry_each_item_once() -> None:
+    compiled = compile_schema(list[Person])
+    assembler = StreamAssembler(compiled, deltas=True)
+    deltas = stream(assembler, json.dumps(PEOPLE), 3)
+    items = [item for delta in deltas for item in delta]
+    assert items == compiled.validate(PEOPLE)
+    assert assembler.finish() == items
+
+
+def test_object_partials_set_completed_fields_only() -> None:
+    compiled = compile_schema(Person)
+    assembler = StreamAssembler(compiled)
+    assert assembler.feed('{"fullName": " Ada ", "age"').model_fields_set == {
+        "full_name"
+    }
+    partial = assembler.feed(': 36, "tags": ["x"]}')
+    assert partial.model_fields_set == {"full_name", "age", "tags"}
+    # Field validators and aliases apply to partial fields too
+    assert partial.full_name == "Ada"
+    assert partial == assembler.finish()
+
+
+def test_object_deltas_hold_only_new_fields() -> None:
+    assembler = StreamAssembler(compile_schema(Person), deltas=True)
+    first = assembler.feed('{"fullName": "Ada", ')
+    assert first.model_fields_set == {"full_name"}
+    assert assembler.feed('"age": 3') is None
+    second = assembler.feed("6}")
+    assert second.model_fields_set == {"age"}
+    assert second.age == 36
+
+
+def test_invalid_fields_fail_when_they_complete() -> None:
+    assembler = StreamAssembler(compile_schema(Person))
+    assembler.feed('{"fullName": "Ada", ')
+    with pytest.raises(ValidationError):
+        assembler.feed('"age": -1,')
+
+
+def test_finish_without_a_document() -> None:
+    assembler = StreamAssembler(compile_schema(Person))
+    assert assembler.feed("no json here") is None
+    assert assembler.finish() is None